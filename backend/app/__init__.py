@@ -22,6 +22,9 @@ def create_app(config_name='development'):
     Returns:
         Flask: Configured Flask application instance
     """
+    from app.utils.startup import StartupTimer
+    timer = StartupTimer()
+    
     # Create Flask app with correct template and static folder paths
     app = Flask(__name__, 
                 template_folder='../templates',
@@ -45,9 +48,32 @@ def create_app(config_name='development'):
         app.logger.setLevel(logging.INFO)
         app.logger.info('Nepal Meat Shop startup')
     
+    # Request instrumentation (registers the Mongo command listener, so before the client exists)
+    from app.utils.performance import perf_monitor
+    perf_monitor.init_app(app)
+    
+    # Prometheus /metrics (also listens to Mongo commands)
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
+    
+    # Slow query log with sampled explain plans
+    from app.utils.slow_queries import slow_query_recorder
+    slow_query_recorder.init_app(app)
+    
     # Initialize MongoDB connection
     from app.utils.mongo_db import mongo_db
-    mongo_db.init_app(app)
+    with timer.phase('mongodb'):
+        mongo_db.init_app(app)
+        
+        from app.utils.page_cache import page_cache
+        page_cache.init_app(app)
+    
+    # Start background webhook processing
+    from app.services.webhook_queue import webhook_queue
+    webhook_queue.init_app(app)
+    
+    from app.services.image_queue import image_queue
+    image_queue.init_app(app)
     
     # Setup Flask-Login
     login_manager.init_app(app)
@@ -89,7 +115,10 @@ def create_app(config_name='development'):
     # Register template filters and context processors
     register_template_helpers(app)
     
-    # MongoDB connection is handled by mongo_db.init_app()
+    # MongoDB connection is handled by mongo_db.init_app(); indexes follow MONGO_INDEX_MODE
+    with timer.phase('indexes'):
+        mongo_db.init_indexes(app)
+    timer.finish(app)
     
     return app
 
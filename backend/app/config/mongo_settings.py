@@ -23,6 +23,33 @@ class MongoConfig:
     MONGO_USERNAME = os.environ.get('MONGO_USERNAME')
     MONGO_PASSWORD = os.environ.get('MONGO_PASSWORD')
     
+    # MongoClient pool, timeouts and wire compression (one client per worker process)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE') or 50)
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE') or 0)
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS') or 60000)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS') or 2000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS') or 5000)
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS') or 5000)
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS') or 60000)
+    # Compressors the server and installed modules support are used in this order
+    # (zstd needs zstandard; snappy is left out since python-snappy isn't a requirement)
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', 'zstd,zlib')
+    MONGO_APP_NAME = os.environ.get('MONGO_APP_NAME') or 'nepal-meat-shop'
+    
+    # Read-only workloads (business insights, CSV/PDF exports, dashboard counts) routed
+    # away from the primary so they don't slow down checkout:
+    # primary, primaryPreferred, secondary, secondaryPreferred or nearest
+    MONGO_ANALYTICS_READ_PREFERENCE = os.environ.get('MONGO_ANALYTICS_READ_PREFERENCE') or 'secondaryPreferred'
+    MONGO_EXPORTS_READ_PREFERENCE = os.environ.get('MONGO_EXPORTS_READ_PREFERENCE') or 'secondaryPreferred'
+    MONGO_REPORTS_READ_PREFERENCE = os.environ.get('MONGO_REPORTS_READ_PREFERENCE') or 'secondaryPreferred'
+    # Secondaries lagging further behind are not read from (min 90, 0 = no limit)
+    MONGO_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_MAX_STALENESS_SECONDS') or 120)
+    
+    # Index builds: 'startup' (before serving), 'background' (thread after the first
+    # request) or 'migrate' (only via scripts/manage_indexes.py at deploy time).
+    # Unique indexes are always created before serving.
+    MONGO_INDEX_MODE = os.environ.get('MONGO_INDEX_MODE') or 'startup'
+    
     # Flask settings
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'nepal-meat-shop-secret-key-2024'
     WTF_CSRF_ENABLED = True
@@ -30,9 +57,64 @@ class MongoConfig:
     # File upload settings
     UPLOAD_FOLDER = '../frontend/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # max-age of content-addressed uploads (served with Cache-Control: immutable)
+    UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE') or 31536000)
+    # ... and of older, timestamp-named uploads (revalidated with ETag/Last-Modified afterwards)
+    UPLOAD_MUTABLE_MAX_AGE = int(os.environ.get('UPLOAD_MUTABLE_MAX_AGE') or 3600)
+    # Who sends upload bytes: python (send_file), x-accel-redirect (nginx) or x-sendfile (Apache/lighttpd)
+    UPLOAD_SERVE_MODE = os.environ.get('UPLOAD_SERVE_MODE') or 'python'
+    UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX') or '/protected-uploads/'
+    # Resized WebP/JPEG copies of uploaded images (thumb, card, detail)
+    IMAGE_VARIANTS_ENABLED = os.environ.get('IMAGE_VARIANTS_ENABLED', 'true').lower() == 'true'
+    IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY') or 82)
+    IMAGE_WEBP_QUALITY = int(os.environ.get('IMAGE_WEBP_QUALITY') or 80)
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
+    
+    # Request performance monitoring (/admin/perf)
+    PERF_MONITORING_ENABLED = os.environ.get('PERF_MONITORING_ENABLED', 'true').lower() == 'true'
+    PERF_QUERY_BUDGET = int(os.environ.get('PERF_QUERY_BUDGET') or 20)
+    PERF_SLOW_REQUEST_MS = float(os.environ.get('PERF_SLOW_REQUEST_MS') or 1000)
+    PERF_SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING', 'true').lower() == 'true'
+    
+    # Slow query log (/admin/slow-queries)
+    SLOW_QUERY_ENABLED = os.environ.get('SLOW_QUERY_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 100)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE') or 0.1)
+    SLOW_QUERY_COLLECTION_BYTES = int(os.environ.get('SLOW_QUERY_COLLECTION_BYTES') or 16 * 1024 * 1024)
+    
+    # Prometheus metrics (/metrics)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+    # Without a token /metrics answers 404 unless this is on (the development config turns it on)
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() == 'true'
+    
+    # Cached homepage HTML for anonymous visitors (invalidated by catalog edits)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    PAGE_CACHE_SECONDS = int(os.environ.get('PAGE_CACHE_SECONDS') or 60)
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES') or 64)
+    # Seconds clients may reuse /api/categories and /api/meat-types before revalidating
+    API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE') or 60)
+    # Delta sync (/products/api/changes): products per page, seconds re-sent for in-flight writes
+    SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE') or 500)
+    SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS') or 5)
+    # Most product ids accepted by /products/api/batch and /products/api/check-stock/batch
+    BATCH_MAX_IDS = int(os.environ.get('BATCH_MAX_IDS') or 100)
+    
+    # Webhook ingestion queue
+    WEBHOOK_QUEUE_ENABLED = os.environ.get('WEBHOOK_QUEUE_ENABLED', 'true').lower() == 'true'
+    WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS') or 2)
+    WEBHOOK_POLL_INTERVAL = float(os.environ.get('WEBHOOK_POLL_INTERVAL') or 2.0)
+    WEBHOOK_LEASE_SECONDS = int(os.environ.get('WEBHOOK_LEASE_SECONDS') or 60)
+    WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS') or 5)
+    
+    # Image variant queue (IMAGE_WORKERS threads per process, each feeding one pool process)
+    IMAGE_QUEUE_ENABLED = os.environ.get('IMAGE_QUEUE_ENABLED', 'true').lower() == 'true'
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS') or 1)
+    IMAGE_POLL_INTERVAL = float(os.environ.get('IMAGE_POLL_INTERVAL') or 2.0)
+    IMAGE_LEASE_SECONDS = int(os.environ.get('IMAGE_LEASE_SECONDS') or 120)
+    IMAGE_MAX_ATTEMPTS = int(os.environ.get('IMAGE_MAX_ATTEMPTS') or 3)
 
 class MongoDevelopmentConfig(MongoConfig):
     """Development environment configuration for MongoDB."""
@@ -40,23 +122,41 @@ class MongoDevelopmentConfig(MongoConfig):
     # Use environment variable from .env.mongo file
     MONGO_URI = os.environ.get('MONGO_URI')
     MONGO_DBNAME = os.environ.get('MONGO_DB_NAME') or 'nepal_meat_shop'
+    METRICS_PUBLIC = True
 
 class MongoProductionConfig(MongoConfig):
     """Production environment configuration for MongoDB."""
     DEBUG = False
     MONGO_URI = os.environ.get('MONGO_URI')
+    # Deploys run scripts/manage_indexes.py; workers boot creating only the unique indexes
+    MONGO_INDEX_MODE = os.environ.get('MONGO_INDEX_MODE') or 'migrate'
     
 class MongoTestingConfig(MongoConfig):
     """Testing environment configuration for MongoDB."""
     TESTING = True
     MONGO_URI = 'mongodb://localhost:27017/nepal_meat_shop_test'
     MONGO_DBNAME = 'nepal_meat_shop_test'
+    WEBHOOK_WORKERS = 0  # Tests drain the queue with webhook_queue.process_pending()
+    IMAGE_WORKERS = 0  # ... and image_queue.process_pending()
+    PAGE_CACHE_ENABLED = False
+    WTF_CSRF_ENABLED = False
+    METRICS_PUBLIC = True
+
+class MongoBenchmarkConfig(MongoConfig):
+    """Benchmark suite configuration (see benchmarks/README.md)."""
+    # Never falls back to MONGO_URI, which may point at production
+    MONGO_URI = os.environ.get('BENCH_MONGO_URI') or 'mongodb://localhost:27017/'
+    MONGO_DBNAME = os.environ.get('BENCH_DB_NAME') or 'nepal_meat_shop_bench'
     WTF_CSRF_ENABLED = False
+    WEBHOOK_WORKERS = 0
+    IMAGE_WORKERS = 0
+    SLOW_QUERY_ENABLED = False  # Explain plans would skew the timings
 
 # Configuration mapping for MongoDB
 mongo_config = {
     'development': MongoDevelopmentConfig,
     'production': MongoProductionConfig,
     'testing': MongoTestingConfig,
+    'benchmark': MongoBenchmarkConfig,
     'default': MongoDevelopmentConfig
 }
\ No newline at end of file
@@ -37,6 +37,9 @@ class PaymentConfig:
     PAYMENT_WEBHOOK_TIMEOUT = int(os.environ.get('PAYMENT_WEBHOOK_TIMEOUT', '10'))
     PAYMENT_VERIFICATION_TIMEOUT = int(os.environ.get('PAYMENT_VERIFICATION_TIMEOUT', '30'))
     
+    # Local gateway simulator (scripts/gateway_simulator.py)
+    PAYMENT_SIMULATOR_URL = os.environ.get('PAYMENT_SIMULATOR_URL', 'http://127.0.0.1:8765')
+    
     @classmethod
     def get_gateway_config(cls, gateway: str) -> Dict[str, Any]:
         """Get configuration for a specific payment gateway."""
@@ -62,6 +65,22 @@ class PaymentConfig:
         }
         return configs.get(gateway, {})
     
+    @classmethod
+    def get_simulator_urls(cls, gateway: str) -> Dict[str, str]:
+        """Get gateway endpoint URLs served by the local gateway simulator."""
+        base_url = cls.PAYMENT_SIMULATOR_URL.rstrip('/')
+        urls = {
+            'esewa': {
+                'payment_url': f'{base_url}/epay/main',
+                'verification_url': f'{base_url}/epay/transrec'
+            },
+            'khalti': {
+                'initiate_url': f'{base_url}/api/v2/epayment/initiate/',
+                'verification_url': f'{base_url}/api/v2/epayment/lookup/'
+            }
+        }
+        return urls.get(gateway, {})
+    
     @classmethod
     def is_gateway_enabled(cls, gateway: str) -> bool:
         """Check if a payment gateway is properly configured."""
@@ -112,10 +131,17 @@ class TestingPaymentConfig(PaymentConfig):
     STRIPE_SECRET_KEY = 'sk_test_mock'
     STRIPE_WEBHOOK_SECRET = 'whsec_test_mock'
 
+class SimulatorPaymentConfig(PaymentConfig):
+    """Payment configuration for load testing against the local gateway simulator."""
+    
+    ESEWA_VERIFICATION_URL = PaymentConfig.get_simulator_urls('esewa')['verification_url']
+    KHALTI_VERIFICATION_URL = PaymentConfig.get_simulator_urls('khalti')['verification_url']
+
 # Configuration mapping
 payment_config = {
     'development': DevelopmentPaymentConfig,
     'production': ProductionPaymentConfig,
     'testing': TestingPaymentConfig,
+    'simulator': SimulatorPaymentConfig,
     'default': DevelopmentPaymentConfig
 }
\ No newline at end of file
@@ -5,64 +5,147 @@ MongoDB document models for users, products, and orders.
 """
 
 from datetime import datetime
+from collections.abc import Mapping
 from bson.objectid import ObjectId
 from werkzeug.security import check_password_hash, generate_password_hash
-from flask_login import UserMixin
 
-class MongoUser(UserMixin):
+_MISSING = object()
+
+class Field:
     """
-    MongoDB User model for customer and admin accounts.
+    Lazily read document field.
+    Reads go straight to the wrapped document; assignments write through and
+    mark the field dirty so saves only $set what actually changed.
     """
+    __slots__ = ('name', 'default', 'or_default')
+    
+    def __init__(self, default=None, or_default=False):
+        self.name = None
+        self.default = default        # Value, or a callable producing one
+        self.or_default = or_default  # Also replace stored falsy values (like data.get(x) or default)
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance._data.get(self.name, _MISSING)
+        if value is _MISSING or (self.or_default and not value):
+            return self.default_value()
+        return value
+    
+    def default_value(self):
+        """Value used when the document doesn't have the field."""
+        return self.default() if callable(self.default) else self.default
+    
+    def __set__(self, instance, value):
+        instance._data[self.name] = value
+        if instance._dirty is None:
+            instance._dirty = {self.name}
+        else:
+            instance._dirty.add(self.name)
+
+class IdField(Field):
+    """The document _id (assigned on insert, never part of an update)."""
+    __slots__ = ()
+    
+    def __set__(self, instance, value):
+        instance._data['_id'] = value
+
+class MongoDocument:
+    """
+    Base for the MongoDB models.
+    Wraps the raw BSON dict without copying it; fields are declared with
+    Field and read on access, and instances have no per-instance __dict__.
+    Subclasses list their cache attributes in __slots__.
+    """
+    __slots__ = ('_data', '_dirty')
+    _fields = ()
+    
+    _id = IdField()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(dict.fromkeys(
+            name for klass in reversed(cls.__mro__) for name, value in vars(klass).items()
+            if isinstance(value, Field) and not isinstance(value, IdField)))
     
     def __init__(self, data=None):
-        if data:
-            self._id = data.get('_id')
-            self.username = data.get('username')
-            self.email = data.get('email')
-            self.password_hash = data.get('password_hash')
-            self.full_name = data.get('full_name')
-            self.phone = data.get('phone')
-            self.address = data.get('address')
-            self.is_admin = data.get('is_admin', False)
-            self.is_sub_admin = data.get('is_sub_admin', False)
-            self.is_staff = data.get('is_staff', False)
-            self._is_active = data.get('is_active', True)
-            self.profile_image = data.get('profile_image')
-            self.date_joined = data.get('date_joined') or datetime.utcnow()
-            self.last_login = data.get('last_login')
-            self.reset_token = data.get('reset_token')
-            self.reset_token_expiry = data.get('reset_token_expiry')
-        else:
-            self._id = None
-            self.username = None
-            self.email = None
-            self.password_hash = None
-            self.full_name = None
-            self.phone = None
-            self.address = None
-            self.is_admin = False
-            self.is_sub_admin = False
-            self.is_staff = False
-            self._is_active = True
-            self.profile_image = None
-            self.date_joined = datetime.utcnow()
-            self.last_login = None
-            self.reset_token = None
-            self.reset_token_expiry = None
+        if not data:
+            # New document: materialize defaults once so they stay stable until insert
+            data = {name: getattr(type(self), name).default_value() for name in self._fields}
+        self._data = data
+        self._dirty = None  # Set of assigned field names, created on the first write
     
-    def get_id(self):
-        """Return the user ID as string for Flask-Login."""
-        return str(self._id) if self._id else None
+    def get_changes(self):
+        """Fields assigned since the document was loaded or last saved."""
+        return {name: self._data.get(name) for name in self._dirty or ()}
+    
+    def mark_dirty(self, *names):
+        """Flag fields whose values were mutated in place (e.g. items.append)."""
+        self._dirty = (self._dirty or set()) | set(names)
+    
+    def mark_clean(self):
+        """Forget pending changes (after a save)."""
+        self._dirty = None
+    
+    def to_dict(self):
+        """Convert to a dictionary with every declared field for MongoDB storage."""
+        data = {name: getattr(self, name) for name in self._fields}
+        if self._id is not None:
+            data['_id'] = self._id
+        return data
+
+class MongoUser(MongoDocument):
+    """
+    MongoDB User model for customer and admin accounts.
+    """
+    
+    __slots__ = ('_orders',)
+    
+    username = Field()
+    email = Field()
+    password_hash = Field()
+    full_name = Field()
+    phone = Field()
+    address = Field()
+    is_admin = Field(False)
+    is_sub_admin = Field(False)
+    is_staff = Field(False)
+    is_active = Field(True)
+    profile_image = Field()
+    profile_image_variants = Field(dict)
+    date_joined = Field(datetime.utcnow, or_default=True)
+    last_login = Field()
+    reset_token = Field()
+    reset_token_expiry = Field()
+    
+    # Flask-Login user interface (UserMixin has no __slots__)
+    @property
+    def is_authenticated(self):
+        """Return True, as UserMixin does: a loaded user is a logged-in user."""
+        return True
     
     @property
-    def is_active(self):
-        """Return whether the user is active."""
-        return self._is_active
+    def is_anonymous(self):
+        """Return False, this is never the anonymous user."""
+        return False
     
-    @is_active.setter
-    def is_active(self, value):
-        """Set the user's active status."""
-        self._is_active = value
+    def __eq__(self, other):
+        if isinstance(other, MongoUser):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+    
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+    
+    __hash__ = object.__hash__
+    
+    def get_id(self):
+        """Return the user ID as string for Flask-Login."""
+        return str(self._id) if self._id else None
     
     @property
     def created_at(self):
@@ -73,9 +156,9 @@ class MongoUser(UserMixin):
     def orders(self):
         """Return user's orders for template compatibility."""
         if not hasattr(self, '_orders'):
-            from app.utils.mongo_db import mongo_db
+            from app.utils.mongo_db import mongo_db, projection
             if self._id:
-                orders_data = list(mongo_db.db.orders.find({'user_id': self._id}))
+                orders_data = list(mongo_db.db.orders.find({'user_id': self._id}, projection('order_summary')))
                 self._orders = [MongoOrder(order_data) for order_data in orders_data]
             else:
                 self._orders = []
@@ -141,78 +224,34 @@ class MongoUser(UserMixin):
     def can_demote_from_sub_admin(self, target_user):
         """Check if user can demote a sub-admin (admin cannot demote sub-admins per requirements)."""
         return False  # Per requirements: admin cannot demote sub-admins
-    
-    def to_dict(self):
-        """Convert user object to dictionary for MongoDB storage."""
-        data = {
-            'username': self.username,
-            'email': self.email,
-            'password_hash': self.password_hash,
-            'full_name': self.full_name,
-            'phone': self.phone,
-            'address': self.address,
-            'is_admin': self.is_admin,
-            'is_sub_admin': self.is_sub_admin,
-            'is_staff': self.is_staff,
-            'is_active': self.is_active,
-            'profile_image': self.profile_image,
-            'date_joined': self.date_joined,
-            'last_login': self.last_login,
-            'reset_token': self.reset_token,
-            'reset_token_expiry': self.reset_token_expiry
-        }
-        if self._id is not None:
-            data['_id'] = self._id
-        return data
 
-class MongoProduct:
+class MongoProduct(MongoDocument):
     """
     MongoDB Product model for meat items.
     """
     
-    def __init__(self, data=None):
-        if data:
-            self._id = data.get('_id')
-            self.name = data.get('name')
-            self.name_nepali = data.get('name_nepali')
-            self.description = data.get('description')
-            self.price = data.get('price')
-            self.image_url = data.get('image_url')
-            self.category = data.get('category')
-            self.category_id = data.get('category_id')
-            self.meat_type = data.get('meat_type')
-            self.preparation_type = data.get('preparation_type', 'fresh')
-            self.stock_quantity = data.get('stock_quantity', 0)
-            self.unit = data.get('unit', 'kg')
-            self.is_featured = data.get('is_featured', False)
-            self.is_available = data.get('is_available', True)
-            self.date_added = data.get('date_added') or datetime.utcnow()
-            self.last_updated = data.get('last_updated', datetime.utcnow())
-            # Additional attributes for compatibility
-            self.min_order_kg = data.get('min_order_kg', 0.5)
-            self.freshness_hours = data.get('freshness_hours', 24)
-            self.cooking_tips = data.get('cooking_tips')
-        else:
-            self._id = None
-            self.name = None
-            self.name_nepali = None
-            self.description = None
-            self.price = None
-            self.image_url = None
-            self.category = None
-            self.category_id = None
-            self.meat_type = None
-            self.preparation_type = 'fresh'
-            self.stock_quantity = 0
-            self.unit = 'kg'
-            self.is_featured = False
-            self.is_available = True
-            self.date_added = datetime.utcnow()
-            self.last_updated = datetime.utcnow()
-            # Additional attributes for compatibility
-            self.min_order_kg = 0.5
-            self.freshness_hours = 24
-            self.cooking_tips = None
+    __slots__ = ()
+    
+    name = Field()
+    name_nepali = Field()
+    description = Field()
+    price = Field()
+    image_url = Field()
+    image_variants = Field(dict)  # Resized copies of image_url by size and format
+    image_pending = Field(False)  # Variants still queued (app.services.image_queue)
+    category = Field()
+    category_id = Field()
+    meat_type = Field()
+    preparation_type = Field('fresh')
+    stock_quantity = Field(0)
+    unit = Field('kg')
+    is_featured = Field(False)
+    is_available = Field(True)
+    date_added = Field(datetime.utcnow, or_default=True)
+    last_updated = Field(datetime.utcnow)
+    min_order_kg = Field(0.5)
+    freshness_hours = Field(24)
+    cooking_tips = Field()
     
     @property
     def id(self):
@@ -252,36 +291,29 @@ class MongoProduct:
         # For now, return 0 as reviews are not implemented in MongoDB version
         return 0
     
-    def to_dict(self):
-        """Convert product object to dictionary for MongoDB storage."""
-        data = {
+    def to_api_dict(self):
+        """Product as served by the JSON APIs (detail and delta sync)."""
+        return {
+            'id': str(self._id),
             'name': self.name,
             'name_nepali': self.name_nepali,
             'description': self.description,
             'price': self.price,
             'image_url': self.image_url,
             'category': self.category,
-            'category_id': self.category_id,
             'meat_type': self.meat_type,
             'preparation_type': self.preparation_type,
             'stock_quantity': self.stock_quantity,
             'unit': self.unit,
             'is_featured': self.is_featured,
-            'is_available': self.is_available,
-            'date_added': self.date_added,
-            'last_updated': self.last_updated,
-            'min_order_kg': self.min_order_kg,
-            'freshness_hours': self.freshness_hours,
-            'cooking_tips': self.cooking_tips
+            'is_available': self.is_available
         }
-        if self._id is not None:
-            data['_id'] = self._id
-        return data
 
 class MongoOrderItem:
     """
     MongoDB Order Item wrapper to provide product object compatibility.
     """
+    __slots__ = ('product_id', 'product_name', 'quantity', 'unit_price', 'total_price', '_product')
     
     def __init__(self, item_data):
         self.product_id = item_data.get('product_id')
@@ -325,56 +357,36 @@ class MongoOrderItem:
                 })()
         return self._product
 
-class MongoOrder:
+class MongoOrder(MongoDocument):
     """
     MongoDB Order model for customer purchases.
     """
     
+    __slots__ = ('_user', '_order_items')
+    
+    order_number = Field()
+    user_id = Field()
+    items = Field(list)
+    total_amount = Field(0, or_default=True)
+    status = Field('pending')
+    delivery_address = Field()
+    delivery_latitude = Field()
+    delivery_longitude = Field()
+    delivery_formatted_address = Field()
+    phone_number = Field()
+    payment_method = Field()
+    payment_status = Field('pending')
+    order_date = Field(datetime.utcnow, or_default=True)
+    delivery_date = Field()
+    estimated_delivery = Field()
+    transaction_id = Field()
+    notes = Field()
+    special_instructions = Field()
+    
     def __init__(self, data=None):
-        if data:
-            self._id = data.get('_id')
-            self.order_number = data.get('order_number')
-            self.user_id = data.get('user_id')
-            self.items = data.get('items', [])
-            self.total_amount = data.get('total_amount', 0) or 0  # Handle None values
-            self.status = data.get('status', 'pending')
-            self.delivery_address = data.get('delivery_address')
-            self.delivery_latitude = data.get('delivery_latitude')
-            self.delivery_longitude = data.get('delivery_longitude')
-            self.delivery_formatted_address = data.get('delivery_formatted_address')
-            self.phone_number = data.get('phone_number')
-            self.payment_method = data.get('payment_method')
-            self.payment_status = data.get('payment_status', 'pending')
-            self.order_date = data.get('order_date') or datetime.utcnow()
-            self.delivery_date = data.get('delivery_date')
-            self.estimated_delivery = data.get('estimated_delivery')
-            self.transaction_id = data.get('transaction_id')
-            self.notes = data.get('notes')
-            self.special_instructions = data.get('special_instructions')
-            self._user = None  # Cache for user data
-            self._order_items = None  # Cache for order items with product objects
-        else:
-            self._id = None
-            self.order_number = None
-            self.user_id = None
-            self.items = []
-            self.total_amount = None
-            self.status = 'pending'
-            self.delivery_address = None
-            self.delivery_latitude = None
-            self.delivery_longitude = None
-            self.delivery_formatted_address = None
-            self.phone_number = None
-            self.payment_method = None
-            self.payment_status = 'pending'
-            self.order_date = datetime.utcnow()
-            self.delivery_date = None
-            self.estimated_delivery = None
-            self.transaction_id = None
-            self.notes = None
-            self.special_instructions = None
-            self._user = None
-            self._order_items = None
+        super().__init__(data)
+        self._user = None  # Cache for user data
+        self._order_items = None  # Cache for order items with product objects
     
     @property
     def created_at(self):
@@ -427,12 +439,12 @@ class MongoOrder:
     
     @property
     def user(self):
-        """Get user data for this order."""
+        """Get the customer's contact details for this order."""
         if self._user is None and self.user_id:
-            from app.utils.mongo_db import mongo_db
+            from app.utils.mongo_db import mongo_db, projection
             from bson import ObjectId
             try:
-                user_data = mongo_db.db.users.find_one({'_id': ObjectId(self.user_id)})
+                user_data = mongo_db.db.users.find_one({'_id': ObjectId(self.user_id)}, projection('customer_contact'))
                 if user_data:
                     self._user = MongoUser(user_data)
             except Exception as e:
@@ -440,102 +452,87 @@ class MongoOrder:
                 self._user = None
         return self._user
     
-    def to_dict(self):
-        """Convert order object to dictionary for MongoDB storage."""
-        data = {
-            'order_number': self.order_number,
-            'user_id': self.user_id,
-            'items': self.items,
-            'total_amount': self.total_amount,
-            'status': self.status,
-            'delivery_address': self.delivery_address,
-            'delivery_latitude': self.delivery_latitude,
-            'delivery_longitude': self.delivery_longitude,
-            'delivery_formatted_address': self.delivery_formatted_address,
-            'phone_number': self.phone_number,
-            'payment_method': self.payment_method,
-            'payment_status': self.payment_status,
-            'order_date': self.order_date,
-            'delivery_date': self.delivery_date,
-            'estimated_delivery': self.estimated_delivery,
-            'transaction_id': self.transaction_id,
-            'notes': self.notes,
-            'special_instructions': self.special_instructions
-        }
-        if self._id is not None:
-            data['_id'] = self._id
-        return data
-    
     def to_json_dict(self):
         """Convert order object to JSON-serializable dictionary for templates."""
-        # Get user info
         user_info = self.user
-        customer_name = user_info.full_name if user_info else 'Unknown Customer'
-        customer_phone = user_info.phone if user_info else self.phone_number
+        customer = {'full_name': user_info.full_name, 'phone': user_info.phone} if user_info else None
+        return self.json_row(self._data, customer)
+    
+    @staticmethod
+    def json_row(document, customer=None):
+        """
+        to_json_dict for a plain order document (dict or RawBSONDocument),
+        with the customer's contact document, so list views can skip MongoOrder.
+        """
+        # Get user info
+        customer_name = customer.get('full_name') if customer else 'Unknown Customer'
+        customer_phone = customer.get('phone') if customer else document.get('phone_number')
         
         # Format delivery address
+        delivery_address = document.get('delivery_address')
         delivery_area = 'Unknown'
-        if isinstance(self.delivery_address, dict):
-            delivery_area = self.delivery_address.get('area', 'Unknown')
-        elif isinstance(self.delivery_address, str):
-            delivery_area = self.delivery_address if self.delivery_address.strip() else 'Unknown'
+        if isinstance(delivery_address, Mapping):
+            delivery_area = delivery_address.get('area', 'Unknown')
+        elif isinstance(delivery_address, str):
+            delivery_area = delivery_address if delivery_address.strip() else 'Unknown'
         
         # Keep dates as datetime objects for template strftime usage
         # Provide fallback datetime if dates are None
-        from datetime import datetime
-        order_date = self.order_date if self.order_date else datetime.utcnow()
-        delivery_date = self.delivery_date if self.delivery_date else None
+        order_date = document.get('order_date') or datetime.utcnow()
+        delivery_date = document.get('delivery_date') or None
         
+        payment_method = document.get('payment_method')
+        total_amount = document.get('total_amount')
+        order_id = document.get('_id')
         return {
-            'order_id': str(self._id) if self._id else '',
+            'order_id': str(order_id) if order_id else '',
             'customer_name': customer_name,
             'customer_phone': customer_phone,
             'order_date': order_date,
             'delivery_date': delivery_date,
-            'status': self.status,
-            'total_amount': float(self.total_amount) if self.total_amount else 0.0,
+            'status': document.get('status', 'pending'),
+            'total_amount': float(total_amount) if total_amount else 0.0,
             'delivery_area': delivery_area,
-            'payment_method': self.payment_method or 'Not specified',
-            'payment_status': self.payment_status,
-            'notes': self.notes or '',
-            'special_instructions': self.special_instructions or '',
-            'items_count': len(self.items),
-            'order_type': 'Online' if self.payment_method else 'Phone'
+            'payment_method': payment_method or 'Not specified',
+            'payment_status': document.get('payment_status', 'pending'),
+            'notes': document.get('notes') or '',
+            'special_instructions': document.get('special_instructions') or '',
+            'items_count': len(document.get('items') or ()),
+            'order_type': 'Online' if payment_method else 'Phone'
         }
 
-class MongoCategory:
+    @staticmethod
+    def find_by_order_number(order_number):
+        """Find a raw order document by order number (used by the payment routes)."""
+        from app.utils.mongo_db import mongo_db
+        return mongo_db.db.orders.find_one({'order_number': order_number})
+    
+    @staticmethod
+    def update_order(order_number, update_data):
+        """Set fields on an order by order number. Returns True if the order exists."""
+        from app.utils.mongo_db import mongo_db
+        result = mongo_db.db.orders.update_one({'order_number': order_number}, {'$set': update_data})
+        return result.matched_count > 0
+
+class MongoCategory(MongoDocument):
     """
     MongoDB Category model for product categories.
     """
     
-    def __init__(self, data=None):
-        if data:
-            self._id = data.get('_id')
-            self.name = data.get('name')
-            self.name_nepali = data.get('name_nepali')
-            self.description = data.get('description')
-            self.image_url = data.get('image_url')
-            self.is_active = data.get('is_active', True)
-            self.sort_order = data.get('sort_order', 0)
-        else:
-            self._id = None
-            self.name = None
-            self.name_nepali = None
-            self.description = None
-            self.image_url = None
-            self.is_active = True
-            self.sort_order = 0
+    __slots__ = ()
     
-    def to_dict(self):
-        """Convert category object to dictionary for MongoDB storage."""
-        data = {
+    name = Field()
+    name_nepali = Field()
+    description = Field()
+    image_url = Field()
+    is_active = Field(True)
+    sort_order = Field(0)
+    
+    def to_api_dict(self):
+        """Category as served by the JSON APIs (/api/categories and delta sync)."""
+        return {
+            'id': str(self._id),
             'name': self.name,
             'name_nepali': self.name_nepali,
-            'description': self.description,
-            'image_url': self.image_url,
-            'is_active': self.is_active,
-            'sort_order': self.sort_order
+            'description': self.description
         }
-        if self._id is not None:
-            data['_id'] = self._id
-        return data
\ No newline at end of file
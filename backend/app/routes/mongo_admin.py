@@ -8,13 +8,18 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from functools import wraps
-from app.utils.mongo_db import mongo_db
+from app.utils.mongo_db import mongo_db, projection
+from app.utils.raw_bson import find_raw, lookup_customers
 from app.models.mongo_models import MongoUser, MongoProduct, MongoOrder
 from app.forms.product import ProductForm, CategoryForm
 from app.forms.qr_code import QRCodeForm, QRCodeUpdateForm, PaymentMethodForm
 from app.utils.file_utils import save_uploaded_file, delete_file, validate_image_file
+from app.services.image_queue import image_queue
+from app.utils.performance import perf_monitor
+from app.utils.slow_queries import slow_query_recorder
 from bson import ObjectId
 from datetime import datetime
+from collections.abc import Mapping
 import json
 
 # Create admin blueprint
@@ -56,11 +61,12 @@ def staff_required(f):
 def admin_dashboard():
     """Admin dashboard with overview statistics."""
     try:
-        # Get statistics
-        total_users = mongo_db.db.users.count_documents({})
-        total_products = mongo_db.db.products.count_documents({})
-        total_orders = mongo_db.db.orders.count_documents({})
-        pending_orders = mongo_db.db.orders.count_documents({'status': 'pending'})
+        # Get statistics (may come from a secondary, see MONGO_REPORTS_READ_PREFERENCE)
+        reports = mongo_db.reader('reports')
+        total_users = reports.users.count_documents({})
+        total_products = reports.products.count_documents({})
+        total_orders = reports.orders.count_documents({})
+        pending_orders = reports.orders.count_documents({'status': 'pending'})
         
         # Get recent orders
         recent_orders = list(mongo_db.db.orders.find().sort('order_date', -1).limit(5))
@@ -84,8 +90,7 @@ def admin_dashboard():
 def admin_users():
     """Admin user management page."""
     try:
-        users_data = list(mongo_db.db.users.find())
-        users = [MongoUser(user_data) for user_data in users_data]
+        users = mongo_db.get_all_users(view='user_admin_row')
         return render_template('admin/users.html', users=users)
     except Exception as e:
         flash(f'Error loading users: {str(e)}', 'error')
@@ -182,6 +187,7 @@ def admin_edit_user(user_id):
                             filename = save_uploaded_file(file, 'profiles')
                             if filename:
                                 update_data['profile_image'] = filename
+                                update_data.update(image_queue.pending_fields('user'))
                             else:
                                 flash('Failed to save profile picture.', 'error')
                                 return render_template('admin/user_edit.html', user=user)
@@ -196,6 +202,8 @@ def admin_edit_user(user_id):
                     {'$set': update_data}
                 )
                 print(f"DEBUG: Database update result - matched: {result.matched_count}, modified: {result.modified_count}")
+                if update_data.get('profile_image'):
+                    image_queue.enqueue('user', user_object_id, update_data['profile_image'])
                 
                 flash(f'User {full_name} has been updated successfully!', 'success')
                 return redirect(url_for('admin.admin_users'))
@@ -338,8 +346,7 @@ def admin_toggle_user_status(user_id):
 def admin_products():
     """Admin product management page."""
     try:
-        products_data = list(mongo_db.db.products.find())
-        products = [MongoProduct(product_data) for product_data in products_data]
+        products = mongo_db.get_all_products(available_only=False, view='product_admin_row')
         return render_template('admin/products.html', products=products)
     except Exception as e:
         flash(f'Error loading products: {str(e)}', 'error')
@@ -402,9 +409,13 @@ def admin_add_product():
             # Add image URL if uploaded
             if image_url:
                 product_data['image_url'] = image_url
+                product_data.update(image_queue.pending_fields('product'))
             
             # Insert product into database
             result = mongo_db.db.products.insert_one(product_data)
+            mongo_db.bump_catalog_version()
+            if image_url:
+                image_queue.enqueue('product', result.inserted_id, image_url)
             
             flash(f'Product "{form.name.data}" has been added successfully!', 'success')
             return redirect(url_for('admin.admin_products'))
@@ -502,12 +513,16 @@ def admin_edit_product(product_id):
                 # Update image URL if new image was uploaded
                 if new_image_url:
                     update_data['image_url'] = new_image_url
+                    update_data.update(image_queue.pending_fields('product'))
                 
                 # Update product in database
                 result = mongo_db.db.products.update_one(
                     {'_id': product_object_id},
                     {'$set': update_data}
                 )
+                mongo_db.bump_catalog_version()
+                if new_image_url:
+                    image_queue.enqueue('product', product_object_id, new_image_url)
                 
                 flash(f'Product "{form.name.data}" has been updated successfully!', 'success')
                 return redirect(url_for('admin.admin_products'))
@@ -552,6 +567,7 @@ def admin_toggle_featured(product_id):
             {'_id': product_object_id},
             {'$set': {'is_featured': new_featured_status, 'last_updated': datetime.utcnow()}}
         )
+        mongo_db.bump_catalog_version()
         
         status_action = 'featured' if new_featured_status else 'unfeatured'
         flash(f'Product {product.name} has been {status_action}.', 'success')
@@ -568,14 +584,12 @@ def admin_orders():
     """Admin order management page."""
     try:
         status_filter = request.args.get('status')
-        query = {}
-        if status_filter:
-            query['status'] = status_filter
-        
-        orders_data = list(mongo_db.db.orders.find(query).sort('order_date', -1))
-        orders = [MongoOrder(order_data) for order_data in orders_data]
+        orders = mongo_db.get_all_orders(status_filter, view='order_list_row')
+        # One query for every row's customer instead of MongoOrder.user per row
+        customers = lookup_customers(order.user_id for order in orders)
         
-        return render_template('admin/orders.html', orders=orders, status_filter=status_filter)
+        return render_template('admin/orders.html', orders=orders, customers=customers,
+                               status_filter=status_filter)
     except Exception as e:
         flash(f'Error loading orders: {str(e)}', 'error')
         return redirect(url_for('admin.admin_dashboard'))
@@ -910,8 +924,7 @@ def export_users():
         from io import StringIO
         
         # Get all users
-        users_data = list(mongo_db.db.users.find())
-        users = [MongoUser(user_data) for user_data in users_data]
+        users = mongo_db.get_all_users(view='user_admin_row', workload='exports')
         
         # Create CSV content
         output = StringIO()
@@ -961,8 +974,7 @@ def export_users_pdf():
         from io import BytesIO
         
         # Get all users
-        users_data = list(mongo_db.db.users.find())
-        users = [MongoUser(user_data) for user_data in users_data]
+        users = mongo_db.get_all_users(view='user_admin_row', workload='exports')
         
         # Create PDF content
         buffer = BytesIO()
@@ -1097,7 +1109,7 @@ def export_orders():
             query['status'] = status_filter
         
         # Get all orders
-        orders_data = list(mongo_db.db.orders.find(query).sort('order_date', -1))
+        orders_data = list(mongo_db.reader('exports').orders.find(query, projection('order_export_row')).sort('order_date', -1))
         orders = [MongoOrder(order_data) for order_data in orders_data]
         
         # Create PDF content
@@ -1136,9 +1148,10 @@ def export_orders():
         # Prepare table data
         data = [['Order ID', 'Customer', 'Email', 'Date', 'Status', 'Amount', 'Items', 'Address']]
         
+        customers = lookup_customers((order.user_id for order in orders), workload='exports')
         for order in orders:
             # Get customer details
-            user_data = mongo_db.db.users.find_one({'_id': ObjectId(order.user_id)})
+            user_data = customers.get(str(order.user_id))
             customer_name = user_data.get('full_name', 'N/A') if user_data else 'N/A'
             customer_email = user_data.get('email', 'N/A') if user_data else 'N/A'
             
@@ -1207,6 +1220,55 @@ def export_orders():
         flash(f'Error exporting orders: {str(e)}', 'error')
         return redirect(url_for('admin.admin_orders'))
 
+def _orders_csv(query):
+    """
+    Orders export CSV for a query.
+    Reads raw BSON rows straight into the writer and looks every customer
+    up in one batched query instead of one find_one per order.
+    """
+    import csv
+    from io import StringIO
+    
+    orders = list(find_raw('orders', query, view='order_export_row', sort=[('order_date', -1)], workload='exports'))
+    customers = lookup_customers((order.get('user_id') for order in orders), workload='exports')
+    
+    output = StringIO()
+    writer = csv.writer(output)
+    
+    # Write header
+    writer.writerow([
+        'Order ID', 'Customer Name', 'Customer Email', 'Order Date', 
+        'Status', 'Total Amount', 'Items Count', 'Delivery Address'
+    ])
+    
+    # Write order data
+    for order in orders:
+        # Get customer details
+        user_data = customers.get(str(order.get('user_id')))
+        customer_name = user_data.get('full_name', 'N/A') if user_data else 'N/A'
+        customer_email = user_data.get('email', 'N/A') if user_data else 'N/A'
+        
+        order_date = order.get('order_date')
+        order_date = order_date.strftime('%Y-%m-%d %H:%M:%S') if order_date else 'N/A'
+        
+        # Handle delivery_address - it can be a dict or string
+        address = order.get('delivery_address')
+        if address:
+            if isinstance(address, Mapping):
+                delivery_address = f"{address.get('street', '')}, {address.get('city', '')}"
+            else:
+                delivery_address = str(address)
+        else:
+            delivery_address = 'N/A'
+        
+        writer.writerow([
+            str(order['_id']), customer_name, customer_email, order_date,
+            order.get('status', 'pending').title(), f"Rs. {float(order.get('total_amount') or 0):.2f}", 
+            len(order.get('items') or ()), delivery_address
+        ])
+    
+    return output.getvalue()
+
 @mongo_admin_bp.route('/export/orders/csv')
 @login_required
 @staff_required
@@ -1214,8 +1276,6 @@ def export_orders_csv():
     """Export orders data as CSV."""
     try:
         from flask import make_response
-        import csv
-        from io import StringIO
         
         # Get filter parameters
         status_filter = request.args.get('status')
@@ -1223,47 +1283,12 @@ def export_orders_csv():
         if status_filter:
             query['status'] = status_filter
         
-        # Get all orders
-        orders_data = list(mongo_db.db.orders.find(query).sort('order_date', -1))
-        orders = [MongoOrder(order_data) for order_data in orders_data]
-        
         # Create CSV content
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Order ID', 'Customer Name', 'Customer Email', 'Order Date', 
-            'Status', 'Total Amount', 'Items Count', 'Delivery Address'
-        ])
-        
-        # Write order data
-        for order in orders:
-            # Get customer details
-            user_data = mongo_db.db.users.find_one({'_id': ObjectId(order.user_id)})
-            customer_name = user_data.get('full_name', 'N/A') if user_data else 'N/A'
-            customer_email = user_data.get('email', 'N/A') if user_data else 'N/A'
-            
-            order_date = order.order_date.strftime('%Y-%m-%d %H:%M:%S') if order.order_date else 'N/A'
-            
-            # Handle delivery_address - it can be a dict or string
-            if order.delivery_address:
-                if isinstance(order.delivery_address, dict):
-                    delivery_address = f"{order.delivery_address.get('street', '')}, {order.delivery_address.get('city', '')}"
-                else:
-                    delivery_address = str(order.delivery_address)
-            else:
-                delivery_address = 'N/A'
-            
-            writer.writerow([
-                str(order._id), customer_name, customer_email, order_date,
-                order.status.title(), f"Rs. {order.total_amount:.2f}", 
-                len(order.items), delivery_address
-            ])
+        output = _orders_csv(query)
         
         # Create response
         filename_suffix = f"_{status_filter}" if status_filter else ""
-        response = make_response(output.getvalue())
+        response = make_response(output)
         response.headers['Content-Type'] = 'text/csv'
         response.headers['Content-Disposition'] = f'attachment; filename=orders_export{filename_suffix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         
@@ -1297,7 +1322,7 @@ def download_orders_pdf():
         
         # If export_all is true, get all orders
         if export_all:
-            orders_data = list(mongo_db.db.orders.find().sort('order_date', -1))
+            orders_data = list(mongo_db.reader('exports').orders.find({}, projection('order_export_row')).sort('order_date', -1))
             orders = [MongoOrder(order_data) for order_data in orders_data]
         else:
             # Convert string IDs to ObjectIds
@@ -1313,7 +1338,8 @@ def download_orders_pdf():
                 return redirect(url_for('admin.business_insights'))
             
             # Get selected orders
-            orders_data = list(mongo_db.db.orders.find({'_id': {'$in': object_ids}}).sort('order_date', -1))
+            orders_data = list(mongo_db.reader('exports').orders.find({'_id': {'$in': object_ids}},
+                                                                      projection('order_export_row')).sort('order_date', -1))
             orders = [MongoOrder(order_data) for order_data in orders_data]
         
         # Create PDF content
@@ -1352,9 +1378,10 @@ def download_orders_pdf():
         # Prepare table data
         data = [['Order ID', 'Customer', 'Email', 'Date', 'Status', 'Amount', 'Items', 'Address']]
         
+        customers = lookup_customers((order.user_id for order in orders), workload='exports')
         for order in orders:
             # Get customer details
-            user_data = mongo_db.db.users.find_one({'_id': ObjectId(order.user_id)})
+            user_data = customers.get(str(order.user_id))
             customer_name = user_data.get('full_name', 'N/A') if user_data else 'N/A'
             customer_email = user_data.get('email', 'N/A') if user_data else 'N/A'
             
@@ -1430,8 +1457,6 @@ def download_orders_csv():
     """Download selected orders as CSV."""
     try:
         from flask import make_response
-        import csv
-        from io import StringIO
         
         # Get order IDs from form data
         order_ids = request.form.getlist('order_ids')
@@ -1443,8 +1468,7 @@ def download_orders_csv():
         
         # If export_all is true, get all orders
         if export_all:
-            orders_data = list(mongo_db.db.orders.find().sort('order_date', -1))
-            orders = [MongoOrder(order_data) for order_data in orders_data]
+            query = {}
         else:
             # Convert string IDs to ObjectIds
             object_ids = []
@@ -1459,45 +1483,13 @@ def download_orders_csv():
                 return redirect(url_for('admin.business_insights'))
             
             # Get selected orders
-            orders_data = list(mongo_db.db.orders.find({'_id': {'$in': object_ids}}).sort('order_date', -1))
-            orders = [MongoOrder(order_data) for order_data in orders_data]
+            query = {'_id': {'$in': object_ids}}
         
         # Create CSV content
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Order ID', 'Customer Name', 'Customer Email', 'Order Date', 
-            'Status', 'Total Amount', 'Items Count', 'Delivery Address'
-        ])
-        
-        # Write order data
-        for order in orders:
-            # Get customer details
-            user_data = mongo_db.db.users.find_one({'_id': ObjectId(order.user_id)})
-            customer_name = user_data.get('full_name', 'N/A') if user_data else 'N/A'
-            customer_email = user_data.get('email', 'N/A') if user_data else 'N/A'
-            
-            order_date = order.order_date.strftime('%Y-%m-%d %H:%M:%S') if order.order_date else 'N/A'
-            
-            # Handle delivery_address - it can be a dict or string
-            if order.delivery_address:
-                if isinstance(order.delivery_address, dict):
-                    delivery_address = f"{order.delivery_address.get('street', '')}, {order.delivery_address.get('city', '')}"
-                else:
-                    delivery_address = str(order.delivery_address)
-            else:
-                delivery_address = 'N/A'
-            
-            writer.writerow([
-                str(order._id), customer_name, customer_email, order_date,
-                order.status.title(), f"Rs. {order.total_amount:.2f}", 
-                len(order.items), delivery_address
-            ])
+        output = _orders_csv(query)
         
         # Create response
-        response = make_response(output.getvalue())
+        response = make_response(output)
         response.headers['Content-Type'] = 'text/csv'
         filename_prefix = "all_orders" if export_all else "selected_orders"
         response.headers['Content-Disposition'] = f'attachment; filename={filename_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
@@ -1561,11 +1553,13 @@ def admin_add_category():
                 'description': form.description.data,
                 'is_active': True,
                 'sort_order': 0,
-                'date_added': datetime.utcnow()
+                'date_added': datetime.utcnow(),
+                'last_updated': datetime.utcnow()
             }
             
             # Insert category into database
             result = mongo_db.db.categories.insert_one(category_data)
+            mongo_db.bump_catalog_version()
             
             flash(f'Category "{form.name.data}" has been added successfully!', 'success')
             return redirect(url_for('admin.admin_categories'))
@@ -1589,6 +1583,58 @@ def admin_payment_gateways():
         return redirect(url_for('admin.admin_dashboard'))
 
 
+@mongo_admin_bp.route('/perf')
+@login_required
+@admin_only
+def admin_perf():
+    """Per-endpoint request performance (query count, DB/template/total time)."""
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'endpoints': perf_monitor.get_summary(),
+            'violations': perf_monitor.get_violations(),
+            'query_budget': perf_monitor.query_budget
+        })
+    
+    sort_by = request.args.get('sort', 'p95_ms')
+    return render_template('admin/perf.html',
+                         title='Performance',
+                         endpoints=perf_monitor.get_summary(sort_by),
+                         violations=perf_monitor.get_violations(),
+                         monitor=perf_monitor,
+                         sort_by=sort_by,
+                         uptime_minutes=int((datetime.now().timestamp() - perf_monitor.started_at) / 60))
+
+
+@mongo_admin_bp.route('/perf/reset', methods=['POST'])
+@login_required
+@admin_only
+def admin_perf_reset():
+    """Clear collected performance aggregates."""
+    perf_monitor.reset()
+    flash('Performance statistics reset.', 'success')
+    return redirect(url_for('admin.admin_perf'))
+
+
+@mongo_admin_bp.route('/slow-queries')
+@login_required
+@admin_only
+def admin_slow_queries():
+    """Slow MongoDB queries grouped by shape, with explain plan summaries."""
+    try:
+        shapes = slow_query_recorder.get_shape_summary()
+    except Exception as e:
+        flash(f'Error loading slow queries: {str(e)}', 'error')
+        shapes = []
+    
+    if request.args.get('format') == 'json':
+        return jsonify({'threshold_ms': slow_query_recorder.threshold_ms, 'shapes': shapes})
+    
+    return render_template('admin/slow_queries.html',
+                         title='Slow Queries',
+                         shapes=shapes,
+                         recorder=slow_query_recorder)
+
+
 @mongo_admin_bp.route('/business-insights')
 @mongo_admin_bp.route('/business_insights')
 @login_required
@@ -2012,23 +2058,27 @@ def admin_upload_qr_code(payment_method):
                             {'payment_method': payment_method},
                             {'$set': {
                                 'qr_image': filename,
+                                **image_queue.pending_fields('qr_code'),
                                 'description': form.description.data,
                                 'last_updated': datetime.utcnow(),
                                 'updated_by': str(current_user._id)
                             }}
                         )
+                        image_queue.enqueue('qr_code', existing_qr['_id'], filename)
                         flash(f'QR code for {payment_method.title()} has been updated successfully!', 'success')
                     else:
                         # Create new QR code entry
                         qr_code_data = {
                             'payment_method': payment_method,
                             'qr_image': filename,
+                            **image_queue.pending_fields('qr_code'),
                             'description': form.description.data,
                             'is_active': True,
                             'date_added': datetime.utcnow(),
                             'added_by': str(current_user._id)
                         }
-                        mongo_db.db.qr_codes.insert_one(qr_code_data)
+                        result = mongo_db.db.qr_codes.insert_one(qr_code_data)
+                        image_queue.enqueue('qr_code', result.inserted_id, filename)
                         flash(f'QR code for {payment_method.title()} has been uploaded successfully!', 'success')
                 else:
                     print(f"MongoDB not available, skipping QR code upload for {payment_method}")
@@ -2122,6 +2172,7 @@ def admin_edit_qr_code(payment_method):
                     filename = save_uploaded_file(form.qr_image.data, 'qr_codes')
                     if filename:
                         update_data['qr_image'] = filename
+                        update_data.update(image_queue.pending_fields('qr_code'))
                     else:
                         flash('Failed to save new QR code image.', 'error')
                         payment_method_display = payment_method.replace('_', ' ').title()
@@ -2136,6 +2187,8 @@ def admin_edit_qr_code(payment_method):
                         {'payment_method': payment_method},
                         {'$set': update_data}
                     )
+                    if update_data.get('qr_image') and qr_code_data.get('_id'):
+                        image_queue.enqueue('qr_code', qr_code_data['_id'], update_data['qr_image'])
                 else:
                     print(f"MongoDB not available, skipping QR code update for {payment_method}")
                 
@@ -2270,6 +2323,7 @@ def admin_edit_category(category_id):
                     {'_id': category_object_id},
                     {'$set': update_data}
                 )
+                mongo_db.bump_catalog_version()
                 
                 flash(f'Category "{form.name.data}" has been updated successfully!', 'success')
                 return redirect(url_for('admin.admin_categories'))
@@ -2313,6 +2367,9 @@ def admin_delete_category(category_id):
         
         # Delete category
         result = mongo_db.db.categories.delete_one({'_id': category_object_id})
+        if result.deleted_count > 0:
+            mongo_db.record_catalog_deletion('categories', category_object_id)
+        mongo_db.bump_catalog_version()
         
         if result.deleted_count > 0:
             flash('Category has been deleted successfully!', 'success')
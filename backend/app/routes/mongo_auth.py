@@ -11,6 +11,7 @@ from app.models.mongo_models import MongoUser
 from app.forms import LoginForm, RegisterForm, ProfileForm, ChangePasswordForm, ForgotPasswordForm, ResetPasswordForm
 from app.utils import validate_phone_number, validate_email
 from app.utils.file_utils import save_uploaded_file, delete_file, validate_image_file
+from app.services.image_queue import image_queue
 import secrets
 import hashlib
 from datetime import datetime, timedelta
@@ -137,6 +138,7 @@ def profile():
             return render_template('auth/profile.html', form=form)
 
         # Handle profile picture upload
+        profile_image_path = None
         if form.profile_picture.data:
             if validate_image_file(form.profile_picture.data):
                 # Delete old profile picture if exists
@@ -147,6 +149,7 @@ def profile():
                 profile_image_path = save_uploaded_file(form.profile_picture.data, 'profiles')
                 if profile_image_path:
                     current_user.profile_image = profile_image_path
+                    current_user.profile_image_variants = {}
                     flash('प्रोफाइल फोटो अपडेट भयो / Profile photo updated!', 'success')
                 else:
                     flash('प्रोफाइल फोटो अपलोड गर्दा समस्या भयो / Profile photo upload failed!', 'error')
@@ -163,6 +166,8 @@ def profile():
 
         try:
             mongo_db.save_user(current_user)
+            if profile_image_path:
+                image_queue.enqueue('user', current_user._id, profile_image_path)
             flash('प्रोफाइल अपडेट भयो / Profile updated successfully!', 'success')
         except Exception as e:
             flash('प्रोफाइल अपडेट गर्दा समस्या भयो / Profile update failed.', 'error')
@@ -4,26 +4,32 @@
 Homepage, search, and general page routes for MongoDB.
 """
 
-from flask import Blueprint, render_template, request, jsonify, send_from_directory, current_app
+from flask import Blueprint, render_template, request, jsonify
 import os
-from app.utils.mongo_db import mongo_db
+from app.utils.mongo_db import mongo_db, projection
+from app.utils.raw_bson import raw_collection, json_response
+from app.utils.page_cache import page_cache
+from app.utils.http_cache import catalog_etag, catalog_max_age, not_modified, conditional_json
+from app.utils.upload_serving import serve_upload
+from app.models.mongo_models import MongoProduct
 
 # Create main blueprint
 mongo_main_bp = Blueprint('main', __name__)
 
 @mongo_main_bp.route('/')
+@page_cache.cached('homepage')
 def index():
     """
     Homepage with featured products and categories.
     """
     # Get featured products
-    featured_products = mongo_db.get_featured_products()[:6]  # Limit to 6 products
+    featured_products = mongo_db.get_featured_products(view='product_card', limit=6)
     
     # Get all categories
     categories = mongo_db.get_all_categories()
     
     # Get recent products
-    recent_products = mongo_db.get_all_products()[:8]  # Limit to 8 products
+    recent_products = mongo_db.get_all_products(view='product_card', limit=8)
     
     return render_template('index.html', 
                          featured_products=featured_products,
@@ -63,8 +69,8 @@ def search():
         search_criteria['meat_type'] = meat_type
     
     # Perform search using MongoDB aggregation
-    products_data = mongo_db.db.products.find(search_criteria).sort('name', 1)
-    products = [mongo_db.MongoProduct(product_data) for product_data in products_data]
+    products_data = mongo_db.db.products.find(search_criteria, projection('product_card')).sort('name', 1)
+    products = [MongoProduct(product_data) for product_data in products_data]
     
     return render_template('products/list.html', 
                          products=products,
@@ -83,13 +89,13 @@ def search_suggestions():
         return jsonify([])
     
     # Search for product names that match the query
-    suggestions_data = mongo_db.db.products.find({
+    suggestions_data = raw_collection('products').find({
         'is_available': True,
         '$or': [
             {'name': {'$regex': query, '$options': 'i'}},
             {'name_nepali': {'$regex': query, '$options': 'i'}}
         ]
-    }).limit(10)
+    }, projection('product_suggestion')).limit(10)
     
     suggestions = []
     for product_data in suggestions_data:
@@ -100,7 +106,7 @@ def search_suggestions():
             'id': str(product_data['_id'])
         })
     
-    return jsonify(suggestions)
+    return json_response(suggestions)
 
 @mongo_main_bp.route('/about')
 def about():
@@ -123,40 +129,37 @@ def api_categories():
     """
     API endpoint to get all categories.
     """
+    etag = catalog_etag('categories')
+    cached = not_modified(etag, catalog_max_age())
+    if cached:
+        return cached
+    
     categories = mongo_db.get_all_categories()
-    categories_data = []
-    
-    for category in categories:
-        categories_data.append({
-            'id': str(category._id),
-            'name': category.name,
-            'name_nepali': category.name_nepali,
-            'description': category.description
-        })
+    categories_data = [category.to_api_dict() for category in categories]
     
-    return jsonify(categories_data)
+    return conditional_json(categories_data, etag=etag, cache_control=catalog_max_age())
 
 @mongo_main_bp.route('/api/meat-types')
 def api_meat_types():
     """
     API endpoint to get available meat types.
     """
+    etag = catalog_etag('meat-types')
+    cached = not_modified(etag, catalog_max_age())
+    if cached:
+        return cached
+    
     # Get distinct meat types from products
     meat_types = mongo_db.db.products.distinct('meat_type', {'is_available': True})
     
-    return jsonify(meat_types)
+    return conditional_json(meat_types, etag=etag, cache_control=catalog_max_age())
 
 @mongo_main_bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
     """
     Serve uploaded files (images, etc.).
     Supports subdirectories like profiles/, products/, etc.
+    With UPLOAD_SERVE_MODE set, nginx/Apache sends the bytes instead of this
+    worker (see app.utils.upload_serving).
     """
-    upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-    response = send_from_directory(upload_folder, filename)
-    
-    # Set correct MIME type for SVG files
-    if filename.lower().endswith('.svg'):
-        response.headers['Content-Type'] = 'image/svg+xml'
-    
-    return response
\ No newline at end of file
+    return serve_upload(filename)
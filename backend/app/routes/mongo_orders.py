@@ -23,9 +23,10 @@ def cart():
     cart_items = session.get('cart', {})
     cart_products = []
     total_amount = 0
+    products = mongo_db.find_products_by_ids(cart_items)
     
     for product_id, quantity in cart_items.items():
-        product = mongo_db.find_product_by_id(product_id)
+        product = products.get(product_id)
         if product and product.is_available:
             item_total = product.price * quantity
             cart_products.append({
@@ -179,8 +180,9 @@ def update_cart():
         
         # Calculate new totals
         total_amount = 0
+        products = mongo_db.find_products_by_ids(cart)
         for pid, qty in cart.items():
-            product = mongo_db.find_product_by_id(pid)
+            product = products.get(pid)
             if product:
                 total_amount += product.price * qty
         
@@ -279,9 +281,10 @@ def checkout():
     
     cart_products = []
     total_amount = 0
+    products = mongo_db.find_products_by_ids(cart_items)
     
     for product_id, quantity in cart_items.items():
-        product = mongo_db.find_product_by_id(product_id)
+        product = products.get(product_id)
         if product and product.is_available:
             item_total = product.price * quantity
             cart_products.append({
@@ -300,9 +303,10 @@ def checkout():
             # Prepare order items and validate stock
             order_items = []
             final_total = 0
+            products = mongo_db.find_products_by_ids(cart_items)
             
             for product_id, quantity in cart_items.items():
-                product = mongo_db.find_product_by_id(product_id)
+                product = products.get(product_id)
                 if not product or not product.is_available:
                     flash(f'Product {product_id} is no longer available', 'error')
                     return redirect(url_for('orders.cart'))
@@ -376,21 +380,21 @@ def checkout():
                 'transaction_id': transaction_id
             }
             
+            # Reserve stock atomically; a concurrent checkout may have taken it since the check above
+            short_item = mongo_db.reserve_stock(order_items)
+            if short_item:
+                flash(f'मौज्दात अपुग / Insufficient stock for {short_item["product_name"]}. Please update your cart.', 'error')
+                return redirect(url_for('orders.cart'))
+            
             # Save order to database
             order = MongoOrder(order_data)
-            saved_order = mongo_db.save_order(order)
+            try:
+                saved_order = mongo_db.save_order(order)
+            except Exception:
+                mongo_db.release_stock(order_items)
+                raise
             
             if saved_order:
-                # Update product stock quantities
-                for item in order_items:
-                    product = mongo_db.find_product_by_id(item['product_id'])
-                    if product:
-                        new_stock = product.stock_quantity - item['quantity']
-                        mongo_db.db.products.update_one(
-                            {'_id': product._id},
-                            {'$set': {'stock_quantity': max(0, new_stock)}}
-                        )
-                
                 # Clear cart
                 session.pop('cart', None)
                 session.modified = True
@@ -413,6 +417,7 @@ def checkout():
                     
                     return redirect(url_for('orders.order_detail', order_id=str(saved_order._id)))
             else:
+                mongo_db.release_stock(order_items)
                 flash('Failed to place order. Please try again.', 'error')
                 
         except Exception as e:
@@ -543,9 +548,10 @@ def place_order():
         # Prepare order items and calculate total
         order_items = []
         total_amount = 0
+        products = mongo_db.find_products_by_ids(cart_items)
         
         for product_id, quantity in cart_items.items():
-            product = mongo_db.find_product_by_id(product_id)
+            product = products.get(product_id)
             if not product or not product.is_available:
                 return jsonify({'error': f'Product {product_id} is no longer available'}), 400
             
@@ -577,21 +583,20 @@ def place_order():
             'payment_status': 'pending'
         }
         
+        # Reserve stock atomically; a concurrent checkout may have taken it since the check above
+        short_item = mongo_db.reserve_stock(order_items)
+        if short_item:
+            return jsonify({'error': f'Insufficient stock for {short_item["product_name"]}'}), 409
+        
         # Save order to database
         order = MongoOrder(order_data)
-        saved_order = mongo_db.save_order(order)
+        try:
+            saved_order = mongo_db.save_order(order)
+        except Exception:
+            mongo_db.release_stock(order_items)
+            raise
         
         if saved_order:
-            # Update product stock quantities
-            for item in order_items:
-                product = mongo_db.find_product_by_id(item['product_id'])
-                if product:
-                    new_stock = product.stock_quantity - item['quantity']
-                    mongo_db.db.products.update_one(
-                        {'_id': product._id},
-                        {'$set': {'stock_quantity': max(0, new_stock)}}
-                    )
-            
             # Clear cart
             session.pop('cart', None)
             session.modified = True
@@ -599,6 +604,7 @@ def place_order():
             flash('Order placed successfully!', 'success')
             return redirect(url_for('orders.order_detail', order_id=str(saved_order._id)))
         else:
+            mongo_db.release_stock(order_items)
             return jsonify({'error': 'Failed to place order'}), 500
     
     except Exception as e:
@@ -4,8 +4,11 @@
 Product listing, details, and management routes for MongoDB.
 """
 
-from flask import Blueprint, render_template, request, jsonify, abort
-from app.utils.mongo_db import mongo_db
+from flask import Blueprint, render_template, request, jsonify, abort, current_app, make_response
+from app.utils.mongo_db import mongo_db, projection, object_id_list
+from app.utils.raw_bson import raw_collection, find_raw, json_response
+from app.utils.http_cache import conditional_json
+from app.services.catalog_sync import catalog_changes, SyncTokenError
 from app.models.mongo_models import MongoProduct
 from app.forms.order import CartForm
 from app.forms.product import ReviewForm
@@ -78,7 +81,7 @@ def list():
     skip = (page - 1) * per_page
     
     # Get products for current page
-    products_data = mongo_db.db.products.find(query).sort(sort_criteria).skip(skip).limit(per_page)
+    products_data = mongo_db.db.products.find(query, projection('product_card')).sort(sort_criteria).skip(skip).limit(per_page)
     products = [MongoProduct(product_data) for product_data in products_data]
     
     # Get categories for filter
@@ -138,7 +141,7 @@ def detail(product_id):
             'category': product.category,
             'is_available': True,
             '_id': {'$ne': ObjectId(product_id)}
-        }).limit(4)
+        }, projection('product_card')).limit(4)
         
         related_products = [MongoProduct(product_data) for product_data in related_products_data]
         
@@ -162,7 +165,7 @@ def by_category(category_name):
     Products filtered by category.
     """
     # Get products in this category
-    products = mongo_db.get_all_products(category=category_name)
+    products = mongo_db.get_all_products(category=category_name, view='product_card')
     
     # Get category info
     category = mongo_db.find_category_by_name(category_name)
@@ -180,7 +183,7 @@ def by_meat_type(meat_type):
     Products filtered by meat type.
     """
     # Get products of this meat type
-    products = mongo_db.get_all_products(meat_type=meat_type)
+    products = mongo_db.get_all_products(meat_type=meat_type, view='product_card')
     
     if not products:
         abort(404)
@@ -189,55 +192,121 @@ def by_meat_type(meat_type):
                          products=products,
                          meat_type=meat_type)
 
+def _batch_ids():
+    """Product ids of a batch request: ?ids=a,b,c or a JSON body {"ids": [...]}."""
+    if request.method == 'POST':
+        ids = (request.get_json(silent=True) or {}).get('ids') or []
+    else:
+        ids = request.args.get('ids', '')
+    if isinstance(ids, str):
+        ids = ids.split(',')
+    # Keep the first occurrence of each id, in request order
+    ids = dict.fromkeys(str(product_id).strip() for product_id in ids)
+    return [product_id for product_id in ids if product_id]
+
+def _batch_lookup(view):
+    """Requested ids and their raw product documents ({id: document}) from one $in query."""
+    ids = _batch_ids()
+    max_ids = current_app.config.get('BATCH_MAX_IDS', 100)
+    if len(ids) > max_ids:
+        abort(make_response(jsonify({'error': f'एक पटकमा बढीमा {max_ids} उत्पादन / At most {max_ids} products per request'}), 400))
+    documents = find_raw('products', {'_id': {'$in': object_id_list(ids)}}, view=view) if ids else []
+    return ids, {str(document['_id']): document for document in documents}
+
+def _last_updated(documents):
+    return max((document.get('last_updated') for document in documents.values()
+                if document.get('last_updated')), default=None)
+
+@mongo_products_bp.route('/api/batch', methods=['GET', 'POST'])
+def api_product_batch():
+    """
+    Details of many products in one request, keyed by id; ids that don't
+    exist (or aren't valid) are listed under missing.
+    """
+    ids, documents = _batch_lookup('product_api')
+    return conditional_json({
+        'products': {product_id: MongoProduct(document).to_api_dict() for product_id, document in documents.items()},
+        'missing': [product_id for product_id in ids if product_id not in documents]
+    }, last_modified=_last_updated(documents))
+
+@mongo_products_bp.route('/api/check-stock/batch', methods=['GET', 'POST'])
+def api_check_stock_batch():
+    """
+    Stock of many products (e.g. everything in the cart) in one request, keyed by id.
+    """
+    ids, documents = _batch_lookup('product_stock')
+    stock = {}
+    for product_id, document in documents.items():
+        product = MongoProduct(document)
+        stock[product_id] = {
+            'product_id': product_id,
+            'stock_quantity': product.stock_quantity,
+            'is_available': product.is_available,
+            'unit': product.unit
+        }
+    return conditional_json({
+        'stock': stock,
+        'missing': [product_id for product_id in ids if product_id not in documents]
+    }, last_modified=_last_updated(documents))
+
 @mongo_products_bp.route('/api/<product_id>')
 def api_product_detail(product_id):
     """
     API endpoint for product details.
     """
     try:
-        product = mongo_db.find_product_by_id(product_id)
+        product_data = raw_collection('products').find_one({'_id': ObjectId(product_id)},
+                                                           projection('product_api'))
         
-        if not product:
+        if not product_data:
             return jsonify({'error': 'Product not found'}), 404
         
-        product_data = {
-            'id': str(product._id),
-            'name': product.name,
-            'name_nepali': product.name_nepali,
-            'description': product.description,
-            'price': product.price,
-            'image_url': product.image_url,
-            'category': product.category,
-            'meat_type': product.meat_type,
-            'preparation_type': product.preparation_type,
-            'stock_quantity': product.stock_quantity,
-            'unit': product.unit,
-            'is_featured': product.is_featured,
-            'is_available': product.is_available
-        }
+        # Model over the raw document only supplies the field defaults
+        product = MongoProduct(product_data)
+        last_updated = product_data.get('last_updated')
         
-        return jsonify(product_data)
+        return conditional_json(product.to_api_dict(), last_modified=last_updated)
     
     except Exception as e:
         return jsonify({'error': 'Invalid product ID'}), 400
 
+@mongo_products_bp.route('/api/changes')
+def api_catalog_changes():
+    """
+    Delta sync: products/categories changed, hidden or deleted since ?since=<token>
+    (no token = full catalog). Call again with next_token while has_more is true.
+    """
+    since = request.args.get('since', '').strip() or None
+    try:
+        changes = catalog_changes(since,
+                                  page_size=current_app.config.get('SYNC_PAGE_SIZE', 500),
+                                  overlap_seconds=current_app.config.get('SYNC_OVERLAP_SECONDS', 5))
+    except SyncTokenError:
+        return jsonify({'error': 'अमान्य सिंक टोकन / Invalid sync token'}), 400
+    
+    response = json_response(changes)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @mongo_products_bp.route('/api/check-stock/<product_id>')
 def api_check_stock(product_id):
     """
     API endpoint to check product stock.
     """
     try:
-        product = mongo_db.find_product_by_id(product_id)
+        product_data = raw_collection('products').find_one({'_id': ObjectId(product_id)},
+                                                           projection('product_stock'))
         
-        if not product:
+        if not product_data:
             return jsonify({'error': 'Product not found'}), 404
         
-        return jsonify({
+        product = MongoProduct(product_data)
+        return conditional_json({
             'product_id': str(product._id),
             'stock_quantity': product.stock_quantity,
             'is_available': product.is_available,
             'unit': product.unit
-        })
+        }, last_modified=product_data.get('last_updated'))
     
     except Exception as e:
         return jsonify({'error': 'Invalid product ID'}), 400
\ No newline at end of file
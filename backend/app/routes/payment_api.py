@@ -4,14 +4,14 @@
 Unified payment gateway API endpoints for frontend integration
 """
 
-import os
-import json
 import logging
 from datetime import datetime
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
 from werkzeug.exceptions import BadRequest
 
 from app.services.gateways import payment_manager
+from app.services.payment_audit import payment_audit_log
+from app.utils.mongo_db import mongo_db
 from app.models.mongo_models import MongoOrder as Order
 
 logger = logging.getLogger(__name__)
@@ -122,6 +122,17 @@ def initiate_payment():
         # Log payment initiation
         log_payment_attempt(order_number, gateway_name, 'initiate', result)
         
+        # Keep the Khalti pidx so lost callbacks can be reconciled later
+        if result.get('success') and result.get('pidx'):
+            mongo_db.set_order_payment_reference(order_number, gateway_name, result['pidx'])
+        
+        # Gateway circuit is open - tell the client to pick another method
+        if result.get('error') == 'GATEWAY_UNAVAILABLE':
+            response = jsonify(result)
+            response.status_code = 503
+            response.headers['Retry-After'] = str(int(result.get('retry_after_seconds') or 30))
+            return response
+        
         return jsonify(result)
         
     except ValueError as e:
@@ -323,7 +334,7 @@ def update_order_payment_status(order_number: str, payment_status: str,
 
 def log_payment_attempt(order_number: str, gateway: str, action: str, result: dict):
     """
-    Log payment attempt to file for debugging and audit.
+    Append payment attempt to the audit log for debugging and audit.
     
     Args:
         order_number: Order number
@@ -344,32 +355,8 @@ def log_payment_attempt(order_number: str, gateway: str, action: str, result: di
             'error': result.get('error')
         }
         
-        # Ensure logs directory exists
-        log_dir = os.path.join('instance', 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        
-        # Write to payment log file
-        log_file = os.path.join(log_dir, 'payment_attempts.json')
-        
-        # Read existing logs
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                logs = []
-        
-        # Add new log entry
-        logs.append(log_entry)
-        
-        # Keep only last 1000 entries
-        if len(logs) > 1000:
-            logs = logs[-1000:]
-        
-        # Write back to file
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, indent=2, ensure_ascii=False)
+        # Single append to instance/logs/payment_attempts.jsonl - no read/rewrite
+        payment_audit_log.record(log_entry)
             
     except Exception as e:
         logger.error(f"Error logging payment attempt: {str(e)}")
@@ -9,7 +9,9 @@ from flask import Blueprint, request, render_template, redirect, url_for, flash
 from urllib.parse import urlencode
 
 from app.services.gateways import payment_manager
+from app.services.webhook_queue import webhook_queue
 from app.models.mongo_models import MongoOrder as Order
+from app.utils.mongo_db import mongo_db
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +54,13 @@ def khalti_success():
             'order_number': purchase_order_id
         }
         
+        # Store the pidx first so reconciliation can finish the job if verification fails
+        mongo_db.set_order_payment_reference(purchase_order_id, 'khalti', pidx)
+        
         result = payment_manager.verify_payment('khalti', verification_data)
         
         if result.get('verified'):
+            apply_verified_payment('khalti', result, purchase_order_id)
             flash('Khalti भुक्तानी सफल भयो! / Khalti payment successful!', 'success')
             return redirect(url_for('orders.order_success', order_number=purchase_order_id))
         else:
@@ -117,9 +123,13 @@ def esewa_success():
             'refId': ref_id
         }
         
+        # Store the refId first so reconciliation can finish the job if verification fails
+        mongo_db.set_order_payment_reference(oid, 'esewa', ref_id)
+        
         result = payment_manager.verify_payment('esewa', verification_data)
         
         if result.get('verified'):
+            apply_verified_payment('esewa', result, oid)
             flash('eSewa भुक्तानी सफल भयो! / eSewa payment successful!', 'success')
             return redirect(url_for('orders.order_success', order_number=oid))
         else:
@@ -216,57 +226,98 @@ def payment_webhook(gateway_name):
     """
     Handle payment gateway webhooks for real-time notifications.
     
+    Webhooks are stored in the ingestion queue and acknowledged immediately;
+    verification and order updates happen in the queue's worker threads.
+    
     Args:
         gateway_name: Name of the payment gateway
     """
     try:
+        gateway_name = gateway_name.lower()
+        
         # Get webhook data
-        webhook_data = request.get_json() or request.form.to_dict()
+        webhook_data = request.get_json(silent=True) or request.form.to_dict()
         
         logger.info(f"Received {gateway_name} webhook: {webhook_data}")
         
         # Validate gateway
-        if not payment_manager.is_gateway_available(gateway_name.lower()):
+        if not payment_manager.is_gateway_available(gateway_name):
             logger.warning(f"Webhook received for unavailable gateway: {gateway_name}")
             return {'status': 'error', 'message': 'Gateway not available'}, 400
         
-        # Process webhook based on gateway
-        if gateway_name.lower() == 'khalti':
-            return process_khalti_webhook(webhook_data)
-        elif gateway_name.lower() == 'esewa':
-            return process_esewa_webhook(webhook_data)
-        else:
+        if gateway_name not in WEBHOOK_TRANSACTION_KEYS:
             logger.warning(f"Webhook handler not implemented for: {gateway_name}")
             return {'status': 'error', 'message': 'Webhook handler not implemented'}, 501
+        
+        transaction_id = get_webhook_transaction_id(gateway_name, webhook_data)
+        if not transaction_id:
+            return {'status': 'error', 'message': 'Transaction ID missing'}, 400
+        
+        queued, event_id = webhook_queue.enqueue(gateway_name, transaction_id, webhook_data)
+        if not queued:
+            return {'status': 'duplicate', 'message': 'Webhook already received'}, 200
+        
+        return {'status': 'accepted', 'event_id': event_id}, 202
             
     except Exception as e:
         logger.error(f"Webhook processing error for {gateway_name}: {str(e)}")
         return {'status': 'error', 'message': 'Webhook processing failed'}, 500
 
+# Payload keys holding the gateway transaction ID, in order of preference
+WEBHOOK_TRANSACTION_KEYS = {
+    'khalti': ('pidx', 'transaction_id', 'tidx'),
+    'esewa': ('refId', 'transaction_code', 'transaction_uuid')
+}
+
+def get_webhook_transaction_id(gateway_name, webhook_data):
+    """Extract the gateway transaction ID used to deduplicate webhooks."""
+    for key in WEBHOOK_TRANSACTION_KEYS.get(gateway_name, ()):
+        if webhook_data.get(key):
+            return str(webhook_data[key])
+    return None
+
 def process_khalti_webhook(webhook_data):
-    """Process Khalti webhook notification."""
-    try:
-        # Khalti webhook processing logic
-        # This would typically include signature verification
-        # and payment status updates
-        
-        logger.info("Processing Khalti webhook")
-        return {'status': 'success', 'message': 'Webhook processed'}
-        
-    except Exception as e:
-        logger.error(f"Khalti webhook processing error: {str(e)}")
-        return {'status': 'error', 'message': 'Webhook processing failed'}, 500
+    """Process a queued Khalti webhook notification (runs in a queue worker)."""
+    pidx = webhook_data.get('pidx')
+    if not pidx:
+        return {'success': False, 'message': 'pidx missing from Khalti webhook'}
+    
+    logger.info(f"Processing Khalti webhook for pidx {pidx}")
+    
+    # Never trust the webhook body - confirm the payment with Khalti
+    mongo_db.set_order_payment_reference(webhook_data.get('purchase_order_id'), 'khalti', pidx)
+    result = payment_manager.verify_payment('khalti', {'pidx': pidx})
+    return apply_verified_payment('khalti', result, webhook_data.get('purchase_order_id'))
 
 def process_esewa_webhook(webhook_data):
-    """Process eSewa webhook notification."""
-    try:
-        # eSewa webhook processing logic
-        # This would typically include signature verification
-        # and payment status updates
-        
-        logger.info("Processing eSewa webhook")
-        return {'status': 'success', 'message': 'Webhook processed'}
-        
-    except Exception as e:
-        logger.error(f"eSewa webhook processing error: {str(e)}")
-        return {'status': 'error', 'message': 'Webhook processing failed'}, 500
\ No newline at end of file
+    """Process a queued eSewa webhook notification (runs in a queue worker)."""
+    logger.info(f"Processing eSewa webhook for refId {webhook_data.get('refId')}")
+    
+    mongo_db.set_order_payment_reference(webhook_data.get('oid'), 'esewa', webhook_data.get('refId'))
+    result = payment_manager.verify_payment('esewa', webhook_data)
+    return apply_verified_payment('esewa', result, webhook_data.get('oid'))
+
+def apply_verified_payment(gateway_name, result, fallback_order_number=None):
+    """Mark the order paid when verification succeeded; request a retry if the gateway was unreachable."""
+    if not result.get('verified'):
+        # Gateway down or circuit open - keep the event queued for another attempt
+        return {'success': False, 'retry': bool(result.get('retryable')), 'message': result.get('message')}
+    
+    order_number = result.get('order_number') or fallback_order_number
+    updated = mongo_db.update_order_payment_status(
+        order_number,
+        'paid',
+        result.get('transaction_id'),
+        gateway_name
+    )
+    return {
+        'success': updated,
+        'verified': True,
+        'order_number': order_number,
+        'transaction_id': result.get('transaction_id'),
+        'message': 'Order payment updated' if updated else f'Order {order_number} not found'
+    }
+
+# Queue workers process webhooks through these handlers
+webhook_queue.register_handler('khalti', process_khalti_webhook)
+webhook_queue.register_handler('esewa', process_esewa_webhook)
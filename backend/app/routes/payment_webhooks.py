@@ -7,12 +7,12 @@ Secure webhook handlers for payment gateway callbacks.
 from flask import Blueprint, request, jsonify, redirect, url_for, flash, current_app
 from flask_login import current_user
 from app.services.payment_service import payment_service
+from app.services.webhook_queue import webhook_queue
 from app.utils.mongo_db import mongo_db
 from app.models.mongo_models import MongoOrder
 # Removed SQLAlchemy imports - using MongoDB only
 import logging
 import json
-from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -161,48 +161,57 @@ def stripe_webhook():
         
         logger.info("Stripe webhook received")
         
-        # Verify webhook signature and process payment
+        # Signature check stays inline so forged events never reach the queue
         verification_result = payment_service.verify_stripe_webhook(payload, signature)
         
-        if verification_result.get('verified'):
-            # Extract order information from webhook data
-            # In production, you would parse the webhook payload to get order details
-            transaction_id = verification_result.get('transaction_id')
-            amount = verification_result.get('amount')
-            
-            # For demo purposes, assume order number is in metadata
-            # In production, you would include order number in Stripe metadata
-            order_number = f"ORD-{transaction_id[-8:]}"  # Mock order number
-            
-            success = update_order_payment_status(
-                order_number, 
-                'paid', 
-                transaction_id,
-                'stripe'
-            )
-            
-            if success:
-                # Log successful payment
-                payment_service.log_payment_attempt(
-                    order_number, 
-                    'stripe', 
-                    amount,
-                    'verified',
-                    verification_result
-                )
-                
-                return jsonify({'status': 'success'}), 200
-            else:
-                logger.error(f"Failed to update order {order_number} after Stripe payment")
-                return jsonify({'status': 'error', 'message': 'Order update failed'}), 500
-        else:
+        if not verification_result.get('verified'):
             logger.error("Stripe webhook verification failed")
             return jsonify({'status': 'error', 'message': 'Verification failed'}), 400
+        
+        transaction_id = verification_result.get('transaction_id')
+        queued, event_id = webhook_queue.enqueue('stripe', transaction_id, {
+            'transaction_id': transaction_id,
+            'amount': verification_result.get('amount'),
+            'verification': verification_result
+        })
+        
+        if not queued:
+            return jsonify({'status': 'duplicate'}), 200
+        return jsonify({'status': 'accepted', 'event_id': event_id}), 202
             
     except Exception as e:
         logger.error(f"Stripe webhook handler error: {str(e)}")
         return jsonify({'status': 'error', 'message': 'Webhook processing failed'}), 500
 
+def process_stripe_webhook(payload: dict) -> dict:
+    """Apply a verified Stripe payment (runs in a webhook queue worker)."""
+    transaction_id = payload.get('transaction_id')
+    
+    # For demo purposes, assume order number is in metadata
+    # In production, you would include order number in Stripe metadata
+    order_number = f"ORD-{transaction_id[-8:]}"  # Mock order number
+    
+    success = update_order_payment_status(
+        order_number, 
+        'paid', 
+        transaction_id,
+        'stripe'
+    )
+    
+    if not success:
+        logger.error(f"Failed to update order {order_number} after Stripe payment")
+        return {'success': False, 'retry': True, 'message': 'Order update failed'}
+    
+    # Log successful payment
+    payment_service.log_payment_attempt(
+        order_number, 
+        'stripe', 
+        payload.get('amount'),
+        'verified',
+        payload.get('verification')
+    )
+    return {'success': True, 'order_number': order_number, 'transaction_id': transaction_id}
+
 @payment_webhooks_bp.route('/verify/<payment_method>', methods=['POST'])
 def manual_payment_verification(payment_method):
     """Manual payment verification endpoint for admin use."""
@@ -248,25 +257,13 @@ def manual_payment_verification(payment_method):
 
 def update_order_payment_status(order_number: str, payment_status: str, 
                                transaction_id: str = None, payment_method: str = None) -> bool:
-    """Update order payment status in MongoDB."""
+    """Update order payment status in MongoDB (idempotent, never downgrades a paid order)."""
     try:
         if mongo_db.db is None:
             logger.error("MongoDB connection not available")
             return False
-            
-        result = mongo_db.db.orders.update_one(
-            {'order_number': order_number},
-            {
-                '$set': {
-                    'payment_status': payment_status,
-                    'transaction_id': transaction_id,
-                    'payment_method': payment_method,
-                    'payment_verified_at': datetime.utcnow() if payment_status == 'paid' else None
-                }
-            }
-        )
         
-        if result.modified_count > 0:
+        if mongo_db.update_order_payment_status(order_number, payment_status, transaction_id, payment_method):
             logger.info(f"MongoDB order {order_number} payment status updated to {payment_status}")
             return True
         else:
@@ -293,4 +290,7 @@ def get_order_id_by_number(order_number: str) -> str:
             
     except Exception as e:
         logger.error(f"Error getting order ID: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+# Queue workers process Stripe events through this handler
+webhook_queue.register_handler('stripe', process_stripe_webhook)
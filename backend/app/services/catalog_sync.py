@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Catalog Delta Sync
+Products and categories added, changed, hidden or deleted since a sync token,
+for apps and kiosks that keep a local copy of the catalog (/products/api/changes).
+
+A token is the last_updated position the client has seen ("<ms>" or
+"<ms>-<product id>" between pages). Clients apply results as upserts/removals
+by id, so items sent twice (the overlap window below) are harmless.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.utils.mongo_db import TOMBSTONE_RETENTION_DAYS
+from app.utils.raw_bson import find_raw
+from app.models.mongo_models import MongoProduct, MongoCategory
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+class SyncTokenError(ValueError):
+    """The since token isn't one this endpoint issued."""
+
+def encode_token(moment: datetime, last_id: ObjectId = None) -> str:
+    millis = (moment - EPOCH) // timedelta(milliseconds=1)
+    return f'{millis}-{last_id}' if last_id else str(millis)
+
+def decode_token(token: str) -> Tuple[datetime, Optional[ObjectId]]:
+    millis, _, last_id = token.partition('-')
+    try:
+        return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(last_id) if last_id else None
+    except (ValueError, InvalidId, OverflowError):
+        raise SyncTokenError(f'Invalid sync token: {token}')
+
+def catalog_changes(since: str = None, page_size: int = 500, overlap_seconds: int = 5) -> Dict[str, Any]:
+    """
+    Catalog changes since a token, or the whole visible catalog ('reset': True)
+    when there is no token or it is older than the tombstone log. Returns
+    'next_token' for the next call; 'has_more' means call again right away.
+    """
+    started = datetime.utcnow()
+    # Writes stamped just before this query may not be visible yet, so the
+    # caught-up token reaches back overlap_seconds
+    caught_up_token = started - timedelta(seconds=overlap_seconds)
+
+    if since:
+        moment, after_id = decode_token(since)
+        if moment >= started - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+            return _delta(moment, after_id, page_size, caught_up_token)
+        logger.info(f"Sync token {since} older than the tombstone log, sending the full catalog")
+    return _snapshot(caught_up_token)
+
+def _snapshot(caught_up_token: datetime) -> Dict[str, Any]:
+    products = find_raw('products', {'is_available': True}, view='product_api', sort=[('name', 1)])
+    categories = find_raw('categories', {'is_active': True}, view='category_api', sort=[('sort_order', 1)])
+    return {
+        'reset': True,
+        'products': [MongoProduct(document).to_api_dict() for document in products],
+        'categories': [MongoCategory(document).to_api_dict() for document in categories],
+        'removed': {'products': [], 'categories': []},
+        'next_token': encode_token(caught_up_token),
+        'has_more': False
+    }
+
+def _delta(moment: datetime, after_id: Optional[ObjectId], page_size: int,
+           caught_up_token: datetime) -> Dict[str, Any]:
+    if after_id:
+        # Next page: resume after the last (last_updated, _id) sent
+        product_query = {'$or': [{'last_updated': {'$gt': moment}},
+                                 {'last_updated': moment, '_id': {'$gt': after_id}}]}
+    else:
+        product_query = {'last_updated': {'$gte': moment}}
+    documents = list(find_raw('products', product_query, view='product_api',
+                              sort=[('last_updated', 1), ('_id', 1)], limit=page_size + 1))
+    has_more = len(documents) > page_size
+    documents = documents[:page_size]
+
+    changes = {
+        'reset': False,
+        'products': [],
+        'categories': [],
+        'removed': {'products': [], 'categories': []},
+        'has_more': has_more
+    }
+    for document in documents:
+        product = MongoProduct(document)
+        if product.is_available:
+            changes['products'].append(product.to_api_dict())
+        else:
+            changes['removed']['products'].append(str(product._id))
+
+    # Few categories and deletions: sent whole on every page of a sync
+    for document in find_raw('categories', {'last_updated': {'$gte': moment}}, view='category_api'):
+        category = MongoCategory(document)
+        if category.is_active:
+            changes['categories'].append(category.to_api_dict())
+        else:
+            changes['removed']['categories'].append(str(category._id))
+    for tombstone in find_raw('catalog_tombstones', {'deleted_at': {'$gte': moment}}):
+        changes['removed'][tombstone['kind']].append(str(tombstone['item_id']))
+
+    if has_more:
+        last = documents[-1]
+        changes['next_token'] = encode_token(last['last_updated'], last['_id'])
+    else:
+        changes['next_token'] = encode_token(max(moment, caught_up_token))
+    return changes
@@ -2,19 +2,50 @@
 """
 🍖 Nepal Meat Shop - Payment Gateways Package
 Modular payment gateway system for Nepali payment providers
+
+The gateway modules (and requests, which they pull in) are imported on first
+use instead of at app startup, so importing the payment blueprints stays cheap.
 """
 
-from .khalti import KhaltiGateway
-from .esewa import ESewaGateway
-from .gateway_manager import PaymentGatewayManager, payment_manager
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    'KhaltiGateway': '.khalti',
+    'ESewaGateway': '.esewa',
+    'PaymentGatewayManager': '.gateway_manager'
+}
+
+class _LazyPaymentManager:
+    """Stands in for gateway_manager.payment_manager until it is first used."""
+
+    def _target(self):
+        return importlib.import_module('.gateway_manager', __name__).payment_manager
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target(), name, value)
+
+    def __repr__(self):
+        return f'<lazy {self._target()!r}>'
+
+payment_manager = _LazyPaymentManager()
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'KhaltiGateway',
-    'ESewaGateway', 
+    'ESewaGateway',
     'PaymentGatewayManager',
     'payment_manager'
 ]
 
 __version__ = '1.0.0'
 __author__ = 'Nepal Meat Shop'
-__description__ = 'Modular payment gateway system for Nepali payment providers'
\ No newline at end of file
+__description__ = 'Modular payment gateway system for Nepali payment providers'
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Payment Gateway Circuit Breaker
+Per-gateway fast-fail protection when Khalti/eSewa are slow or failing
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any
+
+from app.utils.metrics import set_circuit_open
+
+logger = logging.getLogger(__name__)
+
+# Circuit states
+CLOSED = 'closed'        # Normal operation, all calls allowed
+OPEN = 'open'            # Gateway considered down, calls short-circuited
+HALF_OPEN = 'half_open'  # Cooldown elapsed, a few probe calls allowed
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker for a single payment gateway.
+
+    Every outcome is recorded with its latency. When the window holds at
+    least ``min_calls`` outcomes and either the error rate or the slow-call
+    rate crosses its threshold, the circuit opens and callers fail fast.
+    After ``open_seconds`` it half-opens and lets ``probe_calls`` requests
+    through; if they succeed the circuit closes, otherwise it opens again.
+    """
+
+    def __init__(self, name: str, window_seconds: float = 60.0, min_calls: int = 10,
+                 error_threshold: float = 0.5, slow_call_ms: float = 5000.0,
+                 slow_threshold: float = 0.5, open_seconds: float = 30.0,
+                 probe_calls: int = 2):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_threshold = slow_threshold
+        self.open_seconds = open_seconds
+        self.probe_calls = probe_calls
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, ok, elapsed_ms)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened = 0
+        self.short_circuited = 0
+        set_circuit_open(name, False)
+
+    @classmethod
+    def from_env(cls, name: str) -> 'CircuitBreaker':
+        """Build a breaker using PAYMENT_BREAKER_* environment settings."""
+        def setting(key, default):
+            value = os.getenv(f'{name.upper()}_BREAKER_{key}', os.getenv(f'PAYMENT_BREAKER_{key}'))
+            try:
+                return float(value) if value not in (None, '') else default
+            except ValueError:
+                return default
+
+        return cls(
+            name,
+            window_seconds=setting('WINDOW_SECONDS', 60.0),
+            min_calls=int(setting('MIN_CALLS', 10)),
+            error_threshold=setting('ERROR_THRESHOLD', 0.5),
+            slow_call_ms=setting('SLOW_CALL_MS', 5000.0),
+            slow_threshold=setting('SLOW_THRESHOLD', 0.5),
+            open_seconds=setting('OPEN_SECONDS', 30.0),
+            probe_calls=int(setting('PROBE_CALLS', 2))
+        )
+
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN -> HALF_OPEN once the cooldown elapsed."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def is_open(self) -> bool:
+        """True while callers should be short-circuited (probes not yet due)."""
+        return self.state == OPEN
+
+    def allow_request(self) -> bool:
+        """
+        Ask permission for a call. In HALF_OPEN only a limited number of
+        probe calls are admitted at a time.
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.probe_calls:
+                self._probes_in_flight += 1
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record(self, ok: bool, elapsed_ms: float):
+        """Record the outcome of a call that allow_request() admitted."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if ok and elapsed_ms < self.slow_call_ms:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.probe_calls:
+                        self._close()
+                else:
+                    self._trip(now, reason='probe failed')
+                return
+
+            self._outcomes.append((now, ok, elapsed_ms))
+            self._evict(now)
+            if self._state == CLOSED and self._should_trip():
+                self._trip(now, reason=self._trip_reason())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Point-in-time view of the breaker for status endpoints."""
+        with self._lock:
+            self._refresh_state()
+            self._evict(time.monotonic())
+            calls, errors, slow = self._window_counts()
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'window_errors': errors,
+                'window_slow_calls': slow,
+                'times_opened': self.times_opened,
+                'short_circuited': self.short_circuited,
+                'retry_after_seconds': round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1)
+                if self._state == OPEN else 0
+            }
+
+    def reset(self):
+        """Force the breaker closed (e.g. from an admin action)."""
+        with self._lock:
+            self._close()
+
+    # Internal helpers - caller must hold the lock
+
+    def _refresh_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            set_circuit_open(self.name, False)
+            logger.info(f"Circuit for {self.name} half-open, allowing probe requests")
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _window_counts(self):
+        calls = len(self._outcomes)
+        errors = sum(1 for _, ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, _, elapsed in self._outcomes if elapsed >= self.slow_call_ms)
+        return calls, errors, slow
+
+    def _should_trip(self) -> bool:
+        calls, errors, slow = self._window_counts()
+        if calls < self.min_calls:
+            return False
+        return errors / calls >= self.error_threshold or slow / calls >= self.slow_threshold
+
+    def _trip_reason(self) -> str:
+        calls, errors, slow = self._window_counts()
+        return f'{errors}/{calls} errors, {slow}/{calls} slow calls'
+
+    def _trip(self, now: float, reason: str):
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened += 1
+        set_circuit_open(self.name, True)
+        logger.warning(f"Circuit for {self.name} opened ({reason}); failing fast for {self.open_seconds}s")
+
+    def _close(self):
+        if self._state != CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        set_circuit_open(self.name, False)
+
+# Shared breakers, one per gateway
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(gateway_name: str) -> CircuitBreaker:
+    """Get (or lazily create) the circuit breaker for a gateway."""
+    breaker = _breakers.get(gateway_name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(gateway_name)
+            if breaker is None:
+                breaker = CircuitBreaker.from_env(gateway_name)
+                _breakers[gateway_name] = breaker
+    return breaker
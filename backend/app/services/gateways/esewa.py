@@ -15,6 +15,9 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 from urllib.parse import urlencode
 
+from app.config.payment_config import PaymentConfig
+from .http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 class ESewaGateway:
@@ -34,6 +37,10 @@ class ESewaGateway:
         if self.environment == 'production':
             self.payment_url = os.getenv('ESEWA_PRODUCTION_URL')
             self.verification_url = os.getenv('ESEWA_VERIFICATION_PRODUCTION_URL')
+        elif self.environment == 'simulator':
+            simulator_urls = PaymentConfig.get_simulator_urls('esewa')
+            self.payment_url = simulator_urls['payment_url']
+            self.verification_url = simulator_urls['verification_url']
         else:
             self.payment_url = os.getenv('ESEWA_SANDBOX_URL')
             self.verification_url = os.getenv('ESEWA_VERIFICATION_SANDBOX_URL')
@@ -41,6 +48,9 @@ class ESewaGateway:
         self.success_url = os.getenv('ESEWA_SUCCESS_URL')
         self.failure_url = os.getenv('ESEWA_FAILURE_URL')
         
+        # Shared pooled HTTP session for all eSewa calls
+        self.http = get_http_client('esewa')
+        
         # Validate configuration
         if not all([self.merchant_id, self.secret_key]):
             raise ValueError("eSewa configuration incomplete. Check environment variables.")
@@ -114,11 +124,11 @@ class ESewaGateway:
             
             logger.info(f"Verifying eSewa payment: {verification_params}")
             
-            # Make verification request
-            response = requests.post(
+            # Make verification request (transrec is idempotent, safe to retry)
+            response = self.http.post(
                 self.verification_url,
                 data=verification_params,
-                timeout=30
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -147,7 +157,8 @@ class ESewaGateway:
                 return {
                     'success': False,
                     'verified': False,
-                    'message': 'eSewa प्रमाणीकरण सेवामा समस्या / eSewa verification service error'
+                    'message': 'eSewa प्रमाणीकरण सेवामा समस्या / eSewa verification service error',
+                    'retryable': response.status_code >= 500
                 }
                 
         except requests.exceptions.RequestException as e:
@@ -156,7 +167,8 @@ class ESewaGateway:
                 'success': False,
                 'verified': False,
                 'message': 'eSewa प्रमाणीकरण सेवामा समस्या / eSewa verification service unavailable',
-                'error': str(e)
+                'error': str(e),
+                'retryable': True
             }
         except Exception as e:
             logger.error(f"eSewa verification error: {str(e)}")
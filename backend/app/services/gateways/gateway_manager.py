@@ -11,6 +11,8 @@ from datetime import datetime
 
 from .khalti import KhaltiGateway
 from .esewa import ESewaGateway
+from .http_client import get_all_metrics
+from .circuit_breaker import get_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +63,10 @@ class PaymentGatewayManager:
         available_gateways = []
         
         for gateway_name, gateway_instance in self.gateways.items():
+            # Hide gateways whose circuit is open so checkout doesn't offer them
+            if get_breaker(gateway_name).is_open():
+                continue
+            
             if gateway_instance.is_configured():
                 gateway_info = gateway_instance.get_config_info()
                 gateway_info.update({
@@ -94,6 +100,21 @@ class PaymentGatewayManager:
         }
         return descriptions.get(gateway_name, 'Payment gateway / भुक्तानी गेटवे')
     
+    def _gateway_unavailable_result(self, gateway_name: str, **extra) -> Dict[str, Any]:
+        """Fast-fail result returned while a gateway's circuit is open."""
+        breaker_state = get_breaker(gateway_name).snapshot()
+        result = {
+            'success': False,
+            'message': f'{self._get_gateway_display_name(gateway_name)} अहिले उपलब्ध छैन, कृपया अर्को भुक्तानी विधि प्रयोग गर्नुहोस् / '
+                       f'{self._get_gateway_display_name(gateway_name)} is temporarily unavailable, please use another payment method',
+            'error': 'GATEWAY_UNAVAILABLE',
+            'retryable': True,
+            'gateway': gateway_name,
+            'retry_after_seconds': breaker_state['retry_after_seconds']
+        }
+        result.update(extra)
+        return result
+    
     def initiate_payment(self, gateway_name: str, amount: float, order_number: str, 
                         customer_info: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -135,6 +156,11 @@ class PaymentGatewayManager:
                     'error': 'INVALID_AMOUNT'
                 }
             
+            # Fail fast instead of tying up a worker on a gateway that is down
+            if get_breaker(gateway_name).is_open():
+                logger.warning(f"Skipping {gateway_name} initiation for order {order_number}: circuit open")
+                return self._gateway_unavailable_result(gateway_name)
+            
             # Log payment initiation
             logger.info(f"Initiating {gateway_name} payment: Order {order_number}, Amount NPR {amount}")
             
@@ -179,6 +205,11 @@ class PaymentGatewayManager:
             
             gateway = self.gateways[gateway_name]
             
+            # Fail fast while the gateway's circuit is open
+            if get_breaker(gateway_name).is_open():
+                logger.warning(f"Skipping {gateway_name} verification: circuit open")
+                return self._gateway_unavailable_result(gateway_name, verified=False)
+            
             # Log verification attempt
             logger.info(f"Verifying {gateway_name} payment: {payment_data.get('order_number', 'Unknown')}")
             
@@ -224,7 +255,9 @@ class PaymentGatewayManager:
             'gateway': gateway_name,
             'available': True,
             'configured': gateway.is_configured(),
-            'config_info': gateway.get_config_info()
+            'config_info': gateway.get_config_info(),
+            'http_metrics': gateway.http.metrics.snapshot() if hasattr(gateway, 'http') else None,
+            'circuit': get_breaker(gateway_name).snapshot()
         }
     
     def get_all_gateway_status(self) -> Dict[str, Any]:
@@ -244,6 +277,10 @@ class PaymentGatewayManager:
         
         return status
     
+    def get_gateway_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get HTTP latency/error metrics for every gateway."""
+        return get_all_metrics()
+    
     def validate_payment_data(self, gateway_name: str, payment_data: Dict[str, Any]) -> bool:
         """
         Validate payment data for specific gateway.
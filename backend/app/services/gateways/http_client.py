@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Payment Gateway HTTP Client
+Pooled keep-alive HTTP sessions, retry policy and latency metrics for gateways
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.metrics import observe_gateway_call
+from app.utils.performance import percentile
+from .circuit_breaker import get_breaker
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying for idempotent calls (gateway overloaded / restarting)
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised instead of calling a gateway whose circuit breaker is open.
+    Subclasses RequestException so gateways report it as "service unavailable".
+    """
+
+    def __init__(self, gateway_name: str):
+        super().__init__(f'{gateway_name} circuit open')
+        self.gateway_name = gateway_name
+
+class GatewayLatencyMetrics:
+    """
+    Thread-safe latency and outcome counters for a single gateway.
+    Keeps a bounded window of recent samples for percentile reporting.
+    """
+
+    def __init__(self, window_size: int = 500):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window_size)
+        self.total_calls = 0
+        self.total_errors = 0
+        self.total_retries = 0
+        self.total_time_ms = 0.0
+        self.last_error = None
+        self.last_call_at = None
+
+    def record(self, elapsed_ms: float, ok: bool, error: Optional[str] = None):
+        """Record the outcome of a single HTTP attempt."""
+        with self._lock:
+            self._samples.append(elapsed_ms)
+            self.total_calls += 1
+            self.total_time_ms += elapsed_ms
+            self.last_call_at = time.time()
+            if not ok:
+                self.total_errors += 1
+                self.last_error = error
+
+    def record_retry(self):
+        """Count a retry attempt."""
+        with self._lock:
+            self.total_retries += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a point-in-time summary of the collected metrics."""
+        with self._lock:
+            samples = sorted(self._samples)
+            calls = self.total_calls
+            return {
+                'calls': calls,
+                'errors': self.total_errors,
+                'retries': self.total_retries,
+                'error_rate': round(self.total_errors / calls, 4) if calls else 0.0,
+                'avg_ms': round(self.total_time_ms / calls, 2) if calls else 0.0,
+                'p50_ms': percentile(samples, 50),
+                'p95_ms': percentile(samples, 95),
+                'p99_ms': percentile(samples, 99),
+                'max_ms': round(samples[-1], 2) if samples else 0.0,
+                'last_error': self.last_error,
+                'last_call_at': self.last_call_at
+            }
+
+class GatewayHTTPClient:
+    """
+    Shared HTTP client for a single payment gateway.
+
+    Wraps a pooled keep-alive ``requests.Session`` with separate connect/read
+    timeouts. Idempotent calls (payment lookups/verification) are retried with
+    exponential backoff and full jitter; payment initiation is never retried so
+    a customer cannot be charged twice.
+    """
+
+    def __init__(self, gateway_name: str):
+        self.gateway_name = gateway_name
+        prefix = f'{gateway_name.upper()}_'
+
+        self.connect_timeout = _env_float(prefix + 'CONNECT_TIMEOUT',
+                                          _env_float('PAYMENT_CONNECT_TIMEOUT', 3.05))
+        self.read_timeout = _env_float(prefix + 'READ_TIMEOUT',
+                                       _env_float('PAYMENT_READ_TIMEOUT', 10.0))
+        self.max_retries = int(_env_float(prefix + 'MAX_RETRIES',
+                                          _env_float('PAYMENT_RETRY_ATTEMPTS', 3)))
+        self.backoff_base = _env_float('PAYMENT_RETRY_BACKOFF', 0.25)
+        self.backoff_max = _env_float('PAYMENT_RETRY_BACKOFF_MAX', 2.0)
+        self.pool_size = int(_env_float('PAYMENT_HTTP_POOL_SIZE', 10))
+
+        self.metrics = GatewayLatencyMetrics()
+        self.breaker = get_breaker(gateway_name)
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        """Create a keep-alive session with a bounded connection pool."""
+        session = requests.Session()
+        # Retries are handled in request() so that only idempotent calls repeat
+        adapter = HTTPAdapter(pool_connections=2,
+                              pool_maxsize=self.pool_size,
+                              max_retries=0,
+                              pool_block=False)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'User-Agent': 'NepalMeatShop-Payments/1.0'})
+        return session
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple passed to requests."""
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        """POST to the gateway. Set ``idempotent`` for lookup/verify calls."""
+        return self.request('POST', url, idempotent=idempotent, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET from the gateway (always treated as idempotent)."""
+        return self.request('GET', url, idempotent=True, **kwargs)
+
+    def request(self, method: str, url: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session.
+
+        Raises:
+            CircuitOpenError: when the gateway's circuit breaker is open
+            requests.exceptions.RequestException: when every attempt failed
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempts = 1 + (self.max_retries if idempotent else 0)
+
+        for attempt in range(1, attempts + 1):
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(self.gateway_name)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.metrics.record(elapsed_ms, ok=False, error=type(e).__name__)
+                self.breaker.record(ok=False, elapsed_ms=elapsed_ms)
+                observe_gateway_call(self.gateway_name, elapsed_ms / 1000, 'error')
+                if attempt >= attempts or not _is_retryable_exception(e):
+                    raise
+                logger.warning(f"{self.gateway_name} request failed ({type(e).__name__}), "
+                               f"retry {attempt}/{attempts - 1}")
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                server_error = response.status_code >= 500
+                self.metrics.record(elapsed_ms, ok=not server_error,
+                                    error=f'HTTP {response.status_code}' if server_error else None)
+                self.breaker.record(ok=not server_error, elapsed_ms=elapsed_ms)
+                observe_gateway_call(self.gateway_name, elapsed_ms / 1000, 'http_5xx' if server_error else 'ok')
+                if attempt >= attempts or response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                logger.warning(f"{self.gateway_name} returned {response.status_code}, "
+                               f"retry {attempt}/{attempts - 1}")
+                response.close()
+
+            self.metrics.record_retry()
+            time.sleep(self._backoff_delay(attempt))
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+def _is_retryable_exception(error: Exception) -> bool:
+    """Connection problems and timeouts are transient; everything else is not."""
+    return isinstance(error, (requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout))
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float from the environment, falling back to default."""
+    value = os.getenv(name)
+    if value in (None, ''):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+# Shared clients, one per gateway, reused by every gateway instance
+_clients: Dict[str, GatewayHTTPClient] = {}
+_clients_lock = threading.Lock()
+
+def get_http_client(gateway_name: str) -> GatewayHTTPClient:
+    """Get (or lazily create) the shared HTTP client for a gateway."""
+    client = _clients.get(gateway_name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(gateway_name)
+            if client is None:
+                client = GatewayHTTPClient(gateway_name)
+                _clients[gateway_name] = client
+    return client
+
+def get_all_metrics() -> Dict[str, Dict[str, Any]]:
+    """Latency metrics for every gateway that has made HTTP calls."""
+    return {name: client.metrics.snapshot() for name, client in list(_clients.items())}
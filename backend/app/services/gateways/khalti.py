@@ -10,6 +10,9 @@ import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from app.config.payment_config import PaymentConfig
+from .http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 class KhaltiGateway:
@@ -27,6 +30,10 @@ class KhaltiGateway:
         if self.environment == 'production':
             self.initiate_url = os.getenv('KHALTI_PRODUCTION_URL')
             self.verification_url = os.getenv('KHALTI_VERIFICATION_PRODUCTION_URL')
+        elif self.environment == 'simulator':
+            simulator_urls = PaymentConfig.get_simulator_urls('khalti')
+            self.initiate_url = simulator_urls['initiate_url']
+            self.verification_url = simulator_urls['verification_url']
         else:
             self.initiate_url = os.getenv('KHALTI_SANDBOX_URL')
             self.verification_url = os.getenv('KHALTI_VERIFICATION_SANDBOX_URL')
@@ -34,6 +41,9 @@ class KhaltiGateway:
         self.success_url = os.getenv('KHALTI_SUCCESS_URL')
         self.failure_url = os.getenv('KHALTI_FAILURE_URL')
         
+        # Shared pooled HTTP session for all Khalti calls
+        self.http = get_http_client('khalti')
+        
         # Validate configuration
         if not all([self.public_key, self.secret_key, self.initiate_url]):
             raise ValueError("Khalti configuration incomplete. Check environment variables.")
@@ -76,12 +86,11 @@ class KhaltiGateway:
             
             logger.info(f"Initiating Khalti payment for order {order_number}, amount: NPR {amount}")
             
-            # Make API request to Khalti
-            response = requests.post(
+            # Make API request to Khalti (never retried - not idempotent)
+            response = self.http.post(
                 self.initiate_url,
                 json=payment_data,
-                headers=headers,
-                timeout=30
+                headers=headers
             )
             
             if response.status_code == 200:
@@ -118,16 +127,20 @@ class KhaltiGateway:
                 'error': str(e)
             }
     
-    def verify_payment(self, pidx: str) -> Dict[str, Any]:
+    def verify_payment(self, pidx) -> Dict[str, Any]:
         """
         Verify Khalti payment using pidx (payment identifier).
         
         Args:
-            pidx: Payment identifier returned from Khalti
+            pidx: Payment identifier returned from Khalti, or a payment data
+                  dict containing it (as passed by PaymentGatewayManager)
         
         Returns:
             Dict containing verification result
         """
+        if isinstance(pidx, dict):
+            pidx = pidx.get('pidx')
+        
         try:
             headers = {
                 'Authorization': f'Key {self.secret_key}',
@@ -141,12 +154,12 @@ class KhaltiGateway:
             
             logger.info(f"Verifying Khalti payment with pidx: {pidx}")
             
-            # Make verification request
-            response = requests.post(
+            # Make verification request (lookup is idempotent, safe to retry)
+            response = self.http.post(
                 self.verification_url,
                 json=verification_data,
                 headers=headers,
-                timeout=30
+                idempotent=True
             )
             
             if response.status_code == 200:
@@ -177,7 +190,8 @@ class KhaltiGateway:
                     'success': False,
                     'verified': False,
                     'message': 'Khalti भुक्तानी प्रमाणीकरण असफल / Khalti payment verification failed',
-                    'error': response.text
+                    'error': response.text,
+                    'retryable': response.status_code >= 500
                 }
                 
         except requests.exceptions.RequestException as e:
@@ -186,7 +200,8 @@ class KhaltiGateway:
                 'success': False,
                 'verified': False,
                 'message': 'Khalti प्रमाणीकरण सेवामा समस्या / Khalti verification service unavailable',
-                'error': str(e)
+                'error': str(e),
+                'retryable': True
             }
         except Exception as e:
             logger.error(f"Khalti verification error: {str(e)}")
@@ -205,11 +220,14 @@ class KhaltiGateway:
             pidx: Payment identifier
         
         Returns:
-            Payment status string
+            Khalti lookup status (Completed, Pending, Initiated, Expired, ...),
+            'Unknown' if Khalti could not be reached, 'Failed' otherwise
         """
         verification_result = self.verify_payment(pidx)
-        if verification_result.get('success'):
-            return verification_result.get('status', 'Unknown')
+        if verification_result.get('status'):
+            return verification_result['status']
+        if verification_result.get('retryable'):
+            return 'Unknown'
         return 'Failed'
     
     def is_configured(self) -> bool:
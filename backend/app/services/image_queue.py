@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Image Processing Queue
+MongoDB-backed queue of image variant jobs, so uploads return as soon as the
+original is saved. Worker threads claim jobs and run the Pillow work in a
+process pool, keeping resizing/encoding off the request threads and the GIL.
+"""
+
+import os
+import socket
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument, ASCENDING
+from pymongo.errors import PyMongoError
+
+from app.utils.mongo_db import mongo_db
+from app.utils.image_variants import create_variants, existing_variants
+
+logger = logging.getLogger(__name__)
+
+# Job states
+PENDING = 'pending'
+PROCESSING = 'processing'
+DONE = 'done'
+FAILED = 'failed'
+
+# Documents whose uploads get variants: kind -> (collection, image field, variants field, pending flag)
+TARGETS = {
+    'product': ('products', 'image_url', 'image_variants', 'image_pending'),
+    'user': ('users', 'profile_image', 'profile_image_variants', None),
+    'qr_code': ('qr_codes', 'qr_image', 'qr_image_variants', None)
+}
+
+# Upload folder of each kind (save_uploaded_file's folder argument)
+FOLDER_KINDS = {'products': 'product', 'profiles': 'user', 'qr_codes': 'qr_code'}
+
+class ImageQueue:
+    """
+    Image variant jobs stored in the ``image_jobs`` collection, one per
+    document: uploading again before the job ran just points it at the new
+    file. Worker threads lease jobs like the webhook queue and hand the
+    resizing to a process pool started on first use in each process.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.variants_enabled = True
+        self.num_workers = 1
+        self.poll_interval = 2.0
+        self.lease_seconds = 120
+        self.max_attempts = 3
+        self.upload_folder = None
+        self.jpeg_quality = 82
+        self.webp_quality = 80
+
+        self._threads = []
+        self._pid = None
+        self._pool = None
+        self._pool_pid = None
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Configure the queue from the Flask app and start workers lazily."""
+        self.enabled = app.config.get('IMAGE_QUEUE_ENABLED', True)
+        self.variants_enabled = app.config.get('IMAGE_VARIANTS_ENABLED', True)
+        self.num_workers = int(app.config.get('IMAGE_WORKERS', self.num_workers))
+        self.poll_interval = float(app.config.get('IMAGE_POLL_INTERVAL', self.poll_interval))
+        self.lease_seconds = int(app.config.get('IMAGE_LEASE_SECONDS', self.lease_seconds))
+        self.max_attempts = int(app.config.get('IMAGE_MAX_ATTEMPTS', self.max_attempts))
+        self.upload_folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+        self.jpeg_quality = int(app.config.get('IMAGE_JPEG_QUALITY', self.jpeg_quality))
+        self.webp_quality = int(app.config.get('IMAGE_WEBP_QUALITY', self.webp_quality))
+
+        # Threads and pools don't survive fork, so workers start in each serving process
+        app.before_request(self.ensure_workers)
+
+    def pending_fields(self, kind: str) -> Dict[str, Any]:
+        """
+        Fields to store with a new upload: the previous image's variants are
+        cleared, and products are flagged until the job has run.
+        """
+        _, _, variants_field, pending_field = TARGETS[kind]
+        fields = {variants_field: {}}
+        if pending_field and self.variants_enabled:
+            fields[pending_field] = True
+        return fields
+
+    def enqueue(self, kind: str, target_id, path: str) -> bool:
+        """
+        Queue variant generation for the upload `path` of a document. With
+        IMAGE_QUEUE_ENABLED off the job runs right away in the calling thread.
+
+        Returns:
+            bool: False when variants are disabled or there is nothing to process
+        """
+        if not self.variants_enabled or not path:
+            return False
+        now = datetime.utcnow()
+        job = mongo_db.db.image_jobs.find_one_and_update(
+            {'kind': kind, 'target_id': ObjectId(target_id)},
+            {'$set': {
+                'path': path,
+                'status': PENDING,
+                'attempts': 0,
+                'enqueued_at': now,
+                'next_attempt_at': now,
+                'last_error': None
+            }, '$unset': {'lease_expires_at': ''}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        if not self.enabled:
+            claimed = self._claim_next(job_id=job['_id'])
+            if claimed is not None:
+                self._process(claimed)
+            return True
+
+        self.ensure_workers()
+        self._wakeup.set()
+        return True
+
+    def store_variants(self, kind: str, path: str, variants: Dict[str, Any], target_id=None) -> int:
+        """
+        Record the variants of `path` on the documents still showing it (an
+        upload that replaced it in the meantime wins). Returns how many changed.
+        """
+        collection, image_field, variants_field, pending_field = TARGETS[kind]
+        query = {image_field: path}
+        if target_id is not None:
+            query['_id'] = ObjectId(target_id)
+        update = {'$set': {variants_field: variants}}
+        if pending_field:
+            update['$unset'] = {pending_field: ''}
+        modified = mongo_db.db[collection].update_many(query, update).modified_count
+        if modified and kind == 'product':
+            # Cached catalog pages still point at the original image
+            mongo_db.bump_catalog_version()
+        return modified
+
+    def ensure_workers(self):
+        """Start worker threads in the current process if they aren't running."""
+        if not self.enabled or not self.variants_enabled or self.num_workers <= 0:
+            return
+        if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = []
+            for index in range(self.num_workers):
+                thread = threading.Thread(target=self._worker_loop,
+                                          name=f'image-worker-{index}',
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"Started {self.num_workers} image workers in process {self._pid}")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop worker threads and the process pool (used by scripts and shutdown hooks)."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+    def process_pending(self, limit: int = 100) -> int:
+        """Process queued jobs synchronously in the calling thread."""
+        processed = 0
+        while processed < limit:
+            job = self._claim_next()
+            if job is None:
+                break
+            self._process(job)
+            processed += 1
+        return processed
+
+    def get_stats(self) -> Dict[str, int]:
+        """Count jobs by status."""
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        stats = {PENDING: 0, PROCESSING: 0, DONE: 0, FAILED: 0}
+        for row in mongo_db.db.image_jobs.aggregate(pipeline):
+            stats[row['_id']] = row['count']
+        return stats
+
+    # Worker internals
+
+    def _worker_loop(self):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+        while not self._stop.is_set():
+            try:
+                job = self._claim_next(worker_id)
+            except PyMongoError as e:
+                logger.error(f"Image queue claim failed: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._process(job, in_pool=True)
+            except PyMongoError as e:
+                # The lease expires and the job runs again
+                logger.error(f"Image queue update failed for {job['kind']} {job['target_id']}: {e}")
+
+    def _claim_next(self, worker_id: str = None, job_id: ObjectId = None) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next due job (or one whose lease expired)."""
+        now = datetime.utcnow()
+        query = {
+            '$or': [
+                {'status': PENDING, 'next_attempt_at': {'$lte': now}},
+                {'status': PROCESSING, 'lease_expires_at': {'$lt': now}}
+            ]
+        }
+        if job_id is not None:
+            query['_id'] = job_id
+        return mongo_db.db.image_jobs.find_one_and_update(
+            query,
+            {
+                '$set': {
+                    'status': PROCESSING,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'worker': worker_id or f'{os.getpid()}:inline'
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('next_attempt_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_pid != os.getpid():
+            # spawn, not fork: forking a process that runs threads and a MongoClient isn't safe
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _process(self, job: Dict[str, Any], in_pool: bool = False):
+        kind, path = job['kind'], job['path']
+        args = (path, self.upload_folder, self.jpeg_quality, self.webp_quality)
+        try:
+            # Re-uploaded bytes share one stored file, whose variants may already exist
+            variants = existing_variants(*args)
+            if variants is None and in_pool:
+                variants = self._get_pool().submit(create_variants, *args).result(timeout=self.lease_seconds)
+            elif variants is None:
+                variants = create_variants(*args)
+        except Exception as e:
+            logger.error(f"Image job for {kind} {job['target_id']} ({path}) failed: {e}")
+            if in_pool and self._pool is not None:
+                # A crashed or hung child leaves the pool unusable; the next job starts a new one
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            self._retry(job, str(e))
+            return
+
+        self.store_variants(kind, path, variants, target_id=job['target_id'])
+
+        # Only finish the job if no newer upload re-queued it meanwhile
+        mongo_db.db.image_jobs.update_one(
+            {'_id': job['_id'], 'path': path, 'status': PROCESSING},
+            {'$set': {
+                'status': DONE,
+                'processed_at': datetime.utcnow(),
+                'variant_count': sum(len(formats) for formats in variants.values()),
+                'last_error': None
+            }, '$unset': {'lease_expires_at': ''}}
+        )
+
+    def _retry(self, job: Dict[str, Any], error: str):
+        attempts = job.get('attempts', 1)
+        if attempts >= self.max_attempts:
+            status, next_attempt = FAILED, None
+            logger.error(f"Image job for {job['kind']} {job['target_id']} gave up after {attempts} attempts")
+            # The original keeps being served; drop the pending flag so the admin list doesn't wait forever
+            self.store_variants(job['kind'], job['path'], {}, target_id=job['target_id'])
+        else:
+            status = PENDING
+            next_attempt = datetime.utcnow() + timedelta(seconds=min(300, 2 ** attempts * 5))
+
+        mongo_db.db.image_jobs.update_one(
+            {'_id': job['_id'], 'path': job['path'], 'status': PROCESSING},
+            {'$set': {
+                'status': status,
+                'next_attempt_at': next_attempt,
+                'last_error': error
+            }, '$unset': {'lease_expires_at': ''}}
+        )
+
+# Global image queue instance
+image_queue = ImageQueue()
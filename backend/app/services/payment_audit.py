@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Payment Audit Log
+Append-only JSONL audit trail for payment attempts with size-based rotation.
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, List
+
+try:
+    import fcntl
+except ImportError:  # Windows - rotation falls back to the in-process lock only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class PaymentAuditLog:
+    """
+    Append-only payment audit sink.
+
+    Each entry is serialized to a single JSON line and written with one
+    ``write()`` on a file descriptor opened with ``O_APPEND``, so the cost per
+    entry is constant and concurrent writers (threads or gunicorn workers)
+    never overwrite each other. When the file grows past ``max_bytes`` it is
+    rotated to ``.1``, ``.2``, ... under an inter-process file lock.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, backup_count: int = None):
+        self.path = path or os.getenv('PAYMENT_AUDIT_LOG',
+                                      os.path.join('instance', 'logs', 'payment_attempts.jsonl'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv('PAYMENT_AUDIT_MAX_BYTES', 10 * 1024 * 1024))
+        self.backup_count = backup_count if backup_count is not None else int(
+            os.getenv('PAYMENT_AUDIT_BACKUPS', 5))
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def record(self, entry: Dict[str, Any]) -> bool:
+        """
+        Append one audit entry.
+
+        Returns:
+            bool: True if the entry was written, False otherwise
+        """
+        try:
+            line = (json.dumps(entry, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        except (TypeError, ValueError) as e:
+            logger.error(f"Unserializable payment audit entry: {e}")
+            return False
+
+        try:
+            with self._lock:
+                fd = self._current_fd()
+                if self.max_bytes and os.fstat(fd).st_size + len(line) > self.max_bytes:
+                    self._rotate()
+                    fd = self._current_fd()
+                self._write_all(fd, line)
+            return True
+        except OSError as e:
+            logger.error(f"Error writing payment audit log: {e}")
+            return False
+
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Read the most recent ``limit`` entries without loading the whole file."""
+        if not os.path.exists(self.path):
+            return []
+
+        block_size = 8192
+        data = b''
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            while position > 0 and data.count(b'\n') <= limit:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+
+        entries = []
+        for raw_line in data.splitlines()[-limit:]:
+            try:
+                entries.append(json.loads(raw_line.decode('utf-8')))
+            except (ValueError, UnicodeDecodeError):
+                continue  # Partial first line of the block
+        return entries
+
+    def close(self):
+        """Close the underlying file descriptor."""
+        with self._lock:
+            self._close_fd()
+
+    # Internal helpers - caller must hold self._lock
+
+    def _current_fd(self) -> int:
+        """Open (or reopen) the log if missing, rotated by another process, or after fork."""
+        if self._fd is not None and self._pid == os.getpid():
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return self._fd
+            except FileNotFoundError:
+                pass
+        self._close_fd()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        self._pid = os.getpid()
+        return self._fd
+
+    def _close_fd(self):
+        if self._fd is not None and self._pid == os.getpid():
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = None
+
+    @staticmethod
+    def _write_all(fd: int, data: bytes):
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+    def _rotate(self):
+        """Shift backups and start a new file, serialized across processes."""
+        lock_file = open(self.path + '.lock', 'a')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+            # Another worker may have rotated while we waited for the lock
+            try:
+                if os.stat(self.path).st_size <= self.max_bytes // 2:
+                    return
+            except FileNotFoundError:
+                return
+
+            if self.backup_count > 0:
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = f'{self.path}.{index}'
+                    if os.path.exists(source):
+                        os.replace(source, f'{self.path}.{index + 1}')
+                os.replace(self.path, f'{self.path}.1')
+            else:
+                os.truncate(self.path, 0)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+            self._close_fd()
+
+# Global audit log shared by payment routes and PaymentService
+payment_audit_log = PaymentAuditLog()
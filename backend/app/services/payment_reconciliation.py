@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Payment Reconciliation
+Re-checks pending Khalti/eSewa orders against the gateways when callbacks were lost.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from pymongo import UpdateOne, ASCENDING
+from pymongo.errors import BulkWriteError
+
+from app.utils.mongo_db import mongo_db
+from app.services.gateways import payment_manager
+
+logger = logging.getLogger(__name__)
+
+# Gateways that can be looked up after the fact
+RECONCILABLE_GATEWAYS = ('khalti', 'esewa')
+
+# Khalti lookup status -> order payment_status (statuses not listed stay pending)
+KHALTI_STATUS_MAP = {
+    'Completed': 'paid',
+    'Refunded': 'refunded',
+    'Partially refunded': 'refunded',
+    'Expired': 'failed',
+    'User canceled': 'failed'
+}
+
+class RateLimiter:
+    """Thread-safe token bucket shared by the reconciliation workers."""
+
+    def __init__(self, rate_per_second: float, burst: int = None):
+        self.rate = rate_per_second
+        self.capacity = burst or max(1, int(rate_per_second))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available (no-op when rate is 0)."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class PaymentReconciler:
+    """
+    Pages through pending online orders by ``_id`` and looks each one up at
+    its gateway from a bounded thread pool. Gateway calls are rate limited so
+    a backlog can't hammer Khalti/eSewa, and the resulting status changes are
+    written with one ``bulk_write`` per page. Every update is guarded on
+    ``payment_status: pending`` so a callback or webhook that lands meanwhile
+    always wins.
+    """
+
+    def __init__(self, workers: int = None, rate_per_second: float = None, page_size: int = None,
+                 min_age_minutes: int = None, expiry_minutes: int = None, dry_run: bool = False):
+        self.workers = workers or int(os.getenv('RECONCILE_WORKERS', 4))
+        self.rate_per_second = rate_per_second if rate_per_second is not None else float(
+            os.getenv('RECONCILE_RATE_PER_SECOND', 5))
+        self.page_size = page_size or int(os.getenv('RECONCILE_PAGE_SIZE', 100))
+        # Leave orders alone while the customer may still be on the gateway page
+        self.min_age_minutes = min_age_minutes if min_age_minutes is not None else int(
+            os.getenv('RECONCILE_MIN_AGE_MINUTES', 10))
+        self.expiry_minutes = expiry_minutes if expiry_minutes is not None else int(
+            os.getenv('PAYMENT_TIMEOUT_MINUTES', 30))
+        self.dry_run = dry_run
+
+    def run(self, gateways: Optional[List[str]] = None, limit: int = None) -> Dict[str, Any]:
+        """
+        Reconcile pending orders once.
+
+        Args:
+            gateways: Gateways to check (defaults to every reconcilable gateway)
+            limit: Stop after this many orders
+
+        Returns:
+            Dict with counts of checked/updated/unchanged/skipped/errors
+        """
+        gateways = [g for g in (gateways or RECONCILABLE_GATEWAYS) if g in RECONCILABLE_GATEWAYS]
+        stats = {'checked': 0, 'paid': 0, 'failed': 0, 'refunded': 0,
+                 'unchanged': 0, 'skipped': 0, 'errors': 0, 'written': 0}
+        started = time.perf_counter()
+
+        limiter = RateLimiter(self.rate_per_second, burst=self.workers)
+        cutoff = datetime.utcnow() - timedelta(minutes=self.min_age_minutes)
+        query = {
+            'payment_status': 'pending',
+            'payment_method': {'$in': gateways},
+            'order_date': {'$lte': cutoff}
+        }
+        projection = {'order_number': 1, 'payment_method': 1, 'payment_reference': 1,
+                      'total_amount': 1, 'order_date': 1}
+
+        last_id = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reconcile') as pool:
+            while limit is None or stats['checked'] < limit:
+                page_query = dict(query)
+                if last_id is not None:
+                    page_query['_id'] = {'$gt': last_id}
+                page_size = self.page_size if limit is None else min(self.page_size, limit - stats['checked'])
+
+                orders = list(mongo_db.db.orders.find(page_query, projection)
+                              .sort('_id', ASCENDING).limit(page_size))
+                if not orders:
+                    break
+                last_id = orders[-1]['_id']
+
+                outcomes = pool.map(lambda order: self._check_order(order, limiter), orders)
+                operations = []
+                for order, outcome in zip(orders, outcomes):
+                    stats['checked'] += 1
+                    stats[outcome['result']] += 1
+                    if outcome.get('update'):
+                        operations.append(UpdateOne(
+                            {'_id': order['_id'], 'payment_status': 'pending'},
+                            {'$set': outcome['update']}
+                        ))
+
+                stats['written'] += self._write(operations)
+
+        stats['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+        logger.info(f"Payment reconciliation finished: {stats}")
+        return stats
+
+    def _check_order(self, order: Dict[str, Any], limiter: RateLimiter) -> Dict[str, Any]:
+        """Look one order up at its gateway and decide the update to apply."""
+        gateway = order.get('payment_method')
+        reference = order.get('payment_reference')
+        if not reference:
+            # Nothing to look up: the customer never reached the gateway or
+            # the callback with the reference was lost entirely
+            return {'result': 'skipped'}
+
+        if gateway == 'khalti':
+            lookup_data = {'pidx': reference, 'order_number': order['order_number']}
+        else:
+            lookup_data = {'oid': order['order_number'], 'amt': order.get('total_amount'), 'refId': reference}
+
+        limiter.acquire()
+        try:
+            # Through the manager so an open circuit skips the call
+            result = payment_manager.verify_payment(gateway, lookup_data)
+        except Exception as e:
+            logger.error(f"Reconciliation lookup failed for {order.get('order_number')}: {e}")
+            return {'result': 'errors'}
+
+        if result.get('error') == 'GATEWAY_NOT_FOUND':
+            return {'result': 'skipped'}
+        if result.get('retryable'):
+            return {'result': 'errors'}
+
+        if result.get('verified'):
+            new_status = 'paid'
+        elif gateway == 'khalti':
+            new_status = KHALTI_STATUS_MAP.get(result.get('status'))
+        else:
+            new_status = None
+
+        # Abandoned before paying; Khalti's own "Pending" means hold, never fail it
+        if new_status is None and result.get('status') == 'Initiated' and self._expired(order):
+            new_status = 'failed'
+        if new_status is None:
+            return {'result': 'unchanged'}
+
+        update = {'payment_status': new_status, 'payment_reconciled_at': datetime.utcnow()}
+        if new_status == 'paid':
+            update['transaction_id'] = result.get('transaction_id') or reference
+            update['payment_verified_at'] = datetime.utcnow()
+        logger.info(f"Reconciled {order['order_number']} ({gateway}): pending -> {new_status}")
+        return {'result': new_status, 'update': update}
+
+    def _expired(self, order: Dict[str, Any]) -> bool:
+        order_date = order.get('order_date')
+        return bool(order_date) and order_date < datetime.utcnow() - timedelta(minutes=self.expiry_minutes)
+
+    def _write(self, operations: List[UpdateOne]) -> int:
+        if not operations or self.dry_run:
+            return 0
+        try:
+            result = mongo_db.db.orders.bulk_write(operations, ordered=False)
+            return result.modified_count
+        except BulkWriteError as e:
+            logger.error(f"Reconciliation bulk write partially failed: {e.details.get('writeErrors')}")
+            return e.details.get('nModified', 0)
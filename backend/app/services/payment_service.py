@@ -8,13 +8,14 @@ import hashlib
 import hmac
 import json
 import logging
-import requests
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, Tuple
 from flask import current_app
 import os
 
+from app.services.payment_audit import payment_audit_log
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -324,11 +325,10 @@ class PaymentService:
             'details': details or {}
         }
         
-        logger.info(f"Payment attempt logged: {json.dumps(log_entry)}")
+        logger.info(f"Payment attempt logged: {json.dumps(log_entry, default=str)}")
         
-        # Note: payment_logs.json file removed - now using MongoDB for payment logging
-        # In production, save to database or external logging service
-        # Payment logs are now stored in MongoDB collections
+        # Append to the shared payment audit log (same sink as the payment API)
+        payment_audit_log.record(log_entry)
 
 # Global payment service instance
 payment_service = PaymentService()
\ No newline at end of file
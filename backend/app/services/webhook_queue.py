@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Webhook Ingestion Queue
+Durable MongoDB-backed queue that acknowledges gateway webhooks immediately
+and processes them in background worker threads.
+"""
+
+import os
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from pymongo import ReturnDocument, ASCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.utils.mongo_db import mongo_db
+
+logger = logging.getLogger(__name__)
+
+# Event states
+PENDING = 'pending'
+PROCESSING = 'processing'
+DONE = 'done'
+FAILED = 'failed'
+
+class WebhookQueue:
+    """
+    Webhook ingestion queue stored in the ``webhook_events`` collection.
+
+    Routes call :meth:`enqueue` and return straight away. A unique index on
+    ``(gateway, transaction_id)`` drops gateway retries and duplicate bursts
+    for the same transaction before they reach the orders collection, while
+    a webhook for a transaction whose earlier event FAILED (e.g. verified
+    while still Pending) is queued again.
+    Worker threads claim events with a lease, run the handler registered for
+    the gateway and retry failures with backoff until ``max_attempts``.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self.num_workers = 2
+        self.poll_interval = 2.0
+        self.lease_seconds = 60
+        self.max_attempts = 5
+        self.enabled = True
+
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Configure the queue from the Flask app and start workers lazily."""
+        self.num_workers = int(app.config.get('WEBHOOK_WORKERS', self.num_workers))
+        self.poll_interval = float(app.config.get('WEBHOOK_POLL_INTERVAL', self.poll_interval))
+        self.lease_seconds = int(app.config.get('WEBHOOK_LEASE_SECONDS', self.lease_seconds))
+        self.max_attempts = int(app.config.get('WEBHOOK_MAX_ATTEMPTS', self.max_attempts))
+        self.enabled = app.config.get('WEBHOOK_QUEUE_ENABLED', True)
+
+        # Threads don't survive fork, so workers start in each serving process
+        app.before_request(self.ensure_workers)
+
+    def register_handler(self, gateway: str, handler: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """
+        Register the processor for a gateway's webhooks.
+
+        The handler receives the stored payload and returns a dict with at
+        least ``success``; raising an exception or returning
+        ``{'success': False, 'retry': True}`` schedules a retry.
+        """
+        self.handlers[gateway] = handler
+
+    def enqueue(self, gateway: str, transaction_id: str, payload: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Store a webhook for background processing.
+
+        Returns:
+            (queued, event_id): queued is False when the transaction was already received
+        """
+        now = datetime.utcnow()
+        event = {
+            'gateway': gateway,
+            'transaction_id': str(transaction_id),
+            'payload': payload,
+            'status': PENDING,
+            'attempts': 0,
+            'received_at': now,
+            'next_attempt_at': now,
+            'last_error': None
+        }
+        try:
+            result = mongo_db.db.webhook_events.insert_one(event)
+        except DuplicateKeyError:
+            # A failed event isn't final: the payment may have completed since
+            requeued = mongo_db.db.webhook_events.find_one_and_update(
+                {'gateway': gateway, 'transaction_id': str(transaction_id), 'status': FAILED},
+                {'$set': {
+                    'payload': payload,
+                    'status': PENDING,
+                    'attempts': 0,
+                    'next_attempt_at': now,
+                    'requeued_at': now,
+                    'last_error': None
+                }, '$unset': {'lease_expires_at': ''}},
+                return_document=ReturnDocument.AFTER
+            )
+            if requeued is not None:
+                logger.info(f"{gateway} webhook for failed transaction {transaction_id} queued again")
+                self.ensure_workers()
+                self._wakeup.set()
+                return True, str(requeued['_id'])
+
+            logger.info(f"Duplicate {gateway} webhook ignored for transaction {transaction_id}")
+            mongo_db.db.webhook_events.update_one(
+                {'gateway': gateway, 'transaction_id': str(transaction_id)},
+                {'$inc': {'duplicates': 1}, '$set': {'last_duplicate_at': now}}
+            )
+            return False, None
+
+        self.ensure_workers()
+        self._wakeup.set()
+        return True, str(result.inserted_id)
+
+    def ensure_workers(self):
+        """Start worker threads in the current process if they aren't running."""
+        if not self.enabled or self.num_workers <= 0:
+            return
+        if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = []
+            for index in range(self.num_workers):
+                thread = threading.Thread(target=self._worker_loop,
+                                          name=f'webhook-worker-{index}',
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"Started {self.num_workers} webhook workers in process {self._pid}")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop worker threads (used by scripts and shutdown hooks)."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def process_pending(self, limit: int = 100) -> int:
+        """Process queued events synchronously in the calling thread."""
+        processed = 0
+        while processed < limit:
+            event = self._claim_next()
+            if event is None:
+                break
+            self._process(event)
+            processed += 1
+        return processed
+
+    def get_stats(self) -> Dict[str, int]:
+        """Count queued events by status."""
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        stats = {PENDING: 0, PROCESSING: 0, DONE: 0, FAILED: 0}
+        for row in mongo_db.db.webhook_events.aggregate(pipeline):
+            stats[row['_id']] = row['count']
+        return stats
+
+    # Worker internals
+
+    def _worker_loop(self):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+        while not self._stop.is_set():
+            try:
+                event = self._claim_next(worker_id)
+            except PyMongoError as e:
+                logger.error(f"Webhook queue claim failed: {e}")
+                event = None
+
+            if event is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._process(event)
+            except PyMongoError as e:
+                # The lease expires and the event is delivered again
+                logger.error(f"Webhook queue update failed for {event['gateway']} event {event['_id']}: {e}")
+
+    def _claim_next(self, worker_id: str = None) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next due event (or one whose lease expired)."""
+        now = datetime.utcnow()
+        return mongo_db.db.webhook_events.find_one_and_update(
+            {
+                '$or': [
+                    {'status': PENDING, 'next_attempt_at': {'$lte': now}},
+                    {'status': PROCESSING, 'lease_expires_at': {'$lt': now}}
+                ]
+            },
+            {
+                '$set': {
+                    'status': PROCESSING,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'worker': worker_id or f'{os.getpid()}:inline'
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('next_attempt_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _process(self, event: Dict[str, Any]):
+        gateway = event['gateway']
+        handler = self.handlers.get(gateway)
+
+        try:
+            if handler is None:
+                raise LookupError(f'No webhook handler registered for {gateway}')
+            result = handler(event.get('payload') or {}) or {}
+        except Exception as e:
+            logger.error(f"{gateway} webhook {event['transaction_id']} failed: {e}")
+            result = {'success': False, 'retry': True, 'message': str(e)}
+
+        if result.get('success') or not result.get('retry'):
+            mongo_db.db.webhook_events.update_one(
+                {'_id': event['_id']},
+                {'$set': {
+                    'status': DONE if result.get('success') else FAILED,
+                    'processed_at': datetime.utcnow(),
+                    'result': _summarize_result(result),
+                    'last_error': None if result.get('success') else result.get('message')
+                }, '$unset': {'lease_expires_at': ''}}
+            )
+            return
+
+        attempts = event.get('attempts', 1)
+        if attempts >= self.max_attempts:
+            status, next_attempt = FAILED, None
+            logger.error(f"{gateway} webhook {event['transaction_id']} gave up after {attempts} attempts")
+        else:
+            status = PENDING
+            next_attempt = datetime.utcnow() + timedelta(seconds=min(300, 2 ** attempts * 5))
+
+        mongo_db.db.webhook_events.update_one(
+            {'_id': event['_id']},
+            {'$set': {
+                'status': status,
+                'next_attempt_at': next_attempt,
+                'last_error': result.get('message')
+            }, '$unset': {'lease_expires_at': ''}}
+        )
+
+def _summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only small, serializable fields of a handler result."""
+    keys = ('success', 'verified', 'order_number', 'transaction_id', 'message', 'status')
+    return {key: result.get(key) for key in keys if key in result}
+
+# Global webhook queue instance
+webhook_queue = WebhookQueue()
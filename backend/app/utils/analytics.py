@@ -7,6 +7,7 @@ Business analytics and insights calculation functions.
 from datetime import datetime, timedelta
 from collections import defaultdict
 from app.utils.mongo_db import mongo_db
+from app.utils.raw_bson import find_raw, lookup_customers
 from app.models.mongo_models import MongoOrder, MongoUser
 import calendar
 
@@ -29,7 +30,7 @@ class BusinessAnalytics:
                 query['order_date'] = date_filter
             
             # Get all orders
-            orders = list(mongo_db.db.orders.find(query))
+            orders = list(mongo_db.reader('analytics').orders.find(query))
             
             # Count by status
             stats = {
@@ -99,12 +100,14 @@ class BusinessAnalytics:
             if date_filter:
                 query['order_date'] = date_filter
             
-            # Get orders
-            orders_data = list(mongo_db.db.orders.find(query).sort('order_date', -1).limit(limit))
-            orders = [MongoOrder(order_data) for order_data in orders_data]
+            # Get orders as raw BSON, with all their customers in one query
+            orders_data = list(find_raw('orders', query, view='order_insights_row',
+                                        sort=[('order_date', -1)], limit=limit, workload='analytics'))
+            customers = lookup_customers((order.get('user_id') for order in orders_data), workload='analytics')
             
             # Convert to JSON-serializable dictionaries
-            orders_json = [order.to_json_dict() for order in orders]
+            orders_json = [MongoOrder.json_row(order, customers.get(str(order.get('user_id'))))
+                           for order in orders_data]
             
             return orders_json
         except Exception as e:
@@ -120,7 +123,7 @@ class BusinessAnalytics:
             reviews = []
             
             # Get completed orders and simulate reviews
-            completed_orders = list(mongo_db.db.orders.find({
+            completed_orders = list(mongo_db.reader('analytics').orders.find({
                 'status': {'$in': ['delivered', 'completed']}
             }).sort('order_date', -1).limit(limit))
             
@@ -193,7 +196,7 @@ class BusinessAnalytics:
                 query['order_date'] = date_filter
             
             # Get completed orders
-            orders = list(mongo_db.db.orders.find(query))
+            orders = list(mongo_db.reader('analytics').orders.find(query))
             
             total_revenue = 0
             delivery_areas = defaultdict(lambda: {'count': 0, 'revenue': 0})
@@ -259,7 +262,7 @@ class BusinessAnalytics:
             start_date = end_date - timedelta(days=months * 30)
             
             # Get completed orders in date range
-            orders = list(mongo_db.db.orders.find({
+            orders = list(mongo_db.reader('analytics').orders.find({
                 'status': {'$in': ['delivered', 'completed']},
                 'order_date': {'$gte': start_date, '$lte': end_date}
             }))
@@ -5,14 +5,33 @@ File upload, management, and processing utilities.
 """
 
 import os
+import re
 import uuid
-from datetime import datetime
+import hashlib
+import tempfile
 from werkzeug.utils import secure_filename
 from flask import current_app
 
+# Stored uploads are named by the SHA-256 of their bytes, sharded two levels deep:
+# products/3f/a2/3fa2...c9.jpg. The bytes at such a path never change, and
+# neither do those of its variants (named with a tag of their settings).
+CONTENT_ADDRESSED_PATH = re.compile(r'^[a-z_]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$')
+IMMUTABLE_VARIANT_PATH = re.compile(r'^[a-z_]+/[0-9a-f]{2}/[0-9a-f]{2}/variants/[0-9a-f]{64}_[a-z]+-[0-9a-f]{6}\.[a-z]+$')
+
+def is_content_addressed(file_path):
+    """True for uploads stored under their content hash (not older timestamp-named files)."""
+    return bool(file_path) and CONTENT_ADDRESSED_PATH.match(file_path) is not None
+
+def is_immutable_upload(file_path):
+    """True if the bytes served for this upload path can never change (cacheable forever)."""
+    return is_content_addressed(file_path) or IMMUTABLE_VARIANT_PATH.match(file_path or '') is not None
+
 def save_uploaded_file(file, folder):
     """
-    Save uploaded file to the specified folder with unique naming.
+    Save uploaded file to the specified folder under its content hash.
+    
+    Uploading the same bytes again (in any document) reuses the stored file;
+    each save counts as one reference, released again by delete_file().
     
     Args:
         file: The uploaded file object from Flask request
@@ -22,30 +41,49 @@ def save_uploaded_file(file, folder):
         str: The relative path to the saved file, or None if no file
     """
     if file and file.filename:
-        # Get secure filename to prevent directory traversal attacks
-        filename = secure_filename(file.filename)
-        
-        # Add timestamp and UUID to avoid filename conflicts
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        name, ext = os.path.splitext(filename)
-        unique_filename = f"{name}_{timestamp}_{uuid.uuid4().hex[:8]}{ext}"
+        # Only the extension of the client's filename is kept
+        ext = os.path.splitext(secure_filename(file.filename))[1].lower()
         
-        # Create folder path if it doesn't exist
         folder_path = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
         os.makedirs(folder_path, exist_ok=True)
         
-        # Save file to disk
-        file_path = os.path.join(folder_path, unique_filename)
-        file.save(file_path)
+        # Hash while writing to a temporary file in the same filesystem
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=folder_path, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in iter(lambda: file.stream.read(64 * 1024), b''):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            
+            content_hash = digest.hexdigest()
+            relative_path = f"{folder}/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{ext}"
+            
+            # Count the reference, then always move our copy into place: a
+            # delete_file() of the same blob may be removing the existing file
+            # right now, and the bytes are identical either way
+            from app.utils.mongo_db import mongo_db
+            mongo_db.add_blob_reference(relative_path, size)
+            
+            full_path = os.path.join(current_app.config['UPLOAD_FOLDER'], relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temp_path, full_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
         
         # Return relative path for database storage
-        return f"{folder}/{unique_filename}"
+        return relative_path
     
     return None
 
 def delete_file(file_path):
     """
-    Delete a file from the uploads directory.
+    Release a document's reference to an uploaded file. The file (and its
+    image variants) is deleted once no document uses it any more.
     
     Args:
         file_path: Relative path to the file (e.g., 'products/image.jpg')
@@ -56,15 +94,33 @@ def delete_file(file_path):
     if not file_path:
         return False
     
+    deleted = False
     try:
         full_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file_path)
-        if os.path.exists(full_path):
+        if is_content_addressed(file_path):
+            from app.utils.mongo_db import mongo_db
+            if not mongo_db.release_blob_reference(file_path):
+                return False
+            if os.path.exists(full_path):
+                # An upload of the same bytes may have counted itself since the
+                # release: move the file aside, then look again before unlinking
+                aside_path = os.path.join(os.path.dirname(full_path), f'.delete-{uuid.uuid4().hex}')
+                os.replace(full_path, aside_path)
+                if mongo_db.is_blob_referenced(file_path):
+                    os.replace(aside_path, full_path)
+                    return False
+                os.remove(aside_path)
+                deleted = True
+        elif os.path.exists(full_path):
             os.remove(full_path)
-            return True
+            deleted = True
+        
+        from app.utils.image_variants import delete_variants
+        delete_variants(file_path, current_app.config['UPLOAD_FOLDER'])
     except Exception as e:
         current_app.logger.error(f"Error deleting file {file_path}: {e}")
     
-    return False
+    return deleted
 
 def get_file_url(file_path):
     """
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - HTTP Conditional Caching
+ETag/Last-Modified validators and Cache-Control for the catalog JSON APIs,
+so the frontend JS and mobile clients revalidate with a cheap 304.
+"""
+
+import datetime
+
+from flask import Response, request, current_app
+
+from app.utils.mongo_db import mongo_db
+from app.utils.raw_bson import json_response
+
+# Per-product responses change with every sale (stock), so clients revalidate each time
+REVALIDATE = 'public, no-cache'
+
+def catalog_max_age() -> str:
+    """Cache-Control of responses derived only from the catalog version."""
+    return f"public, max-age={int(current_app.config.get('API_CACHE_MAX_AGE', 60))}, must-revalidate"
+
+def catalog_etag(name: str) -> str:
+    """ETag of a catalog-wide response (categories, meat types): changes with every edit."""
+    return f'{name}-v{mongo_db.catalog_version()}'
+
+def not_modified(etag: str, cache_control: str):
+    """
+    304 response when the client already holds `etag`, else None. Checked before
+    the response is built, so a revalidation costs one catalog version lookup.
+    """
+    if etag not in request.if_none_match:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def conditional_json(data, etag: str = None, last_modified: datetime.datetime = None,
+                     cache_control: str = REVALIDATE) -> Response:
+    """
+    JSON response with validators, answered with 304 when the request's
+    If-None-Match / If-Modified-Since still match. Without an explicit etag the
+    body's hash is used.
+    """
+    response = json_response(data)
+    if etag:
+        response.set_etag(etag)
+    else:
+        response.add_etag()
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=datetime.timezone.utc)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Image Variants
+Resized, metadata-free copies of uploaded images (thumb/card/detail, WebP plus
+a JPEG fallback) so grids and lists download kilobytes instead of the
+original upload. Variants live next to the original:
+
+    products/3f/a2/3fa2...c9.jpg
+    products/3f/a2/variants/3fa2...c9_card-1b2c3d.webp
+    products/3f/a2/variants/3fa2...c9_card-1b2c3d.jpg
+
+The suffix is a tag of the sizes and qualities they were made with, so
+regenerating them with other settings yields new (cacheable forever) URLs.
+"""
+
+import os
+import glob
+import hashlib
+import logging
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes, largest first (aspect ratio is kept, images are never upscaled)
+VARIANT_SIZES = {
+    'detail': (1200, 1200),
+    'card': (480, 480),
+    'thumb': (160, 160)
+}
+
+# Folders whose images must stay pixel exact: QR codes have to scan, so they
+# get lossless WebP with a PNG fallback instead of lossy WebP/JPEG
+LOSSLESS_FOLDERS = {'qr_codes'}
+
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+def is_lossless(relative_path: str) -> bool:
+    return relative_path.split('/', 1)[0] in LOSSLESS_FOLDERS
+
+def settings_tag(jpeg_quality: int, webp_quality: int) -> str:
+    """Short tag of everything that changes variant bytes, part of their file names."""
+    settings = repr((sorted(VARIANT_SIZES.items()), jpeg_quality, webp_quality))
+    return hashlib.sha256(settings.encode()).hexdigest()[:6]
+
+def variant_path(relative_path: str, size: str, fmt: str, tag: str = None) -> str:
+    """Relative path of one variant of an upload."""
+    folder, filename = os.path.split(relative_path)
+    stem = os.path.splitext(filename)[0]
+    suffix = f'-{tag}' if tag else ''
+    return os.path.join(folder, 'variants', f'{stem}_{size}{suffix}.{FORMAT_EXTENSIONS[fmt]}').replace(os.sep, '/')
+
+def existing_variants(relative_path: str, upload_folder: str, jpeg_quality: int = 82,
+                      webp_quality: int = 80) -> Optional[Dict[str, Dict[str, str]]]:
+    """Variant paths of an upload if all of them already exist with these settings, else None."""
+    tag = settings_tag(jpeg_quality, webp_quality)
+    formats = ('webp', 'png') if is_lossless(relative_path) else ('webp', 'jpeg')
+    variants = {size: {fmt: variant_path(relative_path, size, fmt, tag) for fmt in formats}
+                for size in VARIANT_SIZES}
+    if all(os.path.exists(os.path.join(upload_folder, path))
+           for formats_paths in variants.values() for path in formats_paths.values()):
+        return variants
+    return None
+
+def create_variants(relative_path: str, upload_folder: str, jpeg_quality: int = 82,
+                    webp_quality: int = 80) -> Dict[str, Dict[str, str]]:
+    """
+    Write every variant of an uploaded image and return their relative paths
+    ({'card': {'webp': ..., 'jpeg': ...}, ...}). Files Pillow can't read
+    (SVG, corrupt uploads) get no variants and keep being served as uploaded.
+    """
+    source = os.path.join(upload_folder, relative_path)
+    lossless = is_lossless(relative_path)
+    tag = settings_tag(jpeg_quality, webp_quality)
+    formats = ('webp', 'png') if lossless else ('webp', 'jpeg')
+    try:
+        with Image.open(source) as original:
+            # JPEG decodes straight at a reduced scale when that's still >= the largest box
+            original.draft('RGB', VARIANT_SIZES['detail'])
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        logger.warning(f"No variants for {relative_path}: {e}")
+        return {}
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    os.makedirs(os.path.join(upload_folder, os.path.dirname(relative_path), 'variants'), exist_ok=True)
+    variants = {}
+    for size, box in VARIANT_SIZES.items():
+        # Each size is resized from the previous (larger) one, which is cheaper than from the original
+        image = image.copy()
+        image.thumbnail(box, Image.LANCZOS)
+        image.info = {}  # No EXIF/GPS, ICC or XMP carried into the variants
+        variants[size] = {}
+        for fmt in formats:
+            path = variant_path(relative_path, size, fmt, tag)
+            _save(image, os.path.join(upload_folder, path), fmt, lossless, jpeg_quality, webp_quality)
+            variants[size][fmt] = path
+    return variants
+
+def _save(image, path: str, fmt: str, lossless: bool, jpeg_quality: int, webp_quality: int):
+    if fmt == 'webp':
+        if lossless:
+            image.save(path, 'WEBP', lossless=True, method=4)
+        else:
+            image.save(path, 'WEBP', quality=webp_quality, method=4)
+    elif fmt == 'png':
+        image.save(path, 'PNG', optimize=True)
+    else:
+        if image.mode == 'RGBA':
+            # JPEG has no alpha: flatten onto white like the page background
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.save(path, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+
+def delete_variants(relative_path: str, upload_folder: str) -> int:
+    """
+    Remove the variants of an upload, made with any settings (its original
+    is left alone). Returns how many were removed.
+    """
+    folder, filename = os.path.split(relative_path)
+    prefix = glob.escape(os.path.join(upload_folder, folder, 'variants', os.path.splitext(filename)[0]))
+    removed = 0
+    for size in VARIANT_SIZES:
+        for pattern in (f'{prefix}_{size}.*', f'{prefix}_{size}-*.*'):
+            for full_path in glob.glob(pattern):
+                os.remove(full_path)
+                removed += 1
+    return removed
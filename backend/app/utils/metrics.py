@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Prometheus Metrics
+Scrapeable /metrics endpoint for request, MongoDB, cache and payment gateway latency.
+"""
+
+import os
+import time
+import hmac
+import logging
+
+from flask import request, g, Response, abort
+from pymongo import monitoring
+
+try:
+    from prometheus_client import (Counter, Histogram, Gauge, CollectorRegistry,
+                                   generate_latest, CONTENT_TYPE_LATEST, REGISTRY, multiprocess)
+except ImportError:  # Metrics are disabled without prometheus_client
+    Counter = Histogram = Gauge = None
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) sized for web requests, DB calls and gateway round trips
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+GATEWAY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0)
+
+if Counter is not None:
+    HTTP_REQUESTS = Counter('nms_http_requests_total', 'HTTP requests handled',
+                            ['blueprint', 'endpoint', 'method', 'status'])
+    HTTP_LATENCY = Histogram('nms_http_request_duration_seconds', 'HTTP request latency',
+                             ['blueprint', 'endpoint', 'method'], buckets=REQUEST_BUCKETS)
+    HTTP_IN_PROGRESS = Gauge('nms_http_requests_in_progress', 'Requests currently being handled',
+                             ['blueprint'], multiprocess_mode='livesum')
+    MONGO_LATENCY = Histogram('nms_mongo_command_duration_seconds', 'MongoDB command latency',
+                              ['collection', 'command'], buckets=MONGO_BUCKETS)
+    MONGO_FAILURES = Counter('nms_mongo_command_failures_total', 'Failed MongoDB commands',
+                             ['collection', 'command'])
+    CACHE_LOOKUPS = Counter('nms_cache_lookups_total', 'Cache lookups by result',
+                            ['cache', 'result'])
+    GATEWAY_LATENCY = Histogram('nms_payment_gateway_request_duration_seconds',
+                                'Payment gateway HTTP call latency',
+                                ['gateway', 'outcome'], buckets=GATEWAY_BUCKETS)
+    # Set by each worker's breakers on state changes; live* drops the files of exited workers
+    GATEWAY_CIRCUIT_OPEN = Gauge('nms_payment_gateway_circuit_open',
+                                 'Payment gateway circuit breaker open (1) or not (0)',
+                                 ['gateway'], multiprocess_mode='livemax')
+
+class MetricsCommandListener(monitoring.CommandListener):
+    """Observes MongoDB command latency per collection."""
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        _pending_collections[event.request_id] = collection if isinstance(collection, str) else '-'
+
+    def succeeded(self, event):
+        collection = _pending_collections.pop(event.request_id, '-')
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = _pending_collections.pop(event.request_id, '-')
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(collection, event.command_name).inc()
+
+# pymongo request_id -> collection between started and succeeded/failed
+_pending_collections = {}
+
+class PrometheusMetrics:
+    """
+    Prometheus instrumentation.
+
+    Under gunicorn set ``PROMETHEUS_MULTIPROC_DIR`` (gunicorn.conf.py does)
+    so every worker writes its samples to shared files and ``/metrics``
+    aggregates them, whichever worker answers the scrape.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.auth_token = None
+        self.public = False
+        self._listener = None
+
+    def init_app(self, app):
+        """Register request hooks, the Mongo listener and the /metrics route."""
+        self.enabled = app.config.get('METRICS_ENABLED', True) and Counter is not None
+        if not self.enabled:
+            if Counter is None:
+                logger.warning("prometheus_client not installed, /metrics disabled")
+            return
+        self.auth_token = app.config.get('METRICS_AUTH_TOKEN') or None
+        self.public = app.config.get('METRICS_PUBLIC', False)
+        if not self.auth_token and not self.public:
+            logger.warning("METRICS_AUTH_TOKEN not set, /metrics will answer 404 (set METRICS_PUBLIC=true to open it)")
+
+        if self._listener is None:
+            self._listener = MetricsCommandListener()
+            monitoring.register(self._listener)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.metrics_view)
+
+    def metrics_view(self):
+        """Render all metrics in the Prometheus text format."""
+        if self.auth_token:
+            supplied = request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+            if not hmac.compare_digest(supplied, self.auth_token):
+                abort(401)
+        elif not self.public:
+            # Request and query timings aren't for the public internet
+            abort(404)
+
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+    # Request hooks
+
+    def _before_request(self):
+        if request.endpoint == 'metrics':
+            return
+        g._metrics_started = time.perf_counter()
+        g._metrics_blueprint = request.blueprint or 'app'
+        HTTP_IN_PROGRESS.labels(g._metrics_blueprint).inc()
+
+    def _after_request(self, response):
+        started = g.get('_metrics_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+        blueprint = g._metrics_blueprint
+        # Unmatched URLs share one label so 404 scans can't explode cardinality
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        HTTP_REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        return response
+
+    def _teardown_request(self, exc=None):
+        blueprint = g.pop('_metrics_blueprint', None)
+        if blueprint is not None:
+            HTTP_IN_PROGRESS.labels(blueprint).dec()
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache hit or miss (hit ratio = hits / all lookups)."""
+    if Counter is not None:
+        CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+def observe_gateway_call(gateway: str, elapsed_seconds: float, outcome: str):
+    """Record one payment gateway HTTP attempt (outcome: ok, error or http_5xx)."""
+    if Counter is not None:
+        GATEWAY_LATENCY.labels(gateway, outcome).observe(elapsed_seconds)
+
+def set_circuit_open(gateway: str, is_open: bool):
+    """Record a payment gateway circuit breaker opening or leaving the open state."""
+    if Gauge is not None:
+        GATEWAY_CIRCUIT_OPEN.labels(gateway).set(1 if is_open else 0)
+
+# Global metrics instance
+metrics = PrometheusMetrics()
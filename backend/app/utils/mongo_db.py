@@ -4,48 +4,303 @@
 MongoDB connection and database operation utilities.
 """
 
-from pymongo import MongoClient
+import os
+import logging
+import threading
+from datetime import datetime
+from pymongo import MongoClient, IndexModel, ReturnDocument, ASCENDING
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
 from flask import current_app
 from app.models.mongo_models import MongoUser, MongoProduct, MongoOrder, MongoCategory
 
+# Named projections for list views and exports: only the fields their templates
+# read. Models built from them are partial - unprojected fields read as their
+# defaults, and saving one only $sets the fields that were assigned.
+PROJECTIONS = {
+    'user_admin_row': ('username', 'email', 'full_name', 'phone', 'address', 'is_admin', 'is_sub_admin',
+                       'is_staff', 'is_active', 'profile_image', 'profile_image_variants', 'date_joined',
+                       'last_login'),
+    'customer_contact': ('full_name', 'email', 'phone'),
+    'product_card': ('name', 'name_nepali', 'description', 'price', 'image_url', 'image_variants', 'category', 'meat_type',
+                     'preparation_type', 'stock_quantity', 'unit', 'is_featured', 'is_available',
+                     'min_order_kg', 'freshness_hours'),
+    'product_admin_row': ('name', 'name_nepali', 'price', 'image_url', 'image_variants', 'image_pending',
+                          'category', 'meat_type', 'stock_quantity', 'is_featured', 'is_available', 'date_added'),
+    'order_list_row': ('order_number', 'user_id', 'status', 'payment_status', 'payment_method',
+                       'total_amount', 'order_date', 'phone_number', 'special_instructions',
+                       'items.product_id', 'items.product_name', 'items.quantity'),
+    'order_summary': ('order_number', 'status', 'total_amount', 'order_date'),
+    # items.product_id keeps one small field per item, so len(order.items) still works
+    'order_export_row': ('user_id', 'order_date', 'status', 'total_amount', 'delivery_address',
+                         'items.product_id'),
+    'order_insights_row': ('user_id', 'phone_number', 'order_date', 'delivery_date', 'status', 'total_amount',
+                           'delivery_address', 'payment_method', 'payment_status', 'notes',
+                           'special_instructions', 'items.product_id'),
+    'product_api': ('name', 'name_nepali', 'description', 'price', 'image_url', 'category', 'meat_type',
+                    'preparation_type', 'stock_quantity', 'unit', 'is_featured', 'is_available', 'last_updated'),
+    'product_stock': ('stock_quantity', 'is_available', 'unit', 'last_updated'),
+    'product_suggestion': ('name', 'name_nepali', 'category'),
+    'category_api': ('name', 'name_nepali', 'description', 'sort_order', 'is_active', 'last_updated')
+}
+_PROJECTION_DOCS = {view: dict.fromkeys(fields, 1) for view, fields in PROJECTIONS.items()}
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest
+}
+
+# Days a deleted product/category is remembered for delta sync clients
+TOMBSTONE_RETENTION_DAYS = 30
+
+# Index definitions for every collection. Depending on MONGO_INDEX_MODE they are
+# created at startup, in the background after a worker's first request, or only
+# by the scripts/manage_indexes.py migration step. Unique indexes are created at
+# startup in every mode: accounts and the webhook/image job dedup rely on them.
+INDEXES = {
+    'users': [
+        IndexModel('email', unique=True),
+        IndexModel('username', unique=True),
+        IndexModel('phone', unique=True)
+    ],
+    'products': [
+        IndexModel('name'),
+        IndexModel('category'),
+        IndexModel('meat_type'),
+        IndexModel('is_available'),
+        IndexModel('is_featured'),
+        # Delta sync (/products/api/changes) pages through edits in this order
+        IndexModel([('last_updated', ASCENDING), ('_id', ASCENDING)])
+    ],
+    'orders': [
+        IndexModel('order_number'),
+        IndexModel('user_id'),
+        IndexModel('status'),
+        IndexModel('order_date'),
+        IndexModel([('payment_status', 1), ('payment_method', 1), ('_id', 1)])
+    ],
+    'categories': [
+        IndexModel('name', unique=True),
+        IndexModel('sort_order'),
+        IndexModel('last_updated')
+    ],
+    'catalog_tombstones': [
+        # Deleted catalog items, kept as long as a delta sync token stays valid
+        IndexModel('deleted_at', expireAfterSeconds=TOMBSTONE_RETENTION_DAYS * 86400)
+    ],
+    'webhook_events': [
+        # Dedup key and claim order of the webhook ingestion queue
+        IndexModel([('gateway', ASCENDING), ('transaction_id', ASCENDING)], unique=True),
+        IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)])
+    ],
+    'image_jobs': [
+        # One variant job per document, claimed in next_attempt_at order
+        IndexModel([('kind', ASCENDING), ('target_id', ASCENDING)], unique=True),
+        IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)])
+    ]
+}
+INDEX_MODES = ('startup', 'background', 'migrate')
+
+# Counter bumped on every product/category edit; page caches key on it
+CATALOG_STATE_ID = 'catalog'
+
+# Read-only workloads that may be served by secondaries (MONGO_<WORKLOAD>_READ_PREFERENCE)
+READ_WORKLOADS = ('analytics', 'exports', 'reports')
+
+logger = logging.getLogger(__name__)
+
+def projection(view):
+    """Projection document for a named view (None fetches full documents)."""
+    if view is None:
+        return None
+    return _PROJECTION_DOCS[view]
+
+def object_id_list(ids):
+    """ObjectIds of the valid ids among strings/ObjectIds (invalid ones are skipped)."""
+    object_ids = []
+    for value in ids:
+        try:
+            object_ids.append(ObjectId(value))
+        except (InvalidId, TypeError):
+            continue
+    return object_ids
+
+def client_options(config):
+    """MongoClient keyword options from the MONGO_* pool/timeout/compression settings."""
+    options = {
+        'maxPoolSize': config.get('MONGO_MAX_POOL_SIZE'),
+        'minPoolSize': config.get('MONGO_MIN_POOL_SIZE'),
+        'maxIdleTimeMS': config.get('MONGO_MAX_IDLE_TIME_MS'),
+        'waitQueueTimeoutMS': config.get('MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+        'serverSelectionTimeoutMS': config.get('MONGO_SERVER_SELECTION_TIMEOUT_MS'),
+        'connectTimeoutMS': config.get('MONGO_CONNECT_TIMEOUT_MS'),
+        'socketTimeoutMS': config.get('MONGO_SOCKET_TIMEOUT_MS'),
+        'compressors': config.get('MONGO_COMPRESSORS'),
+        'appname': config.get('MONGO_APP_NAME')
+    }
+    # Unset options keep the driver (or connection string) defaults
+    return {name: value for name, value in options.items() if value not in (None, '')}
+
+def read_preference(mode, max_staleness=0):
+    """
+    Read preference for a mode name. Secondary reads are bounded by
+    max_staleness seconds (at least 90): lagging secondaries are skipped.
+    """
+    mode = mode or 'primary'
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference '{mode}' (expected one of: {', '.join(READ_PREFERENCES)})")
+    if mode == 'primary':
+        return Primary()
+    if 0 < max_staleness < 90:
+        raise ValueError('MONGO_MAX_STALENESS_SECONDS must be at least 90 (or 0 for no limit)')
+    return READ_PREFERENCES[mode](max_staleness=max_staleness or -1)
+
 class MongoDB:
     """MongoDB database connection and operations."""
     
     def __init__(self):
-        self.client = None
-        self.db = None
+        self.uri = None
+        self.db_name = None
+        self.client_options = {}
+        self.read_preferences = {workload: Primary() for workload in READ_WORKLOADS}
+        
+        self._client = None
+        self._db = None
+        self._readers = {}
+        self._pid = None
+        self._lock = threading.Lock()
+        self._index_pid = None
     
     def init_app(self, app):
         """Initialize MongoDB with Flask app."""
-        self.client = MongoClient(app.config['MONGO_URI'])
-        self.db = self.client[app.config['MONGO_DBNAME']]
-        
-        # Create indexes for better performance
-        self._create_indexes()
-    
-    def _create_indexes(self):
-        """Create database indexes for better performance."""
-        # User indexes
-        self.db.users.create_index('email', unique=True)
-        self.db.users.create_index('username', unique=True)
-        self.db.users.create_index('phone', unique=True)  # Add phone index
+        self.close()
+        self.uri = app.config['MONGO_URI']
+        self.db_name = app.config['MONGO_DBNAME']
+        self.client_options = client_options(app.config)
         
-        # Product indexes
-        self.db.products.create_index('name')
-        self.db.products.create_index('category')
-        self.db.products.create_index('meat_type')
-        self.db.products.create_index('is_available')
-        self.db.products.create_index('is_featured')
-        
-        # Order indexes
-        self.db.orders.create_index('user_id')
-        self.db.orders.create_index('status')
-        self.db.orders.create_index('order_date')
-        
-        # Category indexes
-        self.db.categories.create_index('name', unique=True)
-        self.db.categories.create_index('sort_order')
+        max_staleness = int(app.config.get('MONGO_MAX_STALENESS_SECONDS') or 0)
+        self.read_preferences = {
+            workload: read_preference(app.config.get(f'MONGO_{workload.upper()}_READ_PREFERENCE'), max_staleness)
+            for workload in READ_WORKLOADS
+        }
+    
+    def init_indexes(self, app):
+        """Create indexes as MONGO_INDEX_MODE says (after init_app, once the app is set up)."""
+        mode = app.config.get('MONGO_INDEX_MODE') or 'startup'
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown MONGO_INDEX_MODE '{mode}' (expected one of: {', '.join(INDEX_MODES)})")
+        if mode == 'startup':
+            self.ensure_indexes()
+            return
+        # Duplicate key errors are what keep accounts and queued jobs unique
+        self.ensure_indexes(unique_only=True)
+        if mode == 'background':
+            # Started per serving process, so it never runs in a preloading master
+            app.before_request(self._ensure_indexes_in_background)
+        # 'migrate': scripts/manage_indexes.py creates the rest during deployment
+    
+    # Connection lifecycle - MongoClient isn't fork-safe, so each process
+    # (every gunicorn worker, also with --preload) lazily opens its own
+    
+    @property
+    def client(self):
+        """MongoClient of the current process (None before init_app)."""
+        if self._pid != os.getpid():
+            self._connect()
+        return self._client
+    
+    @property
+    def db(self):
+        """Application database of the current process."""
+        if self._pid != os.getpid():
+            self._connect()
+        return self._db
+    
+    def reader(self, workload=None):
+        """
+        Database for a read-only workload ('analytics', 'exports' or 'reports'),
+        reading with that workload's read preference; None is the primary db.
+        """
+        if self._pid != os.getpid():
+            self._connect()
+        if workload is None:
+            return self._db
+        return self._readers.get(workload)
+    
+    def _connect(self):
+        if self.uri is None:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A client inherited across fork is dropped, never used or closed here
+            self._client = MongoClient(self.uri, **self.client_options)
+            self._db = self._client[self.db_name]
+            self._readers = {workload: self._client.get_database(self.db_name, read_preference=preference)
+                             for workload, preference in self.read_preferences.items()}
+            self._pid = os.getpid()
+            logger.info(f"MongoDB client created in process {self._pid} "
+                        f"(maxPoolSize={self.client_options.get('maxPoolSize', 100)})")
+    
+    def reset_after_fork(self):
+        """Forget the parent's client in a forked child (gunicorn post_fork hook)."""
+        self._lock = threading.Lock()
+        self._client = self._db = None
+        self._readers = {}
+        self._pid = None
+    
+    def close(self):
+        """Close this process's client (gunicorn pre_fork/worker_exit); it reopens on next use."""
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = self._db = None
+            self._readers = {}
+            self._pid = None
+    
+    def ensure_indexes(self, collections=None, unique_only=False):
+        """
+        Create the INDEXES that don't exist yet, one createIndexes round trip
+        per collection. Returns the declared index names per collection.
+        """
+        created = {}
+        for name, indexes in INDEXES.items():
+            if collections is not None and name not in collections:
+                continue
+            if unique_only:
+                indexes = [index for index in indexes if index.document.get('unique')]
+            if indexes:
+                created[name] = self.db[name].create_indexes(indexes)
+        return created
+    
+    def _ensure_indexes_in_background(self):
+        if self._index_pid == os.getpid():
+            return
+        self._index_pid = os.getpid()
+        threading.Thread(target=self._build_indexes, name='index-builder', daemon=True).start()
+    
+    def _build_indexes(self):
+        try:
+            self.ensure_indexes()
+            logger.info(f"Indexes ensured in background (process {os.getpid()})")
+        except Exception as e:
+            logger.error(f"Background index build failed: {e}")
+    
+    def _save_document(self, collection, document):
+        """Insert a new model, or $set only the fields changed since it was loaded."""
+        if document._id:
+            changes = document.get_changes()
+            if changes:
+                collection.update_one({'_id': document._id}, {'$set': changes})
+        else:
+            result = collection.insert_one(document.to_dict())
+            document._id = result.inserted_id
+        document.mark_clean()
+        return document
     
     # User operations
     def find_user_by_id(self, user_id):
@@ -80,22 +335,11 @@ class MongoDB:
     
     def save_user(self, user):
         """Save or update user."""
-        user_dict = user.to_dict()
-        if user._id:
-            # Update existing user
-            self.db.users.update_one(
-                {'_id': user._id},
-                {'$set': user_dict}
-            )
-        else:
-            # Create new user
-            result = self.db.users.insert_one(user_dict)
-            user._id = result.inserted_id
-        return user
-    
-    def get_all_users(self):
-        """Get all users."""
-        users_data = self.db.users.find()
+        return self._save_document(self.db.users, user)
+    
+    def get_all_users(self, view=None, workload=None):
+        """Get all users (optionally as partial models for a named projection)."""
+        users_data = self.reader(workload).users.find({}, projection(view))
         return [MongoUser(user_data) for user_data in users_data]
     
     # Product operations
@@ -109,8 +353,16 @@ class MongoDB:
         except:
             return None
     
-    def get_all_products(self, category=None, meat_type=None, available_only=True):
-        """Get all products with optional filtering."""
+    def find_products_by_ids(self, product_ids, view=None):
+        """Many products in one $in query, keyed by string id (unknown or invalid ids are left out)."""
+        object_ids = object_id_list(product_ids)
+        if not object_ids:
+            return {}
+        products_data = self.db.products.find({'_id': {'$in': object_ids}}, projection(view))
+        return {str(product_data['_id']): MongoProduct(product_data) for product_data in products_data}
+    
+    def get_all_products(self, category=None, meat_type=None, available_only=True, view=None, limit=0):
+        """Get all products with optional filtering, named projection and limit (0 = all)."""
         query = {}
         if category:
             query['category'] = category
@@ -119,32 +371,50 @@ class MongoDB:
         if available_only:
             query['is_available'] = True
         
-        products_data = self.db.products.find(query).sort('name', 1)
+        products_data = self.db.products.find(query, projection(view)).sort('name', 1).limit(limit)
         return [MongoProduct(product_data) for product_data in products_data]
     
-    def get_featured_products(self):
-        """Get featured products."""
+    def get_featured_products(self, view=None, limit=0):
+        """Get featured products (limit 0 = all)."""
         products_data = self.db.products.find({
             'is_featured': True,
             'is_available': True
-        }).sort('name', 1)
+        }, projection(view)).sort('name', 1).limit(limit)
         return [MongoProduct(product_data) for product_data in products_data]
     
     def save_product(self, product):
         """Save or update product."""
-        product_dict = product.to_dict()
-        if product._id:
-            # Update existing product
+        result = self._save_document(self.db.products, product)
+        self.bump_catalog_version()
+        return result
+
+    def reserve_stock(self, order_items):
+        """
+        Atomically take order item quantities out of stock.
+        Each decrement only matches while enough stock is left, so concurrent
+        checkouts can't sell the same kilos twice. Returns None when every item
+        is reserved, otherwise the item that ran out (earlier items are released).
+        """
+        reserved = []
+        for item in order_items:
+            result = self.db.products.update_one(
+                {'_id': ObjectId(item['product_id']), 'stock_quantity': {'$gte': item['quantity']}},
+                {'$inc': {'stock_quantity': -item['quantity']}, '$set': {'last_updated': datetime.utcnow()}}
+            )
+            if result.modified_count == 0:
+                self.release_stock(reserved)
+                return item
+            reserved.append(item)
+        return None
+
+    def release_stock(self, order_items):
+        """Put reserved quantities back (order could not be saved)."""
+        for item in order_items:
             self.db.products.update_one(
-                {'_id': product._id},
-                {'$set': product_dict}
+                {'_id': ObjectId(item['product_id'])},
+                {'$inc': {'stock_quantity': item['quantity']}, '$set': {'last_updated': datetime.utcnow()}}
             )
-        else:
-            # Create new product
-            result = self.db.products.insert_one(product_dict)
-            product._id = result.inserted_id
-        return product
-    
+
     # Order operations
     def find_order_by_id(self, order_id):
         """Find order by ID."""
@@ -163,29 +433,60 @@ class MongoDB:
         orders_data = self.db.orders.find({'user_id': user_id}).sort('order_date', -1)
         return [MongoOrder(order_data) for order_data in orders_data]
     
-    def get_all_orders(self, status=None):
-        """Get all orders with optional status filtering."""
+    def get_all_orders(self, status=None, view=None):
+        """Get all orders, newest first, with optional status filtering and named projection."""
         query = {}
         if status:
             query['status'] = status
         
-        orders_data = self.db.orders.find(query).sort('order_date', -1)
+        orders_data = self.db.orders.find(query, projection(view)).sort('order_date', -1)
         return [MongoOrder(order_data) for order_data in orders_data]
     
+    def update_order_payment_status(self, order_number, payment_status, transaction_id=None, payment_method=None):
+        """
+        Idempotently update an order's payment status.
+        
+        Orders that are already paid are never modified again, so replayed or
+        late gateway callbacks cannot downgrade or rewrite a completed payment.
+        
+        Returns:
+            bool: True if the order exists (updated or already paid), False otherwise
+        """
+        result = self.db.orders.update_one(
+            {'order_number': order_number, 'payment_status': {'$ne': 'paid'}},
+            {
+                '$set': {
+                    'payment_status': payment_status,
+                    'transaction_id': transaction_id,
+                    'payment_method': payment_method,
+                    'payment_verified_at': datetime.utcnow() if payment_status == 'paid' else None
+                }
+            }
+        )
+        if result.matched_count:
+            return True
+        
+        # Already paid (duplicate callback) counts as handled
+        return self.db.orders.count_documents({'order_number': order_number}, limit=1) > 0
+    
+    def set_order_payment_reference(self, order_number, payment_method, reference):
+        """
+        Remember the gateway reference (Khalti pidx / eSewa refId) for an unpaid order.
+        
+        The payment reconciliation job uses it to look the payment up later
+        if the callback or webhook never arrives.
+        """
+        if not order_number or not reference:
+            return False
+        result = self.db.orders.update_one(
+            {'order_number': order_number, 'payment_status': {'$ne': 'paid'}},
+            {'$set': {'payment_method': payment_method, 'payment_reference': reference}}
+        )
+        return result.matched_count > 0
+    
     def save_order(self, order):
         """Save or update order."""
-        order_dict = order.to_dict()
-        if order._id:
-            # Update existing order
-            self.db.orders.update_one(
-                {'_id': order._id},
-                {'$set': order_dict}
-            )
-        else:
-            # Create new order
-            result = self.db.orders.insert_one(order_dict)
-            order._id = result.inserted_id
-        return order
+        return self._save_document(self.db.orders, order)
     
     # Category operations
     def get_all_categories(self):
@@ -210,18 +511,52 @@ class MongoDB:
     
     def save_category(self, category):
         """Save or update category."""
-        category_dict = category.to_dict()
-        if category._id:
-            # Update existing category
-            self.db.categories.update_one(
-                {'_id': category._id},
-                {'$set': category_dict}
-            )
-        else:
-            # Create new category
-            result = self.db.categories.insert_one(category_dict)
-            category._id = result.inserted_id
-        return category
+        result = self._save_document(self.db.categories, category)
+        self.bump_catalog_version()
+        return result
+    
+    def record_catalog_deletion(self, kind, item_id):
+        """Remember a deleted product/category ('products' or 'categories') for delta sync."""
+        self.db.catalog_tombstones.insert_one({'kind': kind, 'item_id': item_id, 'deleted_at': datetime.utcnow()})
+    
+    # Catalog version (invalidates cached pages in every worker)
+    def catalog_version(self):
+        """Current catalog version (0 before the first product/category edit)."""
+        state = self.db.app_state.find_one({'_id': CATALOG_STATE_ID}, {'version': 1})
+        return state['version'] if state else 0
+    
+    def bump_catalog_version(self):
+        """Call after any product or category write that isn't done through save_*()."""
+        self.db.app_state.update_one({'_id': CATALOG_STATE_ID},
+                                     {'$inc': {'version': 1}, '$set': {'updated_at': datetime.utcnow()}},
+                                     upsert=True)
+    
+    # Upload blob references (content-addressed uploads shared by several documents)
+    def add_blob_reference(self, path, size):
+        """Count one more document using the stored upload at `path`."""
+        now = datetime.utcnow()
+        self.db.upload_blobs.update_one({'_id': path},
+                                        {'$inc': {'refs': 1},
+                                         '$set': {'last_referenced': now},
+                                         '$setOnInsert': {'size': size, 'created_at': now}},
+                                        upsert=True)
+    
+    def release_blob_reference(self, path):
+        """
+        Count one document less using `path`. Returns True when nothing
+        references it any more and the caller should remove the file.
+        """
+        blob = self.db.upload_blobs.find_one_and_update({'_id': path}, {'$inc': {'refs': -1}},
+                                                        return_document=ReturnDocument.AFTER)
+        if blob is None:
+            # Stored before reference counting (or counted elsewhere): the only reference was this one
+            return True
+        # Conditional delete: a concurrent upload of the same bytes may have counted itself meanwhile
+        return blob['refs'] <= 0 and self.db.upload_blobs.delete_one({'_id': path, 'refs': {'$lte': 0}}).deleted_count == 1
+    
+    def is_blob_referenced(self, path):
+        """Whether any document counts a reference to the stored upload at `path`."""
+        return self.db.upload_blobs.count_documents({'_id': path, 'refs': {'$gt': 0}}, limit=1) > 0
 
 # Global MongoDB instance
 mongo_db = MongoDB()
\ No newline at end of file
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Page Cache
+Rendered HTML of public catalog pages (the homepage) for anonymous visitors,
+keyed by page, catalog version and language. Product/category edits bump the
+catalog version in MongoDB, so every worker stops serving the old HTML on its
+next lookup; PAGE_CACHE_SECONDS bounds staleness of stock levels in between.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, session, make_response
+from flask_login import current_user
+
+from app.utils.mongo_db import mongo_db
+from app.utils.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Languages a page may be rendered in (Accept-Language best match)
+SUPPORTED_LANGUAGES = ('en', 'ne')
+
+class PageCache:
+    """
+    Per-process LRU of rendered pages.
+
+    Only GET requests from visitors who are not logged in and have no pending
+    flash messages are served from (and stored in) the cache, since those are
+    the only requests whose HTML doesn't depend on the session.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.ttl_seconds = 60
+        self.max_entries = 64
+
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()  # key -> (stored_at, html)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.ttl_seconds = int(app.config.get('PAGE_CACHE_SECONDS', self.ttl_seconds))
+        self.max_entries = int(app.config.get('PAGE_CACHE_MAX_ENTRIES', self.max_entries))
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def cached(self, name: str):
+        """View decorator: serve the rendered HTML of `name` from the cache when allowed."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self._cacheable():
+                    return view(*args, **kwargs)
+
+                key = (name, mongo_db.catalog_version(), self._language())
+                html = self._get(key)
+                record_cache_lookup(f'page:{name}', html is not None)
+                if html is not None:
+                    response = make_response(html)
+                    response.headers['X-Page-Cache'] = 'HIT'
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code == 200 and response.mimetype == 'text/html':
+                        self._set(key, response.get_data(as_text=True))
+                    response.headers['X-Page-Cache'] = 'MISS'
+                response.vary.add('Accept-Language')
+                return response
+            return wrapper
+        return decorator
+
+    def _cacheable(self) -> bool:
+        return (self.enabled and request.method == 'GET' and not request.args
+                and not current_user.is_authenticated and '_flashes' not in session)
+
+    def _language(self) -> str:
+        return request.accept_languages.best_match(SUPPORTED_LANGUAGES, SUPPORTED_LANGUAGES[0])
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                return None
+            stored_at, html = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._pages[key]
+                return None
+            self._pages.move_to_end(key)
+            return html
+
+    def _set(self, key, html: str):
+        with self._lock:
+            # Pages of older catalog versions can never be hit again
+            for stale in [k for k in self._pages if k[0] == key[0] and k[1] != key[1]]:
+                del self._pages[stale]
+            self._pages[key] = (time.monotonic(), html)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+# Global page cache instance
+page_cache = PageCache()
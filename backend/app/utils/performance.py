@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Request Performance Monitoring
+Per-request Mongo query count, DB time, template time and total time by endpoint.
+"""
+
+import time
+import logging
+import threading
+import contextvars
+from collections import deque, Counter
+from typing import Dict, Any, List, Optional
+
+from flask import request, before_render_template, template_rendered
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Stats for the request being handled in the current thread/context
+_current_request = contextvars.ContextVar('perf_request', default=None)
+
+class RequestStats:
+    """Timings collected while a single request is handled."""
+
+    __slots__ = ('started', 'query_count', 'db_time_ms', 'template_time_ms',
+                 'commands', '_pending', '_template_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        self.template_time_ms = 0.0
+        self.commands = Counter()  # (command, collection) -> count
+        self._pending = {}         # pymongo request_id -> (command, collection)
+        self._template_started = []
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attributes every Mongo command to the request that issued it."""
+
+    def started(self, event):
+        stats = _current_request.get()
+        if stats is not None:
+            collection = event.command.get(event.command_name)
+            if not isinstance(collection, str):
+                collection = event.database_name
+            stats._pending[event.request_id] = (event.command_name, collection)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    @staticmethod
+    def _finish(event):
+        stats = _current_request.get()
+        if stats is None:
+            return
+        command = stats._pending.pop(event.request_id, (event.command_name, '?'))
+        stats.query_count += 1
+        stats.db_time_ms += event.duration_micros / 1000.0
+        stats.commands[command] += 1
+
+class EndpointStats:
+    """Rolling samples for one endpoint."""
+
+    def __init__(self, window_size: int):
+        self.requests = 0
+        self.budget_exceeded = 0
+        self.total_ms = deque(maxlen=window_size)
+        self.db_ms = deque(maxlen=window_size)
+        self.template_ms = deque(maxlen=window_size)
+        self.queries = deque(maxlen=window_size)
+
+    def summary(self) -> Dict[str, Any]:
+        total = sorted(self.total_ms)
+        queries = list(self.queries)
+        return {
+            'requests': self.requests,
+            'p50_ms': percentile(total, 50),
+            'p95_ms': percentile(total, 95),
+            'p99_ms': percentile(total, 99),
+            'avg_db_ms': round(sum(self.db_ms) / len(self.db_ms), 2) if self.db_ms else 0.0,
+            'avg_template_ms': round(sum(self.template_ms) / len(self.template_ms), 2) if self.template_ms else 0.0,
+            'avg_queries': round(sum(queries) / len(queries), 1) if queries else 0.0,
+            'max_queries': max(queries) if queries else 0,
+            'budget_exceeded': self.budget_exceeded
+        }
+
+class PerformanceMonitor:
+    """
+    Request instrumentation middleware.
+
+    Registers a pymongo ``CommandListener`` (so it must be initialized before
+    the MongoClient is created) and Jinja render signals, then aggregates per
+    endpoint. Requests that issue more Mongo commands than ``PERF_QUERY_BUDGET``
+    are logged with their most repeated commands, which is how N+1 patterns
+    such as loading ``MongoOrder.user`` per row show up.
+
+    Aggregates are kept in memory per worker process.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.query_budget = 20
+        self.slow_request_ms = 1000.0
+        self.window_size = 500
+        self.server_timing = True
+
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._violations = deque(maxlen=50)
+        self._listener = None
+        self.started_at = time.time()
+
+    def init_app(self, app):
+        """Install request hooks, template signals and the Mongo command listener."""
+        self.enabled = app.config.get('PERF_MONITORING_ENABLED', True)
+        if not self.enabled:
+            return
+        self.query_budget = int(app.config.get('PERF_QUERY_BUDGET', self.query_budget))
+        self.slow_request_ms = float(app.config.get('PERF_SLOW_REQUEST_MS', self.slow_request_ms))
+        self.window_size = int(app.config.get('PERF_WINDOW_SIZE', self.window_size))
+        self.server_timing = app.config.get('PERF_SERVER_TIMING', self.server_timing)
+
+        if self._listener is None:
+            self._listener = MongoCommandListener()
+            monitoring.register(self._listener)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+
+    # Request hooks
+
+    def _before_request(self):
+        _current_request.set(RequestStats())
+
+    def _after_request(self, response):
+        stats = _current_request.get()
+        if stats is None or request.endpoint == 'static':
+            return response
+
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        endpoint = request.endpoint or 'unknown'
+        over_budget = stats.query_count > self.query_budget
+        self._record(endpoint, stats, total_ms, over_budget)
+
+        if over_budget or total_ms > self.slow_request_ms:
+            top_commands = ', '.join(f'{name} {collection} x{count}'
+                                     for (name, collection), count in stats.commands.most_common(3))
+            logger.warning(f"{'Query budget exceeded' if over_budget else 'Slow request'}: "
+                           f"{request.method} {request.path} ({endpoint}) {stats.query_count} queries, "
+                           f"db {stats.db_time_ms:.1f}ms, total {total_ms:.1f}ms [{top_commands}]")
+
+        if self.server_timing:
+            response.headers.add('Server-Timing',
+                                 f'db;dur={stats.db_time_ms:.1f};desc="{stats.query_count} queries", '
+                                 f'tpl;dur={stats.template_time_ms:.1f}, total;dur={total_ms:.1f}')
+        return response
+
+    def _teardown_request(self, exc=None):
+        _current_request.set(None)
+
+    # Template signals
+
+    def _template_started(self, sender, template, context, **extra):
+        stats = _current_request.get()
+        if stats is not None:
+            stats._template_started.append(time.perf_counter())
+
+    def _template_finished(self, sender, template, context, **extra):
+        stats = _current_request.get()
+        if stats is not None and stats._template_started:
+            stats.template_time_ms += (time.perf_counter() - stats._template_started.pop()) * 1000
+
+    # Aggregates
+
+    def _record(self, endpoint: str, stats: RequestStats, total_ms: float, over_budget: bool):
+        with self._lock:
+            endpoint_stats = self._endpoints.get(endpoint)
+            if endpoint_stats is None:
+                endpoint_stats = self._endpoints[endpoint] = EndpointStats(self.window_size)
+            endpoint_stats.requests += 1
+            endpoint_stats.total_ms.append(total_ms)
+            endpoint_stats.db_ms.append(stats.db_time_ms)
+            endpoint_stats.template_ms.append(stats.template_time_ms)
+            endpoint_stats.queries.append(stats.query_count)
+            if over_budget:
+                endpoint_stats.budget_exceeded += 1
+                self._violations.appendleft({
+                    'endpoint': endpoint,
+                    'path': request.full_path.rstrip('?'),
+                    'queries': stats.query_count,
+                    'db_ms': round(stats.db_time_ms, 1),
+                    'total_ms': round(total_ms, 1),
+                    'top_commands': [
+                        {'command': name, 'collection': collection, 'count': count}
+                        for (name, collection), count in stats.commands.most_common(5)
+                    ],
+                    'at': time.time()
+                })
+
+    def get_summary(self, sort_by: str = 'p95_ms') -> List[Dict[str, Any]]:
+        """Per-endpoint aggregates, slowest first."""
+        with self._lock:
+            rows = [dict(endpoint=name, **stats.summary()) for name, stats in self._endpoints.items()]
+        return sorted(rows, key=lambda row: row.get(sort_by, 0), reverse=True)
+
+    def get_violations(self) -> List[Dict[str, Any]]:
+        """Most recent requests that exceeded the query budget."""
+        with self._lock:
+            return list(self._violations)
+
+    def reset(self):
+        """Clear all collected aggregates."""
+        with self._lock:
+            self._endpoints.clear()
+            self._violations.clear()
+            self.started_at = time.time()
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, if any."""
+    return _current_request.get()
+
+def percentile(samples, percent: float) -> float:
+    """Nearest-rank percentile of `samples` (sorting an already sorted list is linear)."""
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = max(0, min(len(samples) - 1, int(round(percent / 100.0 * len(samples))) - 1))
+    return round(samples[index], 2)
+
+# Global performance monitor instance
+perf_monitor = PerformanceMonitor()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Raw BSON Fast Path
+RawBSONDocument cursors and a fast JSON encoder for exports and JSON APIs.
+"""
+
+import json
+import datetime
+from decimal import Decimal
+
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+from flask import Response
+
+from app.utils.mongo_db import mongo_db, projection
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument, tz_aware=False)
+
+def raw_collection(name: str, workload: str = None):
+    """
+    Collection handle whose cursors yield RawBSONDocument.
+    Documents stay as the wire bytes and only decode when a field is read,
+    so rows go from the socket to the serializer without dict/model copies.
+    A workload ('analytics', 'exports', 'reports') reads with its read preference.
+    """
+    return mongo_db.reader(workload).get_collection(name, codec_options=RAW_CODEC_OPTIONS)
+
+def find_raw(collection: str, query: dict, view: str = None, sort=None, limit: int = 0, workload: str = None):
+    """Raw cursor over a collection with a named projection (see mongo_db.PROJECTIONS)."""
+    cursor = raw_collection(collection, workload).find(query, projection(view))
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+def lookup_customers(user_ids, workload: str = None) -> dict:
+    """Customer contact documents for many orders in one query (user_id string -> document)."""
+    object_ids = set()
+    for user_id in user_ids:
+        try:
+            object_ids.add(ObjectId(user_id))
+        except Exception:
+            continue  # Guest/legacy orders without a valid user id
+    if not object_ids:
+        return {}
+    return {str(user['_id']): user
+            for user in raw_collection('users', workload).find({'_id': {'$in': list(object_ids)}},
+                                                               projection('customer_contact'))}
+
+def _default(value):
+    """Encode the BSON types json/orjson don't know."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, RawBSONDocument):
+        return dict(value.items())
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(data) -> bytes:
+    """
+    Serialize API data (ObjectId, datetime and Decimal128 included) to JSON bytes.
+    Keys are sorted like Flask's jsonify, so responses keep the same shape.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    return json.dumps(data, default=_default, ensure_ascii=False, sort_keys=True,
+                      separators=(',', ':')).encode('utf-8')
+
+def json_response(data, status: int = 200) -> Response:
+    """Flask response for dumps(data)."""
+    return Response(dumps(data), status=status, mimetype='application/json')
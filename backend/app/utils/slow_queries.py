@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Slow Query Log
+Records MongoDB commands over a latency threshold, with redacted query shapes
+and sampled explain plans, in the capped ``slow_queries`` collection.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from flask import request, has_request_context
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+
+from app.utils.mongo_db import mongo_db
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_COLLECTION = 'slow_queries'
+
+# Commands worth recording/explaining (writes are explained through their filter)
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'findAndModify', 'update', 'delete'}
+RECORDED_COMMANDS = EXPLAINABLE_COMMANDS | {'getMore', 'insert'}
+
+# Command fields that carry structure rather than user data
+_VERBATIM_KEYS = {'sort', 'projection', 'hint', 'fields', 'collection'}
+# Stages and operators whose values are aggregation expressions, where '$field' strings are paths
+_EXPRESSION_KEYS = {'$group', '$project', '$addFields', '$set', '$lookup', '$graphLookup', '$unwind',
+                    '$replaceRoot', '$replaceWith', '$sortByCount', '$bucket', '$bucketAuto', '$expr'}
+# Driver/session fields dropped from shapes and explain commands
+_DRIVER_KEYS = {'$db', 'lsid', '$clusterTime', 'txnNumber', '$readPreference', 'signature',
+                'readConcern', 'writeConcern', 'startTransaction', 'autocommit', 'comment'}
+
+# Set on threads that must not be recorded (the recorder's own writer)
+_local = threading.local()
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Hands slow commands to the recorder; everything else costs one dict operation."""
+
+    def __init__(self, recorder: 'SlowQueryRecorder'):
+        self.recorder = recorder
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name in RECORDED_COMMANDS and not getattr(_local, 'suppressed', False):
+            self._pending[event.request_id] = (event.command, event.database_name, _current_route())
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000.0
+        if duration_ms >= self.recorder.threshold_ms:
+            command, database_name, route = pending
+            self.recorder.submit(event.command_name, command, database_name, route, duration_ms)
+
+class SlowQueryRecorder:
+    """
+    Slow query recorder.
+
+    The listener only checks the duration on the request thread; shaping,
+    the optional ``explain('executionStats')`` and the insert happen on a
+    background thread. Explains are sampled: the first occurrence of each
+    shape in a process is always explained, later ones with
+    ``SLOW_QUERY_EXPLAIN_SAMPLE_RATE``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold_ms = 100.0
+        self.explain_sample_rate = 0.1
+        self.collection_size = 16 * 1024 * 1024
+        self.queue_size = 1000
+
+        self._listener = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._explained_shapes = set()
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def init_app(self, app):
+        """Register the command listener (before the MongoClient is created)."""
+        self.enabled = app.config.get('SLOW_QUERY_ENABLED', True)
+        if not self.enabled:
+            return
+        self.threshold_ms = float(app.config.get('SLOW_QUERY_MS', self.threshold_ms))
+        self.explain_sample_rate = float(app.config.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', self.explain_sample_rate))
+        self.collection_size = int(app.config.get('SLOW_QUERY_COLLECTION_BYTES', self.collection_size))
+
+        if self._listener is None:
+            self._listener = SlowQueryListener(self)
+            monitoring.register(self._listener)
+
+    def submit(self, command_name: str, command: Dict[str, Any], database_name: str,
+               route: Dict[str, Any], duration_ms: float):
+        """Queue a slow command for recording without blocking the caller."""
+        if command.get(command_name) == SLOW_QUERY_COLLECTION:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((command_name, command, database_name, route, duration_ms, datetime.utcnow()))
+        except queue.Full:
+            self.dropped += 1
+
+    # Reading
+
+    def get_shape_summary(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recorded slow queries grouped by shape, most total time first."""
+        pipeline = [
+            {'$sort': {'recorded_at': -1}},
+            {'$group': {
+                '_id': '$shape_hash',
+                'collection': {'$first': '$collection'},
+                'command': {'$first': '$command'},
+                'shape': {'$first': '$shape'},
+                'count': {'$sum': 1},
+                'total_ms': {'$sum': '$duration_ms'},
+                'avg_ms': {'$avg': '$duration_ms'},
+                'max_ms': {'$max': '$duration_ms'},
+                'last_seen': {'$max': '$recorded_at'},
+                'routes': {'$addToSet': '$route.endpoint'},
+                'collscan': {'$max': '$plan.collscan'},
+                'plans': {'$push': '$plan'}
+            }},
+            {'$sort': {'total_ms': -1}},
+            {'$limit': limit}
+        ]
+        groups = list(mongo_db.db[SLOW_QUERY_COLLECTION].aggregate(pipeline))
+        for group in groups:
+            # Latest explain for the shape, if one was sampled
+            group['plan'] = next((plan for plan in group.pop('plans') if plan), None)
+            group['avg_ms'] = round(group['avg_ms'], 1)
+            group['total_ms'] = round(group['total_ms'], 1)
+            group['routes'] = [route for route in group['routes'] if route]
+        return groups
+
+    # Background writer
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(target=self._worker_loop, name='slow-query-recorder', daemon=True)
+            self._thread.start()
+
+    def _worker_loop(self):
+        _local.suppressed = True  # Never record the recorder's own commands
+        self._ensure_collection()
+        while True:
+            item = self._queue.get()
+            try:
+                self._record(*item)
+            except Exception as e:
+                logger.error(f"Slow query recording failed: {e}")
+
+    def _ensure_collection(self):
+        try:
+            mongo_db.db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=self.collection_size)
+        except CollectionInvalid:
+            pass  # Already exists
+        except Exception as e:
+            logger.error(f"Could not create capped {SLOW_QUERY_COLLECTION} collection: {e}")
+
+    def _record(self, command_name, command, database_name, route, duration_ms, recorded_at):
+        collection = command.get('collection') if command_name == 'getMore' else command.get(command_name)
+        shape = redact_shape({key: value for key, value in command.items() if key not in _DRIVER_KEYS})
+        shape_json = json.dumps(shape, sort_keys=True, default=str)
+        shape_hash = hashlib.sha1(shape_json.encode('utf-8')).hexdigest()[:16]
+
+        plan = None
+        if command_name in EXPLAINABLE_COMMANDS and self._should_explain(shape_hash):
+            plan = self._explain(command, database_name)
+
+        mongo_db.db[SLOW_QUERY_COLLECTION].insert_one({
+            'recorded_at': recorded_at,
+            'duration_ms': round(duration_ms, 2),
+            'database': database_name,
+            'collection': collection if isinstance(collection, str) else None,
+            'command': command_name,
+            'shape': shape_json,
+            'shape_hash': shape_hash,
+            'route': route,
+            'plan': plan
+        })
+        logger.warning(f"Slow {command_name} on {collection} ({duration_ms:.1f}ms) "
+                       f"from {route.get('endpoint')}: {shape_json[:300]}")
+
+    def _should_explain(self, shape_hash: str) -> bool:
+        if shape_hash not in self._explained_shapes:
+            self._explained_shapes.add(shape_hash)
+            return True
+        return random.random() < self.explain_sample_rate
+
+    def _explain(self, command: Dict[str, Any], database_name: str) -> Optional[Dict[str, Any]]:
+        explain_command = {key: value for key, value in command.items() if key not in _DRIVER_KEYS}
+        try:
+            started = time.perf_counter()
+            result = mongo_db.client[database_name].command(
+                {'explain': explain_command, 'verbosity': 'executionStats'})
+            summary = summarize_plan(result)
+            summary['explain_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return summary
+        except Exception as e:  # An unexplainable command still gets recorded
+            return {'error': str(e)}
+
+def redact_shape(value: Any, key: str = None, expression: bool = False) -> Any:
+    """Replace literal values with '?' while keeping field names and operators."""
+    if key in _VERBATIM_KEYS:
+        return value
+    if isinstance(value, dict):
+        return {k: redact_shape(v, k, expression or k in _EXPRESSION_KEYS) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Pipelines and $or/$and branches keep their structure; value lists ($in, documents) collapse
+        if value and all(isinstance(item, dict) for item in value) and key not in ('documents', 'updates', 'deletes'):
+            return [redact_shape(item, expression=expression) for item in value]
+        if value and key in ('updates', 'deletes'):
+            return [redact_shape(value[0])]
+        # Expression arguments ($concat, $eq: ['$a', '$b']) keep their field paths
+        if value and expression:
+            return [redact_shape(item, key, expression) for item in value]
+        return '?'
+    if key in ('find', 'aggregate', 'count', 'distinct', 'findAndModify', 'update', 'delete', 'insert', 'getMore'):
+        return value if isinstance(value, str) else '?'
+    # Field paths ('$user_id') in aggregation expressions are structure; in a filter
+    # ({'name': {'$eq': '$x'}}) a '$' string is just data
+    if expression and isinstance(value, str) and value.startswith('$'):
+        return value
+    return '?'
+
+def summarize_plan(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Pull the winning plan stages and execution counters out of an explain result."""
+    query_planner = explain.get('queryPlanner', {})
+    stats = explain.get('executionStats', {})
+
+    # Aggregations nest the planner output under the first $cursor stage
+    if not query_planner and explain.get('stages'):
+        cursor_stage = explain['stages'][0].get('$cursor', {})
+        query_planner = cursor_stage.get('queryPlanner', {})
+        stats = cursor_stage.get('executionStats', {})
+
+    stages = []
+    node = query_planner.get('winningPlan', {})
+    node = node.get('queryPlan', node)  # Slot-based engine wraps the plan
+    while node:
+        stage = node.get('stage')
+        if stage:
+            stages.append(stage + (f"({node['indexName']})" if node.get('indexName') else ''))
+        node = node.get('inputStage') or (node.get('inputStages') or [None])[0]
+
+    return {
+        'stages': stages,
+        'collscan': any(stage.startswith('COLLSCAN') for stage in stages),
+        'docs_examined': stats.get('totalDocsExamined'),
+        'keys_examined': stats.get('totalKeysExamined'),
+        'returned': stats.get('nReturned'),
+        'execution_ms': stats.get('executionTimeMillis')
+    }
+
+def _current_route() -> Dict[str, Any]:
+    if has_request_context():
+        return {'endpoint': request.endpoint, 'method': request.method, 'path': request.path}
+    return {'endpoint': f'background:{threading.current_thread().name}', 'method': None, 'path': None}
+
+# Global slow query recorder
+slow_query_recorder = SlowQueryRecorder()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Startup Timing
+Wall-clock breakdown of application creation, logged once per app and kept
+in app.extensions['startup_timings'] for benchmarks/startup_time.py.
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """Times the named phases of an app factory."""
+
+    def __init__(self, imports_started: float = None):
+        self.started = time.perf_counter()
+        self.phases = []
+        if imports_started is not None:
+            # Module imports before the factory ran (flask, pymongo, app config...)
+            self.phases.append(('imports', (self.started - imports_started) * 1000))
+            self.started = imports_started
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as one phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - started) * 1000))
+
+    def finish(self, app) -> dict:
+        """Store and log the breakdown."""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        timings = {
+            'total_ms': round(total_ms, 1),
+            'phases': {name: round(duration_ms, 1) for name, duration_ms in self.phases}
+        }
+        app.extensions['startup_timings'] = timings
+        breakdown = ', '.join(f'{name} {duration_ms:.0f} ms' for name, duration_ms in self.phases)
+        logger.info(f"Startup took {total_ms:.0f} ms ({breakdown})")
+        return timings
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Upload Serving
+Responses for /uploads/<path>. Behind nginx (X-Accel-Redirect) or
+Apache/lighttpd (X-Sendfile) the app only checks the path and sets caching
+headers, and the web server sends the bytes with its own ETag and Range
+handling. Otherwise werkzeug's send_file does: ETag/Last-Modified, 304s,
+Range requests (206) and, under gunicorn, zero-copy sendfile() of whole files.
+"""
+
+import os
+import mimetypes
+from urllib.parse import quote
+
+from flask import current_app, send_from_directory, abort
+from werkzeug.security import safe_join
+
+from app.utils.file_utils import is_immutable_upload
+
+# UPLOAD_SERVE_MODE values
+SERVE_PYTHON = 'python'
+SERVE_X_ACCEL = 'x-accel-redirect'
+SERVE_X_SENDFILE = 'x-sendfile'
+SERVE_MODES = (SERVE_PYTHON, SERVE_X_ACCEL, SERVE_X_SENDFILE)
+
+# Uploads the browser can't tell from their extension
+EXTRA_MIME_TYPES = {'.svg': 'image/svg+xml', '.webp': 'image/webp'}
+
+def upload_cache_control(filename: str):
+    """(max_age, immutable) for an upload: content-addressed files are cached for good."""
+    if is_immutable_upload(filename):
+        return int(current_app.config.get('UPLOAD_CACHE_MAX_AGE', 31536000)), True
+    # Timestamp-named files can be replaced in place, so they are revalidated now and then
+    return int(current_app.config.get('UPLOAD_MUTABLE_MAX_AGE', 3600)), False
+
+def serve_upload(filename: str):
+    """Response serving one uploaded file, in the configured UPLOAD_SERVE_MODE."""
+    upload_folder = os.path.join(current_app.root_path, current_app.config.get('UPLOAD_FOLDER', 'uploads'))
+    mode = current_app.config.get('UPLOAD_SERVE_MODE') or SERVE_PYTHON
+    if mode not in SERVE_MODES:
+        raise ValueError(f"Unknown UPLOAD_SERVE_MODE '{mode}' (expected one of: {', '.join(SERVE_MODES)})")
+    max_age, immutable = upload_cache_control(filename)
+
+    if mode == SERVE_PYTHON:
+        response = send_from_directory(upload_folder, filename, max_age=max_age)
+        # werkzeug's type guess comes from the platform's mimetypes table, which may lack these
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in EXTRA_MIME_TYPES:
+            response.headers['Content-Type'] = EXTRA_MIME_TYPES[extension]
+    else:
+        full_path = safe_join(upload_folder, filename)
+        if full_path is None or not os.path.isfile(full_path):
+            abort(404)
+        response = current_app.response_class(mimetype=_mimetype(filename))
+        if mode == SERVE_X_ACCEL:
+            # An `internal` nginx location mapped onto the uploads folder
+            prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads/')
+            response.headers['X-Accel-Redirect'] = quote(prefix.rstrip('/') + '/' + filename)
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(full_path)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+def _mimetype(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    return EXTRA_MIME_TYPES.get(extension) or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
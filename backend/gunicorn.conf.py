@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+🍖 Nepal Meat Shop - Gunicorn Configuration
+Usage (from backend/): gunicorn -c gunicorn.conf.py
+"""
+
+import os
+import shutil
+import multiprocessing
+
+wsgi_app = 'mongo_app:create_mongo_app()'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+accesslog = '-'
+# Import the app once in the master; workers still open their own MongoClient
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+# Prometheus multiprocess mode: every worker writes metric samples to this
+# directory and /metrics aggregates them. It must be set before workers
+# import prometheus_client, so it is exported here in the master.
+prometheus_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                       os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                    'instance', 'prometheus'))
+
+def on_starting(server):
+    """Start from an empty metrics directory so stale worker files don't linger."""
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    """Drop live gauges of workers that exited."""
+    try:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+    except ImportError:
+        pass
+
+def pre_fork(server, worker):
+    """Close the master's MongoClient (preload) so no pooled sockets are shared with workers."""
+    from app.utils.mongo_db import mongo_db
+    mongo_db.close()
+
+def post_fork(server, worker):
+    """Drop any client state inherited from the master; the worker connects on first use."""
+    from app.utils.mongo_db import mongo_db
+    mongo_db.reset_after_fork()
+
+def worker_exit(server, worker):
+    """Stop the worker's image processes and close its connection pool on shutdown."""
+    from app.services.image_queue import image_queue
+    image_queue.stop(timeout=1.0)
+    from app.utils.mongo_db import mongo_db
+    mongo_db.close()
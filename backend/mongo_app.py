@@ -4,6 +4,9 @@
 Main Flask application setup with MongoDB integration.
 """
 
+import time
+_imports_started = time.perf_counter()
+
 import os
 import logging
 from datetime import datetime
@@ -16,12 +19,17 @@ load_dotenv('.env.mongo')
 
 from app.config.mongo_settings import mongo_config
 from app.utils.mongo_db import mongo_db
+from app.utils.startup import StartupTimer
 
 def create_mongo_app(config_name=None):
     """
     Application factory for MongoDB version.
     Creates and configures the Flask application with MongoDB.
     """
+    # Only the first app of the process includes module import time
+    global _imports_started
+    timer = StartupTimer(_imports_started)
+    _imports_started = None
     
     # Create Flask application with updated paths
     app = Flask(__name__, 
@@ -32,8 +40,33 @@ def create_mongo_app(config_name=None):
     config_name = config_name or os.environ.get('FLASK_ENV', 'development')
     app.config.from_object(mongo_config[config_name])
     
+    with timer.phase('instrumentation'):
+        # Request instrumentation (registers the Mongo command listener, so before the client exists)
+        from app.utils.performance import perf_monitor
+        perf_monitor.init_app(app)
+        
+        # Prometheus /metrics (also listens to Mongo commands)
+        from app.utils.metrics import metrics
+        metrics.init_app(app)
+        
+        # Slow query log with sampled explain plans
+        from app.utils.slow_queries import slow_query_recorder
+        slow_query_recorder.init_app(app)
+    
     # Initialize MongoDB
-    mongo_db.init_app(app)
+    with timer.phase('mongodb'):
+        mongo_db.init_app(app)
+        
+        from app.utils.page_cache import page_cache
+        page_cache.init_app(app)
+    
+    # Start background webhook processing
+    with timer.phase('webhook_queue'):
+        from app.services.webhook_queue import webhook_queue
+        webhook_queue.init_app(app)
+        
+        from app.services.image_queue import image_queue
+        image_queue.init_app(app)
     
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -50,21 +83,29 @@ def create_mongo_app(config_name=None):
 
     
     # Register blueprints
-    from app.routes.mongo_auth import mongo_auth_bp
-    from app.routes.mongo_main import mongo_main_bp
-    from app.routes.mongo_products import mongo_products_bp
-    from app.routes.mongo_orders import mongo_orders_bp
-    from app.routes.mongo_admin import mongo_admin_bp
-    from app.routes.payment_api import payment_api
-    from app.routes.payment_callbacks import payment_callbacks
-    
-    app.register_blueprint(mongo_main_bp)
-    app.register_blueprint(mongo_auth_bp)
-    app.register_blueprint(mongo_products_bp)
-    app.register_blueprint(mongo_orders_bp)
-    app.register_blueprint(mongo_admin_bp)
-    app.register_blueprint(payment_api)
-    app.register_blueprint(payment_callbacks)
+    with timer.phase('blueprints'):
+        from app.routes.mongo_auth import mongo_auth_bp
+        from app.routes.mongo_main import mongo_main_bp
+        from app.routes.mongo_products import mongo_products_bp
+        from app.routes.mongo_orders import mongo_orders_bp
+        from app.routes.mongo_admin import mongo_admin_bp
+        from app.routes.payment_api import payment_api
+        from app.routes.payment_callbacks import payment_callbacks
+        from app.routes.payment_webhooks import payment_webhooks_bp
+        
+        app.register_blueprint(mongo_main_bp)
+        app.register_blueprint(mongo_auth_bp)
+        app.register_blueprint(mongo_products_bp)
+        app.register_blueprint(mongo_orders_bp)
+        app.register_blueprint(mongo_admin_bp)
+        app.register_blueprint(payment_api)
+        app.register_blueprint(payment_callbacks)
+        # Stripe webhook and manual verification; the eSewa/Khalti paths it shares resolve to payment_callbacks
+        app.register_blueprint(payment_webhooks_bp)
+    
+    # Indexes: built now, in the background or by scripts/manage_indexes.py (MONGO_INDEX_MODE)
+    with timer.phase('indexes'):
+        mongo_db.init_indexes(app)
     
 
     
@@ -77,6 +118,7 @@ def create_mongo_app(config_name=None):
     if not app.debug:
         logging.basicConfig(level=logging.INFO)
         app.logger.info('🍖 Nepal Meat Shop (MongoDB) startup')
+    timer.finish(app)
     
 
     
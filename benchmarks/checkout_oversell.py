@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Concurrent Checkout Oversell Test
+Many simulated customers race through checkout/place-order for a few
+low-stock products at once. Afterwards the kilos sold must never exceed the
+starting stock_quantity and the remaining stock must equal start - sold;
+throughput and tail latency are reported alongside.
+
+Typical run (needs the seeded benchmark database for customer accounts):
+    python benchmarks/checkout_oversell.py --products 3 --stock 25 --customers 300 --concurrency 32
+Exits with status 1 when inventory was oversold or does not add up.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import datetime
+from collections import Counter
+
+from bson import ObjectId
+
+from common import DEFAULT_MONGO_URI, DEFAULT_DB_NAME, create_bench_app, login, percentile, git_revision
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Concurrent checkout load test with an oversell check')
+    parser.add_argument('--mongo-uri', default=os.environ.get('BENCH_MONGO_URI', DEFAULT_MONGO_URI))
+    parser.add_argument('--db', default=os.environ.get('BENCH_DB_NAME', DEFAULT_DB_NAME))
+    parser.add_argument('--products', type=int, default=3, help='Low-stock products to fight over')
+    parser.add_argument('--stock', type=float, default=25, help='Starting stock_quantity (kg) of each product')
+    parser.add_argument('--customers', type=int, default=300, help='Checkout attempts in total')
+    parser.add_argument('--concurrency', type=int, default=32, help='Customers checking out at the same time')
+    parser.add_argument('--endpoint', choices=['checkout', 'place_order', 'mixed'], default='mixed')
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the test products and orders')
+    return parser.parse_args()
+
+def seed_products(db, run_id, count, stock):
+    products = [{
+        'name': f'OVERSELL-{run_id} Khasi Boneless {index + 1}',
+        'name_nepali': 'खसी हड्डी बिना',
+        'description': 'Oversell test product',
+        'price': 1400.0,
+        'category': 'Mutton',
+        'meat_type': 'mutton',
+        'preparation_type': 'fresh',
+        'stock_quantity': stock,
+        'unit': 'kg',
+        'is_featured': False,
+        'is_available': True,
+        'date_added': datetime.utcnow(),
+        'last_updated': datetime.utcnow()
+    } for index in range(count)]
+    db.products.insert_many(products)
+    return [str(product['_id']) for product in products]
+
+def attempt(client, customer_id, product_ids, endpoint, rng):
+    """One customer fills a cart and checks out. Returns (outcome, latency_ms)."""
+    cart = {product_id: rng.choice([1, 1, 2]) for product_id in rng.sample(product_ids, rng.randint(1, min(2, len(product_ids))))}
+    login(client, customer_id, cart=cart)
+
+    started = time.perf_counter()
+    if endpoint == 'checkout':
+        response = client.post('/orders/checkout', data={
+            'delivery_address': 'Koteshwor, Kathmandu',
+            'delivery_phone': '9800000000',
+            'payment_method': 'cod'
+        })
+    else:
+        response = client.post('/orders/place-order', data={
+            'delivery_address': 'Koteshwor, Kathmandu',
+            'phone_number': '9800000000'
+        })
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    location = response.headers.get('Location', '')
+    if response.status_code == 302 and '/orders/cart' not in location:
+        outcome = 'placed'
+    elif response.status_code in (302, 400, 409):
+        outcome = 'rejected'  # Out of stock (checkout redirects back to the cart)
+    else:
+        outcome = f'http_{response.status_code}'
+    response.close()
+    return outcome, latency_ms
+
+def check_inventory(db, product_ids, starting_stock):
+    """Compare kilos sold in orders with each product's stock movement."""
+    sold = Counter()
+    orders = 0
+    for order in db.orders.find({'items.product_id': {'$in': product_ids}}, {'items': 1}):
+        orders += 1
+        for item in order['items']:
+            if item['product_id'] in product_ids:
+                sold[item['product_id']] += item['quantity']
+
+    rows, violations = [], []
+    for product in db.products.find({'_id': {'$in': [ObjectId(pid) for pid in product_ids]}},
+                                    {'name': 1, 'stock_quantity': 1}):
+        product_id = str(product['_id'])
+        row = {
+            'product': product['name'],
+            'starting_stock': starting_stock,
+            'sold': sold[product_id],
+            'remaining': product['stock_quantity']
+        }
+        rows.append(row)
+        if row['sold'] > starting_stock:
+            violations.append(f"{row['product']}: sold {row['sold']} of {starting_stock}")
+        if row['remaining'] < 0 or abs(starting_stock - row['sold'] - row['remaining']) > 1e-9:
+            violations.append(f"{row['product']}: remaining {row['remaining']} != {starting_stock} - {row['sold']}")
+    return orders, rows, violations
+
+def main():
+    args = parse_args()
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+
+    print("🍖 Nepal Meat Shop - Checkout Oversell Test")
+    print("=" * 40)
+
+    app = create_bench_app(args.mongo_uri, args.db)
+    from app.utils.mongo_db import mongo_db
+    db = mongo_db.db
+
+    customer_ids = [str(user['_id']) for user in db.users.find({'is_admin': False}, {'_id': 1}).limit(1000)]
+    if not customer_ids:
+        raise SystemExit("❌ No customer accounts - run benchmarks/seed_data.py first")
+
+    run_id = uuid.uuid4().hex[:6].upper()
+    product_ids = seed_products(db, run_id, args.products, args.stock)
+    print(f"🥩 {args.products} products with {args.stock} kg each, {args.customers} customers, "
+          f"concurrency {args.concurrency} ({args.endpoint})")
+
+    results = []
+    lock = threading.Lock()
+    remaining = [args.customers]
+    barrier = threading.Barrier(args.concurrency)
+
+    def worker(thread_index):
+        rng = random.Random(args.seed + thread_index)
+        client = app.test_client()
+        barrier.wait()  # Everyone starts at once
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            endpoint = args.endpoint if args.endpoint != 'mixed' else rng.choice(['checkout', 'place_order'])
+            try:
+                outcome, latency_ms = attempt(client, rng.choice(customer_ids), product_ids, endpoint, rng)
+            except Exception as e:
+                outcome, latency_ms = f'exception_{type(e).__name__}', 0.0
+            with lock:
+                results.append((outcome, latency_ms))
+
+    try:
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        orders, inventory, violations = check_inventory(db, product_ids, args.stock)
+        outcomes = Counter(outcome for outcome, _ in results)
+        all_latencies = [latency for _, latency in results]
+        placed_latencies = [latency for outcome, latency in results if outcome == 'placed']
+
+        report = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'products': args.products,
+            'starting_stock': args.stock,
+            'attempts': len(results),
+            'concurrency': args.concurrency,
+            'endpoint': args.endpoint,
+            'outcomes': dict(outcomes),
+            'orders_created': orders,
+            'elapsed_seconds': round(elapsed, 2),
+            'attempts_per_second': round(len(results) / elapsed, 2) if elapsed else 0.0,
+            'orders_per_second': round(outcomes['placed'] / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                'p50': percentile(all_latencies, 50),
+                'p95': percentile(all_latencies, 95),
+                'p99': percentile(all_latencies, 99),
+                'max': round(max(all_latencies), 2) if all_latencies else 0.0
+            },
+            'placed_latency_ms': {
+                'p50': percentile(placed_latencies, 50),
+                'p95': percentile(placed_latencies, 95),
+                'p99': percentile(placed_latencies, 99)
+            },
+            'inventory': inventory,
+            'violations': violations,
+            'oversold': bool(violations)
+        }
+
+        print(f"\n📊 {len(results)} attempts in {report['elapsed_seconds']}s → "
+              f"{report['attempts_per_second']} attempts/s, {report['orders_per_second']} orders/s")
+        print(f"   outcomes: {dict(outcomes)} ({orders} orders)")
+        print(f"   latency p50 {report['latency_ms']['p50']}ms, p95 {report['latency_ms']['p95']}ms, "
+              f"p99 {report['latency_ms']['p99']}ms, max {report['latency_ms']['max']}ms")
+        for row in inventory:
+            print(f"   {row['product']}: start {row['starting_stock']}, sold {row['sold']}, remaining {row['remaining']}")
+
+        if json_path:
+            os.makedirs(os.path.dirname(json_path), exist_ok=True)
+            with open(json_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Report written to {json_path}")
+    finally:
+        if not args.keep:
+            db.orders.delete_many({'items.product_id': {'$in': product_ids}})
+            db.products.delete_many({'_id': {'$in': [ObjectId(pid) for pid in product_ids]}})
+            print("🧹 Removed test products and their orders")
+
+    if violations:
+        print("❌ OVERSOLD: " + '; '.join(violations))
+        return 1
+    print("✅ No oversell: sold quantities stayed within starting stock")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
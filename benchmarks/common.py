@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - Shared Helpers
+Path setup, benchmark app/database access, the synthetic data vocabulary and
+report statistics shared by the benchmark scripts.
+"""
+
+import os
+import sys
+import subprocess
+
+# Add backend directory to Python path
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(bench_dir)
+backend_dir = os.path.join(parent_dir, 'backend')
+sys.path.insert(0, backend_dir)
+
+# Report statistics use the same percentile as the app's own monitors
+from app.utils.performance import percentile
+
+# Benchmarks never default to the configured (possibly production) MONGO_URI
+DEFAULT_MONGO_URI = 'mongodb://localhost:27017/'
+DEFAULT_DB_NAME = 'nepal_meat_shop_bench'
+
+# Synthetic data vocabulary
+AREAS = [
+    ('Thamel', 'Kathmandu'), ('Baneshwor', 'Kathmandu'), ('Koteshwor', 'Kathmandu'),
+    ('Kalanki', 'Kathmandu'), ('Chabahil', 'Kathmandu'), ('Boudha', 'Kathmandu'),
+    ('Maharajgunj', 'Kathmandu'), ('Budhanilkantha', 'Kathmandu'), ('Kirtipur', 'Kathmandu'),
+    ('Tokha', 'Kathmandu'), ('Balaju', 'Kathmandu'), ('Swayambhu', 'Kathmandu'),
+    ('Jawalakhel', 'Lalitpur'), ('Pulchowk', 'Lalitpur'), ('Satdobato', 'Lalitpur'),
+    ('Imadol', 'Lalitpur'), ('Suryabinayak', 'Bhaktapur'), ('Thimi', 'Bhaktapur'),
+    ('Lakeside', 'Pokhara'), ('Bagar', 'Pokhara'), ('Traffic Chowk', 'Butwal'),
+    ('Bharatpur Height', 'Chitwan'), ('Itahari Chowk', 'Sunsari'), ('Biratnagar Bazar', 'Morang')
+]
+
+MEAT_TYPES = {
+    # meat type: (category, category_nepali, price range per kg)
+    'chicken': ('Chicken', 'कुखुरा', (350, 700)),
+    'mutton': ('Mutton', 'खसी', (1200, 1600)),
+    'buff': ('Buff', 'राँगा', (500, 750)),
+    'pork': ('Pork', 'सुँगुर', (600, 900)),
+    'fish': ('Fish', 'माछा', (450, 1100)),
+    'duck': ('Duck', 'हाँस', (800, 1200))
+}
+
+CUTS = ['Curry Cut', 'Boneless', 'Keema', 'Leg Piece', 'Breast', 'Ribs', 'Liver',
+        'Sekuwa Cut', 'Choila Cut', 'Whole', 'Bone-in', 'Tass Cut']
+CUTS_NEPALI = ['करी कट', 'हड्डी बिना', 'कीमा', 'खुट्टा', 'छाती', 'करङ', 'कलेजो',
+               'सेकुवा कट', 'छोइला कट', 'पूरै', 'हड्डी सहित', 'तास कट']
+PREPARATION_TYPES = ['fresh', 'fresh', 'fresh', 'frozen', 'marinated', 'smoked']
+
+FIRST_NAMES = ['Aarav', 'Sita', 'Ram', 'Gita', 'Bikash', 'Anjali', 'Sagar', 'Pooja', 'Nabin',
+               'Sunita', 'Prakash', 'Kabita', 'Suman', 'Rojina', 'Dipesh', 'Srijana', 'Kiran',
+               'Manisha', 'Rajesh', 'Asmita', 'Bishal', 'Sabina', 'Nirajan', 'Pratikshya']
+LAST_NAMES = ['Shrestha', 'Gurung', 'Tamang', 'Magar', 'Rai', 'Limbu', 'Thapa', 'Karki',
+              'Adhikari', 'Sharma', 'Maharjan', 'Bajracharya', 'Pandey', 'Khadka', 'Basnet']
+
+# (payment method, weight) - cash on delivery dominates, wallets follow
+PAYMENT_MIX = [('cod', 55), ('esewa', 20), ('khalti', 17), ('fonepay', 4),
+               ('bank_transfer', 2), ('connectips', 2)]
+STATUSES = ['pending', 'confirmed', 'processing', 'out_for_delivery', 'delivered', 'cod_paid', 'cancelled']
+
+def get_database(mongo_uri: str, db_name: str):
+    """Client and database handle for the benchmark database."""
+    from pymongo import MongoClient
+    client = MongoClient(mongo_uri)
+    return client, client[db_name]
+
+def create_bench_app(mongo_uri: str, db_name: str):
+    """App on the benchmark database (config 'benchmark' reads BENCH_* variables)."""
+    os.environ['BENCH_MONGO_URI'] = mongo_uri
+    os.environ['BENCH_DB_NAME'] = db_name
+    os.chdir(backend_dir)  # The app loads .env.mongo and templates relative to backend/
+    from mongo_app import create_mongo_app
+    return create_mongo_app('benchmark')
+
+def login(client, user_id: str, cart=None):
+    """Sign a test client in through its Flask-Login session (optionally with a cart)."""
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+        if cart is not None:
+            session['cart'] = cart
+
+def git_revision() -> str:
+    """Short commit hash of the tree being measured, if available."""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=parent_dir,
+                                  capture_output=True, text=True, timeout=5).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=parent_dir,
+                               capture_output=True, text=True, timeout=5).stdout.strip()
+        return f"{revision}{'-dirty' if dirty else ''}" if revision else 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
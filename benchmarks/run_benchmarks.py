@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Drives the main customer and admin pages through the Flask test client
+against the seeded benchmark database and writes a JSON report (latency
+percentiles, throughput, status codes and Mongo queries per request) that
+can be compared with an earlier run.
+
+Typical run:
+    python benchmarks/seed_data.py --drop
+    python benchmarks/run_benchmarks.py --json benchmarks/reports/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/reports/baseline.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import threading
+from collections import Counter
+from datetime import datetime
+
+from common import (DEFAULT_MONGO_URI, DEFAULT_DB_NAME, parent_dir, create_bench_app, login,
+                    percentile, git_revision)
+
+SORTS = ['name', 'price_low', 'price_high', 'newest']
+SEARCH_TERMS = ['chicken', 'mutton', 'keema', 'boneless', 'sekuwa', 'kukhura', 'fish', 'choila', 'ribs']
+PRICE_RANGES = ['', 'under_500', '500_750', '750_1000', 'above_1000']
+
+# Server-Timing: db;dur=12.3;desc="7 queries", ...
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+class BenchContext:
+    """Ids and vocabularies the scenarios draw from (one per worker thread)."""
+
+    def __init__(self, db, seed):
+        self.rng = random.Random(seed)
+        self.product_ids = [str(p['_id']) for p in db.products.find({'is_available': True}, {'_id': 1})]
+        self.meat_types = db.products.distinct('meat_type')
+        self.product_pages = max(1, len(self.product_ids) // 12)
+        self.admin_id = _user_id(db, 'bench_admin@example.com')
+        self.customer_id = _user_id(db, 'bench_customer@example.com')
+
+    def random_cart(self):
+        return {product_id: self.rng.choice([0.5, 1, 2])
+                for product_id in self.rng.sample(self.product_ids, min(len(self.product_ids), self.rng.randint(1, 5)))}
+
+def _user_id(db, email):
+    user = db.users.find_one({'email': email}, {'_id': 1})
+    if not user:
+        raise SystemExit(f"❌ {email} not found - run benchmarks/seed_data.py first")
+    return str(user['_id'])
+
+# Scenarios: each issues one request and returns the response
+
+def products_list(client, ctx):
+    params = {'page': ctx.rng.randint(1, ctx.product_pages), 'sort': ctx.rng.choice(SORTS)}
+    if ctx.rng.random() < 0.5:
+        params['meat_type'] = ctx.rng.choice(ctx.meat_types)
+    if ctx.rng.random() < 0.3:
+        params['price_range'] = ctx.rng.choice(PRICE_RANGES)
+    return client.get('/products/', query_string=params)
+
+def search(client, ctx):
+    return client.get('/search', query_string={'q': ctx.rng.choice(SEARCH_TERMS)})
+
+def cart(client, ctx):
+    with client.session_transaction() as session:
+        session['cart'] = ctx.random_cart()
+    return client.get('/orders/cart')
+
+def checkout(client, ctx):
+    login(client, ctx.customer_id, cart=ctx.random_cart())
+    return client.post('/orders/checkout', data={
+        'delivery_address': 'Baneshwor, Kathmandu',
+        'delivery_phone': '9800000000',
+        'payment_method': 'cod',
+        'special_instructions': 'benchmark'
+    })
+
+def admin_orders(client, ctx):
+    login(client, ctx.admin_id)
+    return client.get('/admin/orders', query_string={'status': ctx.rng.choice(['pending', 'processing', ''])})
+
+def export_orders_csv(client, ctx):
+    login(client, ctx.admin_id)
+    return client.get('/admin/export/orders/csv', query_string={'status': 'pending'})
+
+def export_orders_pdf(client, ctx):
+    login(client, ctx.admin_id)
+    return client.get('/admin/export/orders', query_string={'status': 'pending'})
+
+def business_insights(client, ctx):
+    login(client, ctx.admin_id)
+    return client.get('/admin/business-insights')
+
+# name: (scenario, default iterations, expected status codes)
+SCENARIOS = {
+    'products_list': (products_list, 200, (200,)),
+    'search': (search, 200, (200,)),
+    'cart': (cart, 200, (200,)),
+    'checkout': (checkout, 100, (302,)),
+    'admin_orders': (admin_orders, 5, (200,)),
+    'export_orders_csv': (export_orders_csv, 3, (200,)),
+    'export_orders_pdf': (export_orders_pdf, 3, (200,)),
+    'business_insights': (business_insights, 5, (200,))
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the Nepal Meat Shop benchmark suite')
+    parser.add_argument('--mongo-uri', default=os.environ.get('BENCH_MONGO_URI', DEFAULT_MONGO_URI))
+    parser.add_argument('--db', default=os.environ.get('BENCH_DB_NAME', DEFAULT_DB_NAME))
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--iterations', type=int, help='Override the per-scenario iteration count')
+    parser.add_argument('--warmup', type=int, default=2, help='Unmeasured iterations per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='Threads per scenario')
+    parser.add_argument('--max-seconds', type=float, default=120.0,
+                        help='Stop a scenario after this long (at least one iteration always runs)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file')
+    parser.add_argument('--compare', help='Print the change against an earlier report')
+    return parser.parse_args()
+
+def run_scenario(app, db, name, args):
+    scenario, default_iterations, expected = SCENARIOS[name]
+    iterations = args.iterations or default_iterations
+    latencies, queries, db_ms = [], [], []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = [None]
+    remaining = [iterations]
+
+    def worker(thread_index):
+        ctx = BenchContext(db, args.seed + thread_index)
+        client = app.test_client()
+        for _ in range(args.warmup if thread_index == 0 else 0):
+            scenario(client, ctx)
+        while True:
+            with lock:
+                if remaining[0] <= 0 or (deadline[0] and time.monotonic() > deadline[0] and latencies):
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            response = scenario(client, ctx)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timing = _SERVER_TIMING_DB.search(response.headers.get('Server-Timing', ''))
+            with lock:
+                latencies.append(elapsed_ms)
+                statuses[response.status_code] += 1
+                if timing:
+                    db_ms.append(float(timing.group(1)))
+                    queries.append(int(timing.group(2)))
+            response.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.concurrency)]
+    started = time.perf_counter()
+    deadline[0] = time.monotonic() + args.max_seconds
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = sum(count for status, count in statuses.items() if status in expected)
+    return {
+        'iterations': len(latencies),
+        'concurrency': args.concurrency,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'min_ms': round(min(latencies), 2) if latencies else 0.0,
+        'max_ms': round(max(latencies), 2) if latencies else 0.0,
+        'ok': ok,
+        'errors': len(latencies) - ok,
+        'status_codes': {str(status): count for status, count in sorted(statuses.items())},
+        'avg_queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'avg_db_ms': round(sum(db_ms) / len(db_ms), 2) if db_ms else None
+    }
+
+def print_report(report, baseline=None):
+    print(f"\n📊 {report['meta']['revision']} on {report['dataset'].get('orders', '?'):,} orders")
+    header = f"{'scenario':<20}{'iter':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'req/s':>9}{'queries':>9}{'errors':>8}"
+    if baseline:
+        header += f"{'p50 Δ':>10}{'p95 Δ':>10}"
+    print(header)
+    for name, row in report['scenarios'].items():
+        line = (f"{name:<20}{row['iterations']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+                f"{row['throughput_rps']:>9}{str(row['avg_queries'] or '-'):>9}{row['errors']:>8}")
+        previous = (baseline or {}).get('scenarios', {}).get(name)
+        if previous:
+            line += f"{_delta(row['p50_ms'], previous['p50_ms']):>10}{_delta(row['p95_ms'], previous['p95_ms']):>10}"
+        print(line)
+    if baseline:
+        print(f"Δ against {baseline['meta']['revision']} ({baseline['meta']['timestamp']}), negative is faster")
+
+def _delta(current, previous):
+    if not previous:
+        return '-'
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+def main():
+    args = parse_args()
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ Unknown scenarios: {', '.join(unknown)}")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+
+    print("🍖 Nepal Meat Shop - Benchmark Suite")
+    print("=" * 40)
+
+    app = create_bench_app(args.mongo_uri, args.db)
+    from app.utils.mongo_db import mongo_db
+    db = mongo_db.db
+    dataset = db.bench_meta.find_one({'_id': 'dataset'}) or {}
+    dataset.pop('_id', None)
+    dataset['orders'] = db.orders.estimated_document_count()
+    dataset['products'] = db.products.estimated_document_count()
+    dataset['users'] = db.users.estimated_document_count()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': args.db,
+            'concurrency': args.concurrency,
+            'seed': args.seed
+        },
+        'dataset': {key: (value.isoformat() if isinstance(value, datetime) else value)
+                    for key, value in dataset.items()},
+        'scenarios': {}
+    }
+
+    for name in names:
+        print(f"⏱️  {name}...", flush=True)
+        report['scenarios'][name] = run_scenario(app, db, name, args)
+
+    print_report(report, baseline)
+    if json_path:
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {os.path.relpath(json_path, parent_dir)}")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Benchmark Data Generator
+Fills a local benchmark database with a realistic catalog, customers and
+orders (Nepali delivery areas, meat types, payment mixes) so
+run_benchmarks.py measures the app at production-like volume.
+
+Typical run:
+    python benchmarks/seed_data.py --orders 1000000 --drop
+"""
+
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from common import (DEFAULT_MONGO_URI, DEFAULT_DB_NAME, AREAS, MEAT_TYPES, CUTS, CUTS_NEPALI,
+                    PREPARATION_TYPES, FIRST_NAMES, LAST_NAMES, PAYMENT_MIX, get_database)
+
+BENCH_ADMIN_EMAIL = 'bench_admin@example.com'
+BENCH_CUSTOMER_EMAIL = 'bench_customer@example.com'
+SEEDED_COLLECTIONS = ['users', 'products', 'categories', 'orders', 'bench_meta']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic data for the benchmark suite')
+    parser.add_argument('--mongo-uri', default=os.environ.get('BENCH_MONGO_URI', DEFAULT_MONGO_URI))
+    parser.add_argument('--db', default=os.environ.get('BENCH_DB_NAME', DEFAULT_DB_NAME))
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--products', type=int, default=300)
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=365, help='Spread order dates over this many days')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same dataset)')
+    parser.add_argument('--drop', action='store_true', help='Drop the seeded collections first')
+    parser.add_argument('--force', action='store_true',
+                        help="Allow a database whose name does not contain 'bench'")
+    return parser.parse_args()
+
+def build_categories():
+    return [{
+        'name': category,
+        'name_nepali': category_nepali,
+        'description': f'Fresh {category.lower()} from local farms',
+        'image_url': None,
+        'is_active': True,
+        'sort_order': index
+    } for index, (category, category_nepali, _) in enumerate(MEAT_TYPES.values())]
+
+def build_products(rng, count, now):
+    products = []
+    meat_types = list(MEAT_TYPES)
+    for index in range(count):
+        meat_type = meat_types[index % len(meat_types)]
+        category, category_nepali, (low, high) = MEAT_TYPES[meat_type]
+        cut_index = (index // len(meat_types)) % len(CUTS)
+        preparation = rng.choice(PREPARATION_TYPES)
+        batch = index // (len(meat_types) * len(CUTS)) + 1
+        products.append({
+            'name': f'{category} {CUTS[cut_index]}' + (f' #{batch}' if batch > 1 else ''),
+            'name_nepali': f'{category_nepali} {CUTS_NEPALI[cut_index]}',
+            'description': f'{preparation.title()} {category.lower()} {CUTS[cut_index].lower()}, '
+                           f'cleaned and packed the same day.',
+            'price': float(rng.randrange(low, high, 10)),
+            'image_url': None,
+            'category': category,
+            'category_id': None,
+            'meat_type': meat_type,
+            'preparation_type': preparation,
+            # Deep stock so checkout benchmarks never run a product dry
+            'stock_quantity': 1000000,
+            'unit': 'kg',
+            'is_featured': rng.random() < 0.1,
+            'is_available': rng.random() < 0.95,
+            'date_added': now - timedelta(days=rng.randint(0, 720)),
+            'last_updated': now,
+            'min_order_kg': 0.5,
+            'freshness_hours': rng.choice([12, 24, 48]),
+            'cooking_tips': None
+        })
+    return products
+
+def build_users(rng, count, now, password_hash):
+    users = [
+        _user('bench_admin', BENCH_ADMIN_EMAIL, 'Bench Admin', '9700000000', password_hash, now, is_admin=True),
+        _user('bench_customer', BENCH_CUSTOMER_EMAIL, 'Bench Customer', '9700000001', password_hash, now)
+    ]
+    for index in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        area, city = rng.choice(AREAS)
+        user = _user(f'{first.lower()}.{last.lower()}{index}', f'{first.lower()}.{last.lower()}{index}@example.com',
+                     f'{first} {last}', f'98{index:08d}', password_hash,
+                     now - timedelta(days=rng.randint(0, 900)))
+        user['address'] = f'{area}, {city}'
+        users.append(user)
+    return users
+
+def _user(username, email, full_name, phone, password_hash, joined, is_admin=False):
+    return {
+        'username': username,
+        'email': email,
+        'password_hash': password_hash,
+        'full_name': full_name,
+        'phone': phone,
+        'address': None,
+        'is_admin': is_admin,
+        'is_sub_admin': False,
+        'is_staff': False,
+        'is_active': True,
+        'profile_image': None,
+        'date_joined': joined,
+        'last_login': None
+    }
+
+def generate_orders(rng, count, customers, products, days, now):
+    """Yield order documents; older orders are mostly delivered, recent ones still open."""
+    methods = [method for method, _ in PAYMENT_MIX]
+    weights = [weight for _, weight in PAYMENT_MIX]
+    for index in range(count):
+        age_days = rng.random() ** 1.5 * days  # Skewed towards recent orders
+        order_date = now - timedelta(days=age_days, seconds=rng.randint(0, 86399))
+        payment_method = rng.choices(methods, weights)[0]
+        customer_id, phone, address = rng.choice(customers)
+
+        items = []
+        for product in rng.sample(products, rng.choice([1, 1, 2, 2, 3, 4])):
+            quantity = rng.choice([0.5, 1, 1, 1.5, 2, 3])
+            items.append({
+                'product_id': str(product['_id']),
+                'product_name': product['name'],
+                'quantity': quantity,
+                'unit_price': product['price'],
+                'total_price': round(product['price'] * quantity, 2)
+            })
+
+        status = _status_for_age(rng, age_days)
+        if status in ('delivered', 'cod_paid'):
+            payment_status = 'paid'
+        elif status == 'cancelled':
+            payment_status = rng.choice(['failed', 'pending', 'refunded'])
+        else:
+            payment_status = 'paid' if payment_method != 'cod' and rng.random() < 0.7 else 'pending'
+
+        yield {
+            'order_number': f"ORD-{order_date.strftime('%Y%m%d')}-B{index:09d}",
+            'user_id': customer_id,
+            'items': items,
+            'total_amount': round(sum(item['total_price'] for item in items), 2),
+            'status': status,
+            'delivery_address': address,
+            'delivery_latitude': None,
+            'delivery_longitude': None,
+            'delivery_formatted_address': None,
+            'phone_number': phone,
+            'payment_method': payment_method,
+            'payment_status': payment_status,
+            'order_date': order_date,
+            'delivery_date': order_date + timedelta(hours=rng.randint(2, 30)) if status in ('delivered', 'cod_paid') else None,
+            'estimated_delivery': None,
+            'transaction_id': f'TXN-B{index:09d}' if payment_method != 'cod' else None,
+            'notes': None,
+            'special_instructions': rng.choice([None, None, None, 'Please call before delivery',
+                                                'सानो टुक्रा काट्नुहोस्', 'Deliver before 7 AM'])
+        }
+
+def _status_for_age(rng, age_days):
+    if age_days > 3:
+        return rng.choices(['delivered', 'cod_paid', 'cancelled'], [70, 20, 10])[0]
+    return rng.choices(['pending', 'confirmed', 'processing', 'out_for_delivery', 'delivered', 'cancelled'],
+                       [30, 20, 15, 15, 15, 5])[0]
+
+def insert_in_batches(collection, documents, batch_size, label, total):
+    batch, inserted, started = [], 0, time.perf_counter()
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+            if inserted % (batch_size * 20) == 0:
+                rate = inserted / (time.perf_counter() - started)
+                print(f"   {label}: {inserted:,}/{total:,} ({rate:,.0f}/s)")
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+def main():
+    args = parse_args()
+    if 'bench' not in args.db and not args.force:
+        raise SystemExit(f"❌ Refusing to seed '{args.db}': use a database with 'bench' in its name or --force")
+
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    client, db = get_database(args.mongo_uri, args.db)
+
+    print("🍖 Nepal Meat Shop - Benchmark Data Generator")
+    print("=" * 40)
+    print(f"🗄️  {args.db}: {args.users:,} users, {args.products:,} products, {args.orders:,} orders")
+
+    if args.drop:
+        for name in SEEDED_COLLECTIONS:
+            db.drop_collection(name)
+        print("🧹 Dropped existing benchmark collections")
+    elif db.orders.estimated_document_count():
+        raise SystemExit("❌ Benchmark database already has orders; pass --drop to regenerate")
+
+    started = time.perf_counter()
+    db.categories.insert_many(build_categories())
+
+    products = build_products(rng, args.products, now)
+    db.products.insert_many(products)
+    print(f"🥩 {len(products):,} products in {len(MEAT_TYPES)} categories")
+
+    # One hash for every synthetic account (benchmark password: bench1234)
+    users = build_users(rng, args.users, now, generate_password_hash('bench1234'))
+    insert_in_batches(db.users, iter(users), args.batch_size, 'users', len(users))
+    customers = [(str(user['_id']), user['phone'], user['address'] or 'Thamel, Kathmandu')
+                 for user in users if not user['is_admin']]
+    print(f"👥 {len(users):,} users (admin: {BENCH_ADMIN_EMAIL}, customer: {BENCH_CUSTOMER_EMAIL})")
+
+    orderable = [product for product in products if product['is_available']]
+    inserted = insert_in_batches(db.orders, generate_orders(rng, args.orders, customers, orderable, args.days, now),
+                                 args.batch_size, 'orders', args.orders)
+    print(f"🧾 {inserted:,} orders")
+
+    db.bench_meta.replace_one({'_id': 'dataset'}, {
+        '_id': 'dataset',
+        'generated_at': now,
+        'seed': args.seed,
+        'users': len(users),
+        'products': len(products),
+        'orders': inserted,
+        'days': args.days
+    }, upsert=True)
+
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s")
+    client.close()
+
+if __name__ == '__main__':
+    main()
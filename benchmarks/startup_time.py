@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+Starts the app N times in fresh Python processes for each MONGO_INDEX_MODE
+and reports how long create_mongo_app took, split into the phases recorded
+by app.utils.startup.StartupTimer (imports, instrumentation, mongodb,
+webhook_queue, blueprints, indexes).
+
+Typical run:
+    python benchmarks/startup_time.py --runs 10 --modes startup,migrate
+Exits with status 1 when the p95 app startup exceeds --target-ms.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+
+from common import DEFAULT_MONGO_URI, DEFAULT_DB_NAME, parent_dir, percentile, git_revision
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Application startup time per index mode')
+    parser.add_argument('--mongo-uri', default=os.environ.get('BENCH_MONGO_URI', DEFAULT_MONGO_URI))
+    parser.add_argument('--db', default=os.environ.get('BENCH_DB_NAME', DEFAULT_DB_NAME))
+    parser.add_argument('--runs', type=int, default=10, help='Fresh processes per mode')
+    parser.add_argument('--modes', default='startup,background,migrate',
+                        help='Comma separated MONGO_INDEX_MODE values to compare')
+    parser.add_argument('--target-ms', type=float, default=1000, help='p95 app startup budget')
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def child(args):
+    """One measured startup: print the app's startup timings as JSON."""
+    from common import create_bench_app
+    app = create_bench_app(args.mongo_uri, args.db)
+    print(json.dumps(app.extensions['startup_timings']))
+    return 0
+
+def run_once(args, mode):
+    env = dict(os.environ, MONGO_INDEX_MODE=mode, WEBHOOK_QUEUE_ENABLED='false')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child',
+                             '--mongo-uri', args.mongo_uri, '--db', args.db],
+                            env=env, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"❌ Startup failed in mode {mode}:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = round(process_ms, 1)
+    return timings
+
+def summarize(mode, runs):
+    totals = [run['total_ms'] for run in runs]
+    phases = {}
+    for run in runs:
+        for name, duration_ms in run['phases'].items():
+            phases.setdefault(name, []).append(duration_ms)
+    return {
+        'mode': mode,
+        'runs': len(runs),
+        'p50_ms': percentile(totals, 50),
+        'p95_ms': percentile(totals, 95),
+        'process_p50_ms': percentile([run['process_ms'] for run in runs], 50),
+        'phases_p50_ms': {name: percentile(samples, 50) for name, samples in phases.items()}
+    }
+
+def main():
+    args = parse_args()
+    if args.child:
+        return child(args)
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+
+    print("🍖 Nepal Meat Shop - Startup Time Benchmark")
+    print("=" * 40)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': args.db,
+            'target_ms': args.target_ms
+        },
+        'modes': []
+    }
+
+    print(f"{'mode':<12}{'p50':>9}{'p95':>9}{'process':>10}  slowest phases (p50)")
+    for mode in modes:
+        row = summarize(mode, [run_once(args, mode) for _ in range(args.runs)])
+        report['modes'].append(row)
+        slowest = sorted(row['phases_p50_ms'].items(), key=lambda item: item[1], reverse=True)[:3]
+        print(f"{mode:<12}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['process_p50_ms']:>10}  "
+              f"{', '.join(f'{name} {duration_ms:.0f}' for name, duration_ms in slowest)}")
+
+    if json_path:
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {os.path.relpath(json_path, parent_dir)}")
+
+    over = [row['mode'] for row in report['modes'] if row['p95_ms'] > args.target_ms]
+    if over:
+        print(f"❌ p95 startup above {args.target_ms:.0f} ms in: {', '.join(over)}")
+        return 1
+    print(f"✅ p95 startup within {args.target_ms:.0f} ms in every mode")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Worker Concurrency Benchmark
+Imports the app once (like gunicorn --preload), forks N worker processes
+with T request threads each and drives the read-heavy pages through the
+Flask test client. For every worker count and pool size it reports
+throughput, tail latency, connections opened and time spent waiting for a
+pooled connection, and checks that every worker talked to MongoDB through
+its own client instead of one inherited across fork.
+
+Typical run:
+    python benchmarks/seed_data.py --drop
+    python benchmarks/worker_concurrency.py --workers 1,2,4,8 --threads 4 --pool-sizes 5,50
+Exits with status 1 when a worker reused the parent's client.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import multiprocessing
+from collections import Counter
+from datetime import datetime
+
+from common import (DEFAULT_MONGO_URI, DEFAULT_DB_NAME, parent_dir, create_bench_app, percentile,
+                    git_revision)
+from run_benchmarks import SCENARIOS, BenchContext
+
+READ_SCENARIOS = 'products_list,search,cart'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Throughput and pool behavior across forked workers')
+    parser.add_argument('--mongo-uri', default=os.environ.get('BENCH_MONGO_URI', DEFAULT_MONGO_URI))
+    parser.add_argument('--db', default=os.environ.get('BENCH_DB_NAME', DEFAULT_DB_NAME))
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma separated worker process counts')
+    parser.add_argument('--threads', type=int, default=4, help='Request threads per worker (gunicorn --threads)')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per worker')
+    parser.add_argument('--pool-sizes', default='',
+                        help='Comma separated MONGO_MAX_POOL_SIZE values to compare (default: configured size)')
+    parser.add_argument('--scenarios', default=READ_SCENARIOS,
+                        help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', dest='json_path', help='Write the report to this file')
+    return parser.parse_args()
+
+class PoolStats:
+    """Connection pool events of one worker's client."""
+
+    def __init__(self):
+        from pymongo import monitoring
+
+        stats = self
+        self.created = 0
+        self.checkout_failures = Counter()
+        self.wait_ms = []
+        self.lock = threading.Lock()
+
+        class Listener(monitoring.ConnectionPoolListener):
+            def connection_created(self, event):
+                with stats.lock:
+                    stats.created += 1
+
+            def connection_checked_out(self, event):
+                if event.duration is not None:
+                    with stats.lock:
+                        stats.wait_ms.append(event.duration * 1000)
+
+            def connection_check_out_failed(self, event):
+                with stats.lock:
+                    stats.checkout_failures[event.reason] += 1
+
+            # Events the benchmark doesn't need
+            def pool_created(self, event): pass
+            def pool_ready(self, event): pass
+            def pool_cleared(self, event): pass
+            def pool_closed(self, event): pass
+            def connection_ready(self, event): pass
+            def connection_closed(self, event): pass
+            def connection_check_out_started(self, event): pass
+            def connection_checked_in(self, event): pass
+
+        # Applies to clients created from now on, i.e. the worker's own client
+        monitoring.register(Listener())
+
+def worker_process(app, names, args, worker_index, barrier, results):
+    """One forked worker: T threads sharing this process's MongoClient."""
+    from app.utils.mongo_db import mongo_db
+
+    parent_client_id = id(mongo_db._client) if mongo_db._client is not None else None
+    pool = PoolStats()
+    db = mongo_db.db  # First use in this process opens the worker's own client
+    own_client = mongo_db._pid == os.getpid() and id(mongo_db._client) != parent_client_id
+
+    latencies, statuses, errors = [], Counter(), 0
+    lock = threading.Lock()
+    remaining = [args.requests]
+
+    def request_thread(thread_index):
+        nonlocal errors
+        ctx = BenchContext(db, args.seed + worker_index * 100 + thread_index)
+        client = app.test_client()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            scenario, _, expected = SCENARIOS[ctx.rng.choice(names)]
+            started = time.perf_counter()
+            try:
+                response = scenario(client, ctx)
+                status, ok = response.status_code, response.status_code in expected
+                response.close()
+            except Exception as e:
+                status, ok = type(e).__name__, False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+                statuses[str(status)] += 1
+                if not ok:
+                    errors += 1
+
+    threads = [threading.Thread(target=request_thread, args=(index,)) for index in range(args.threads)]
+    barrier.wait()  # All workers start together
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put({
+        'pid': os.getpid(),
+        'own_client': own_client,
+        'elapsed': time.perf_counter() - started,
+        'latencies': latencies,
+        'statuses': dict(statuses),
+        'errors': errors,
+        'connections_created': pool.created,
+        'checkout_wait_ms': pool.wait_ms,
+        'checkout_failures': dict(pool.checkout_failures)
+    })
+
+def run_round(app, names, args, workers):
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker_process, args=(app, names, args, index, barrier, results))
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = [latency for row in rows for latency in row['latencies']]
+    waits = [wait for row in rows for wait in row['checkout_wait_ms']]
+    statuses, failures = Counter(), Counter()
+    for row in rows:
+        statuses.update(row['statuses'])
+        failures.update(row['checkout_failures'])
+    elapsed = max(row['elapsed'] for row in rows)
+    return {
+        'workers': workers,
+        'threads_per_worker': args.threads,
+        'requests': len(latencies),
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'errors': sum(row['errors'] for row in rows),
+        'status_codes': dict(sorted(statuses.items())),
+        'connections_created': sum(row['connections_created'] for row in rows),
+        'checkout_wait_p95_ms': percentile(waits, 95),
+        'checkout_wait_max_ms': round(max(waits), 2) if waits else 0.0,
+        'checkout_failures': dict(failures),
+        'own_client_per_worker': all(row['own_client'] for row in rows)
+    }
+
+def main():
+    args = parse_args()
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ Unknown scenarios: {', '.join(unknown)}")
+    worker_counts = [int(count) for count in args.workers.split(',') if count.strip()]
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+
+    print("🍖 Nepal Meat Shop - Worker Concurrency Benchmark")
+    print("=" * 40)
+
+    # Imported and connected once in the parent, like gunicorn --preload
+    app = create_bench_app(args.mongo_uri, args.db)
+    from app.utils.mongo_db import mongo_db
+    pool_sizes = [int(size) for size in args.pool_sizes.split(',') if size.strip()] or [app.config['MONGO_MAX_POOL_SIZE']]
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'database': args.db,
+            'scenarios': names,
+            'requests_per_worker': args.requests,
+            'client_options': {key: value for key, value in mongo_db.client_options.items()
+                               if key != 'maxPoolSize'}
+        },
+        'rounds': []
+    }
+
+    print(f"{'pool':>6}{'workers':>9}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'conns':>7}"
+          f"{'wait p95':>10}{'errors':>8}  own client")
+    for pool_size in pool_sizes:
+        app.config['MONGO_MAX_POOL_SIZE'] = pool_size
+        mongo_db.init_app(app)
+        mongo_db.db.command('ping')  # Parent holds a live client when the workers fork
+        for workers in worker_counts:
+            row = run_round(app, names, args, workers)
+            row['max_pool_size'] = pool_size
+            report['rounds'].append(row)
+            print(f"{pool_size:>6}{workers:>9}{row['throughput_rps']:>10}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+                  f"{row['p99_ms']:>9}{row['connections_created']:>7}{row['checkout_wait_p95_ms']:>10}"
+                  f"{row['errors']:>8}  {'✅' if row['own_client_per_worker'] else '❌'}")
+
+    if json_path:
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {os.path.relpath(json_path, parent_dir)}")
+
+    if not all(row['own_client_per_worker'] for row in report['rounds']):
+        print("❌ A worker used the MongoClient inherited from the parent process")
+        return 1
+    print("✅ Every worker opened its own MongoClient after fork")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
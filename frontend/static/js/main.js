@@ -964,6 +964,9 @@ function initializeCartPage() {
     // Auto-update cart totals
     updateCartSummary();
     
+    // Current stock of every cart item in one request
+    refreshCartStock();
+    
     // Quantity change debouncing
     const quantityInputs = document.querySelectorAll('.quantity-input');
     quantityInputs.forEach(input => {
@@ -975,6 +978,40 @@ function initializeCartPage() {
     });
 }
 
+/**
+ * Refresh stock limits of all cart items with one batch request
+ */
+function refreshCartStock() {
+    const cartItems = document.querySelectorAll('.cart-item[data-product-id]');
+    if (cartItems.length === 0) return;
+    
+    const ids = Array.from(cartItems, item => item.getAttribute('data-product-id'));
+    fetch(`/products/api/check-stock/batch?ids=${encodeURIComponent(ids.join(','))}`, {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' }
+    })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data) return;
+            cartItems.forEach(item => {
+                const stock = data.stock[item.getAttribute('data-product-id')];
+                const quantityInput = item.querySelector('.quantity-input');
+                if (!stock || !quantityInput) return;
+                
+                quantityInput.setAttribute('max', stock.stock_quantity);
+                const maxLabel = item.querySelector('.stock-max');
+                if (maxLabel) maxLabel.textContent = stock.stock_quantity;
+                
+                const productName = item.querySelector('.product-name')?.textContent || 'An item';
+                if (!stock.is_available) {
+                    showToast(`${productName} is no longer available`, 'warning');
+                } else if (parseFloat(quantityInput.value) > stock.stock_quantity) {
+                    showToast(`Only ${stock.stock_quantity} kg of ${productName} left in stock`, 'warning');
+                }
+            });
+        })
+        .catch(error => console.warn('Stock refresh failed:', error));
+}
+
 /**
  * Initialize admin page functionality
  */
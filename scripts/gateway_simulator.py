@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Payment Gateway Simulator
+Local stand-in for the Khalti ePayment and eSewa ePay endpoints so the payment
+flow can be load tested without touching the sandbox servers.
+
+Point the app at it with:
+    PAYMENT_ENVIRONMENT=simulator
+    PAYMENT_SIMULATOR_URL=http://127.0.0.1:8765
+
+Endpoints:
+    POST /api/v2/epayment/initiate/   Khalti initiate
+    POST /api/v2/epayment/lookup/     Khalti lookup (verification)
+    GET  /khalti/pay/<pidx>           Customer "pays" -> redirect to return_url
+    POST /epay/main                   eSewa payment form -> redirect to su/fu
+    POST /epay/transrec               eSewa verification
+    GET  /__stats                     Request counters
+    POST /__config                    Change latency/error settings at runtime
+"""
+
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.request import Request, urlopen
+
+class SimulatorState:
+    """Payments created through the simulator plus its behaviour settings."""
+
+    def __init__(self, args):
+        self.settings = {
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'error_rate': args.error_rate,
+            'timeout_rate': args.timeout_rate,
+            'timeout_ms': args.timeout_ms,
+            'decline_rate': args.decline_rate,
+            'fire_callbacks': args.fire_callbacks,
+            'callback_drop_rate': args.callback_drop_rate,
+            'callback_delay_ms': args.callback_delay_ms,
+            'webhook_url': args.webhook_url
+        }
+        self.base_url = args.public_url or f'http://{args.host}:{args.port}'
+        self.lock = threading.Lock()
+        self.khalti = {}  # pidx -> payment
+        self.esewa = {}   # refId -> payment
+        self.stats = {}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    server_version = 'GatewaySimulator/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self) -> SimulatorState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # Request plumbing
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        path = urlparse(self.path).path
+        self.state.count(f'{method} {path if not path.startswith("/khalti/pay/") else "/khalti/pay/<pidx>"}')
+
+        if path == '/__stats':
+            return self._json(200, {'stats': self.state.stats, 'settings': self.state.settings,
+                                    'khalti_payments': len(self.state.khalti),
+                                    'esewa_payments': len(self.state.esewa)})
+        if path == '/__config' and method == 'POST':
+            self.state.settings.update(self._body())
+            return self._json(200, self.state.settings)
+
+        routes = {
+            ('POST', '/api/v2/epayment/initiate/'): self.khalti_initiate,
+            ('POST', '/api/v2/epayment/lookup/'): self.khalti_lookup,
+            ('POST', '/epay/main'): self.esewa_main,
+            ('POST', '/epay/transrec'): self.esewa_transrec,
+            ('GET', '/epay/transrec'): self.esewa_transrec
+        }
+        handler = routes.get((method, path))
+        if handler is None and method == 'GET' and path.startswith('/khalti/pay/'):
+            handler = self.khalti_pay
+        if handler is None:
+            return self._json(404, {'detail': 'Not found.'})
+
+        # Server-to-server API calls get latency and injected failures;
+        # customer-facing redirects only get latency
+        self._simulate_latency()
+        if handler in (self.khalti_initiate, self.khalti_lookup, self.esewa_transrec) and self._inject_failure():
+            return
+        handler()
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length).decode('utf-8') if length else ''
+        if 'application/json' in (self.headers.get('Content-Type') or ''):
+            return json.loads(raw or '{}')
+        query = parse_qs(urlparse(self.path).query)
+        query.update(parse_qs(raw))
+        return {key: values[0] for key, values in query.items()}
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _text(self, status, text):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _simulate_latency(self):
+        settings = self.state.settings
+        delay = settings['latency_ms'] + random.uniform(-1, 1) * settings['jitter_ms']
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _inject_failure(self) -> bool:
+        settings = self.state.settings
+        roll = random.random()
+        if roll < settings['timeout_rate']:
+            self.state.count('injected_timeouts')
+            time.sleep(settings['timeout_ms'] / 1000.0)
+            self._json(504, {'detail': 'Simulated gateway timeout'})
+            return True
+        if roll < settings['timeout_rate'] + settings['error_rate']:
+            self.state.count('injected_errors')
+            self._json(503, {'detail': 'Simulated gateway error'})
+            return True
+        return False
+
+    # Khalti
+
+    def khalti_initiate(self):
+        data = self._body()
+        if not self.headers.get('Authorization', '').startswith('Key '):
+            return self._json(401, {'detail': 'Invalid token.'})
+        for field in ('return_url', 'amount', 'purchase_order_id'):
+            if not data.get(field):
+                return self._json(400, {field: ['This field is required.']})
+
+        pidx = uuid.uuid4().hex[:22]
+        expires_at = datetime.utcnow() + timedelta(minutes=60)
+        with self.state.lock:
+            self.state.khalti[pidx] = {
+                'pidx': pidx,
+                'amount': int(data['amount']),
+                'return_url': data['return_url'],
+                'purchase_order_id': data['purchase_order_id'],
+                'purchase_order_name': data.get('purchase_order_name', ''),
+                'status': 'Initiated',
+                'transaction_id': None,
+                'expires_at': expires_at
+            }
+        self._json(200, {
+            'pidx': pidx,
+            'payment_url': f'{self.state.base_url}/khalti/pay/{pidx}',
+            'expires_at': expires_at.isoformat() + 'Z',
+            'expires_in': 3600
+        })
+
+    def khalti_pay(self):
+        pidx = urlparse(self.path).path.rsplit('/', 1)[-1]
+        with self.state.lock:
+            payment = self.state.khalti.get(pidx)
+            if payment is None:
+                return self._json(404, {'detail': 'Not found.'})
+            declined = random.random() < self.state.settings['decline_rate']
+            if payment['status'] == 'Initiated':
+                payment['status'] = 'User canceled' if declined else 'Completed'
+                if not declined:
+                    payment['transaction_id'] = uuid.uuid4().hex[:22]
+
+        params = {
+            'pidx': pidx,
+            'status': payment['status'],
+            'transaction_id': payment['transaction_id'] or '',
+            'tidx': payment['transaction_id'] or '',
+            'amount': payment['amount'],
+            'total_amount': payment['amount'],
+            'mobile': '98XXXXX001',
+            'purchase_order_id': payment['purchase_order_id'],
+            'purchase_order_name': payment['purchase_order_name']
+        }
+        location = _append_query(payment['return_url'], params)
+        self._fire_callbacks('khalti', location, params)
+        self._redirect(location)
+
+    def khalti_lookup(self):
+        data = self._body()
+        payment = self.state.khalti.get(data.get('pidx'))
+        if payment is None:
+            return self._json(404, {'detail': 'Not found.', 'error_key': 'validation_error'})
+        if payment['status'] == 'Initiated' and datetime.utcnow() > payment['expires_at']:
+            payment['status'] = 'Expired'
+        self._json(200, {
+            'pidx': payment['pidx'],
+            'total_amount': payment['amount'],
+            'status': payment['status'],
+            'transaction_id': payment['transaction_id'],
+            'fee': int(payment['amount'] * 0.03) if payment['status'] == 'Completed' else 0,
+            'refunded': False,
+            'purchase_order_id': payment['purchase_order_id']
+        })
+
+    # eSewa
+
+    def esewa_main(self):
+        data = self._body()
+        if not data.get('pid') or not data.get('su'):
+            return self._text(400, 'Invalid payment request')
+
+        declined = random.random() < self.state.settings['decline_rate']
+        if declined:
+            params = {'pid': data['pid']}
+            location = _append_query(data.get('fu') or data['su'], params)
+        else:
+            ref_id = uuid.uuid4().hex[:10].upper()
+            with self.state.lock:
+                self.state.esewa[ref_id] = {'pid': data['pid'], 'amt': data.get('tAmt') or data.get('amt'),
+                                            'scd': data.get('scd')}
+            params = {'oid': data['pid'], 'amt': data.get('tAmt') or data.get('amt'), 'refId': ref_id}
+            location = _append_query(data['su'], params)
+            self._fire_callbacks('esewa', location, params)
+        self._redirect(location)
+
+    def esewa_transrec(self):
+        data = self._body()
+        payment = self.state.esewa.get(data.get('rid'))
+        ok = (payment is not None and payment['pid'] == data.get('pid')
+              and _same_amount(payment['amt'], data.get('amt')))
+        self._text(200, 'Success' if ok else 'failure')
+
+    # Callback / webhook firing
+
+    def _fire_callbacks(self, gateway, return_location, params):
+        """Deliver the browser redirect and/or webhook server-side, like a real customer/gateway would."""
+        settings = self.state.settings
+        if not (settings['fire_callbacks'] or settings['webhook_url']):
+            return
+        if random.random() < settings['callback_drop_rate']:
+            self.state.count('dropped_callbacks')
+            return
+
+        def deliver():
+            time.sleep(settings['callback_delay_ms'] / 1000.0)
+            if settings['fire_callbacks']:
+                _deliver(self.state, 'callbacks', Request(return_location, method='GET'))
+            if settings['webhook_url']:
+                url = settings['webhook_url'].rstrip('/') + f'/{gateway}'
+                body = json.dumps(params).encode('utf-8')
+                _deliver(self.state, 'webhooks', Request(url, data=body, method='POST',
+                                                         headers={'Content-Type': 'application/json'}))
+
+        threading.Thread(target=deliver, daemon=True).start()
+
+def _deliver(state, kind, request):
+    try:
+        # Redirects from the app's callback route are not followed
+        with urlopen(request, timeout=30) as response:
+            state.count(f'{kind}_{response.status}')
+    except Exception as e:
+        status = getattr(e, 'code', type(e).__name__)
+        state.count(f'{kind}_{status}')
+
+def _append_query(url, params):
+    separator = '&' if urlparse(url).query else '?'
+    return f'{url}{separator}{urlencode(params)}'
+
+def _same_amount(a, b):
+    try:
+        return abs(float(a) - float(b)) < 0.01
+    except (TypeError, ValueError):
+        return False
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Local Khalti/eSewa gateway simulator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--public-url', help='Base URL used in payment_url links (default: http://host:port)')
+    parser.add_argument('--latency-ms', type=float, default=150, help='Mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=50, help='+/- latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of API calls answered with 503')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Fraction of API calls that hang then 504')
+    parser.add_argument('--timeout-ms', type=float, default=15000, help='How long a simulated timeout hangs')
+    parser.add_argument('--decline-rate', type=float, default=0.0, help='Fraction of payments the customer cancels')
+    parser.add_argument('--fire-callbacks', action='store_true',
+                        help='Call the return URL server-side when a payment completes')
+    parser.add_argument('--callback-drop-rate', type=float, default=0.0,
+                        help='Fraction of callbacks/webhooks never delivered')
+    parser.add_argument('--callback-delay-ms', type=float, default=0)
+    parser.add_argument('--webhook-url', help='App webhook base, e.g. http://127.0.0.1:5000/payment/webhook')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), SimulatorHandler)
+    server.daemon_threads = True
+    server.state = SimulatorState(args)
+    server.verbose = args.verbose
+
+    print("🍖 Nepal Meat Shop - Payment Gateway Simulator")
+    print("=" * 40)
+    print(f"🌐 Listening on http://{args.host}:{args.port}")
+    print(f"⏱️  Latency {args.latency_ms}±{args.jitter_ms}ms, errors {args.error_rate:.0%}, "
+          f"timeouts {args.timeout_rate:.0%}, declines {args.decline_rate:.0%}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Simulator stopped")
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Payment Flow Load Test
+Drives initiate -> gateway redirect -> callback -> verify end-to-end against a
+running app that is pointed at scripts/gateway_simulator.py, and reports
+checkout throughput and per-stage latency.
+
+Typical run:
+    python scripts/gateway_simulator.py --latency-ms 200 &
+    PAYMENT_ENVIRONMENT=simulator python backend/mongo_app.py
+    python scripts/load_payment_flow.py --orders 500 --concurrency 20
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+# Add backend directory to Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(script_dir)
+backend_dir = os.path.join(parent_dir, 'backend')
+sys.path.insert(0, backend_dir)
+
+# Change to backend directory and load environment variables
+os.chdir(backend_dir)
+load_dotenv('.env.mongo')
+
+from app.utils.performance import percentile
+
+STAGES = ('initiate', 'redirect', 'callback', 'verify', 'total')
+
+_local = threading.local()
+
+def get_session():
+    """One keep-alive session per load thread."""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='End-to-end payment flow load test')
+    parser.add_argument('--app-url', default='http://127.0.0.1:5000', help='Base URL of the running app')
+    parser.add_argument('--orders', type=int, default=200, help='Number of checkout flows to run')
+    parser.add_argument('--concurrency', type=int, default=10, help='Concurrent customers')
+    parser.add_argument('--gateway', choices=['khalti', 'esewa', 'mixed'], default='mixed')
+    parser.add_argument('--skip-callback', action='store_true',
+                        help='Do not follow the return URL (simulator --fire-callbacks delivers it)')
+    parser.add_argument('--verify-timeout', type=float, default=10.0,
+                        help='Seconds to wait for the order to become paid')
+    parser.add_argument('--json', dest='json_path', help='Write the report as JSON to this file')
+    parser.add_argument('--keep-orders', action='store_true', help='Do not delete the seeded orders')
+    return parser.parse_args()
+
+def seed_orders(db, count, gateway):
+    """Insert pending load-test orders straight into MongoDB."""
+    run_id = uuid.uuid4().hex[:6].upper()
+    orders = []
+    for index in range(count):
+        method = gateway if gateway != 'mixed' else random.choice(['khalti', 'esewa'])
+        orders.append({
+            'order_number': f'LOAD-{run_id}-{index:05d}',
+            'user_id': None,
+            'items': [],
+            'total_amount': float(random.randint(5, 50) * 100),
+            'status': 'pending',
+            'payment_method': method,
+            'payment_status': 'pending',
+            'order_date': datetime.utcnow(),
+            'notes': 'load test'
+        })
+    db.orders.insert_many(orders)
+    return run_id, orders
+
+def run_flow(order, args, db):
+    """One customer checkout. Returns stage timings and the outcome."""
+    session = get_session()
+    timings = {}
+    started = time.perf_counter()
+
+    def stage(name, since):
+        timings[name] = (time.perf_counter() - since) * 1000
+        return time.perf_counter()
+
+    try:
+        # 1. Initiate through the app
+        t = time.perf_counter()
+        response = session.post(f"{args.app_url}/api/payment/initiate", json={
+            'gateway': order['payment_method'],
+            'order_number': order['order_number'],
+            'amount': order['total_amount'],
+            'customer_info': {'name': 'Load Test', 'email': 'load@example.com', 'phone': '9800000000'}
+        }, timeout=30)
+        t = stage('initiate', t)
+        result = response.json() if response.headers.get('Content-Type', '').startswith('application/json') else {}
+        if response.status_code != 200 or not result.get('success'):
+            return {'ok': False, 'error': f'initiate {response.status_code}', 'timings': timings}
+
+        # 2. Customer is redirected to the gateway and pays
+        if order['payment_method'] == 'khalti':
+            gateway_response = session.get(result['payment_url'], allow_redirects=False, timeout=30)
+        else:
+            gateway_response = session.post(result['payment_url'], data=result['form_data'],
+                                            allow_redirects=False, timeout=30)
+        t = stage('redirect', t)
+        return_url = gateway_response.headers.get('Location')
+        if gateway_response.status_code != 302 or not return_url:
+            return {'ok': False, 'error': f'redirect {gateway_response.status_code}', 'timings': timings}
+
+        # 3. Browser lands on the app's callback route, which verifies with the gateway
+        if not args.skip_callback:
+            callback_response = session.get(return_url, allow_redirects=False, timeout=30)
+            t = stage('callback', t)
+            if callback_response.status_code >= 500:
+                return {'ok': False, 'error': f'callback {callback_response.status_code}', 'timings': timings}
+
+        # 4. Order must end up paid
+        deadline = time.monotonic() + args.verify_timeout
+        paid = False
+        while time.monotonic() < deadline:
+            current = db.orders.find_one({'order_number': order['order_number']}, {'payment_status': 1})
+            if current and current.get('payment_status') == 'paid':
+                paid = True
+                break
+            time.sleep(0.05)
+        stage('verify', t)
+        timings['total'] = (time.perf_counter() - started) * 1000
+        return {'ok': paid, 'error': None if paid else 'not paid', 'timings': timings}
+
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        return {'ok': False, 'error': type(e).__name__, 'timings': timings}
+
+def build_report(results, elapsed, args):
+    ok = [r for r in results if r['ok']]
+    errors = {}
+    for r in results:
+        if not r['ok']:
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+
+    stages = {}
+    for name in STAGES:
+        samples = [r['timings'][name] for r in ok if name in r['timings']]
+        stages[name] = {
+            'p50_ms': percentile(samples, 50),
+            'p95_ms': percentile(samples, 95),
+            'p99_ms': percentile(samples, 99),
+            'max_ms': round(max(samples), 1) if samples else 0.0
+        }
+
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'app_url': args.app_url,
+        'orders': len(results),
+        'concurrency': args.concurrency,
+        'gateway': args.gateway,
+        'succeeded': len(ok),
+        'failed': len(results) - len(ok),
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 2),
+        'checkouts_per_second': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        'stages': stages
+    }
+
+def print_report(report):
+    print(f"\n📊 {report['succeeded']}/{report['orders']} checkouts paid in {report['elapsed_seconds']}s "
+          f"→ {report['checkouts_per_second']} checkouts/s (concurrency {report['concurrency']})")
+    if report['errors']:
+        print(f"❌ Failures: {report['errors']}")
+    print(f"{'stage':<10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, row in report['stages'].items():
+        print(f"{name:<10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+
+def main():
+    args = parse_args()
+
+    mongo_uri = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
+    db_name = os.environ.get('MONGO_DBNAME', os.environ.get('MONGO_DB_NAME', 'nepal_meat_shop'))
+    client = MongoClient(mongo_uri)
+    db = client[db_name]
+
+    print("🍖 Nepal Meat Shop - Payment Flow Load Test")
+    print("=" * 40)
+
+    run_id, orders = seed_orders(db, args.orders, args.gateway)
+    print(f"🧾 Seeded {len(orders)} pending orders (LOAD-{run_id}-*)")
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda order: run_flow(order, args, db), orders))
+        elapsed = time.perf_counter() - started
+
+        report = build_report(results, elapsed, args)
+        print_report(report)
+        if args.json_path:
+            with open(os.path.join(parent_dir, args.json_path) if not os.path.isabs(args.json_path)
+                      else args.json_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Report written to {args.json_path}")
+    finally:
+        if not args.keep_orders:
+            deleted = db.orders.delete_many({'order_number': {'$regex': f'^LOAD-{run_id}-'}}).deleted_count
+            print(f"🧹 Removed {deleted} load-test orders")
+        client.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Local Replica Set Script
+Runs a three-member MongoDB replica set on localhost for trying secondary
+reads, and checks that the analytics, exports and reports workloads are
+served by secondaries while writes stay on the primary.
+
+    python scripts/local_replica_set.py start
+    python scripts/local_replica_set.py check
+    python scripts/local_replica_set.py stop --clean
+"""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Add backend directory to Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(script_dir)
+backend_dir = os.path.join(parent_dir, 'backend')
+sys.path.insert(0, backend_dir)
+
+# Change to backend directory and load environment variables
+os.chdir(backend_dir)
+load_dotenv('.env.mongo')
+
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), 'nepal_meat_shop_rs')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Local replica set for secondary read testing')
+    parser.add_argument('action', choices=['start', 'stop', 'status', 'check'])
+    parser.add_argument('--ports', default='27041,27042,27043', help='Comma separated member ports')
+    parser.add_argument('--name', default='rs0', help='Replica set name')
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='Data and log directory')
+    parser.add_argument('--mongod', default='mongod', help='mongod executable')
+    parser.add_argument('--db', default='nepal_meat_shop_rs_check', help='Database used by check')
+    parser.add_argument('--clean', action='store_true', help='stop: also delete the data directory')
+    args = parser.parse_args()
+    args.ports = [int(port) for port in args.ports.split(',') if port.strip()]
+    return args
+
+def replica_set_uri(args):
+    hosts = ','.join(f'127.0.0.1:{port}' for port in args.ports)
+    return f'mongodb://{hosts}/?replicaSet={args.name}'
+
+def _member_dir(args, port):
+    return os.path.join(args.dir, f'member-{port}')
+
+def _pid(args, port):
+    """PID of a running member, from its pidfile."""
+    try:
+        with open(os.path.join(_member_dir(args, port), 'mongod.pid')) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+def _direct_client(port, timeout_ms=2000):
+    from pymongo import MongoClient
+    return MongoClient('127.0.0.1', port, directConnection=True, serverSelectionTimeoutMS=timeout_ms)
+
+def _wait(condition, timeout, message):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if condition():
+                return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"❌ {message}")
+
+def start(args):
+    mongod = shutil.which(args.mongod)
+    if not mongod:
+        raise SystemExit(f"❌ {args.mongod} not found - install MongoDB or pass --mongod /path/to/mongod")
+
+    for port in args.ports:
+        if _pid(args, port):
+            print(f"✅ Member on port {port} already running")
+            continue
+        member_dir = _member_dir(args, port)
+        os.makedirs(member_dir, exist_ok=True)
+        subprocess.Popen([
+            mongod, '--replSet', args.name, '--port', str(port), '--bind_ip', '127.0.0.1',
+            '--dbpath', member_dir,
+            '--logpath', os.path.join(member_dir, 'mongod.log'), '--logappend',
+            '--pidfilepath', os.path.join(member_dir, 'mongod.pid'),
+            '--oplogSize', '128'
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        print(f"🚀 Started member on port {port} ({member_dir})")
+
+    for port in args.ports:
+        _wait(lambda: _direct_client(port).admin.command('ping'), 30,
+              f"Member on port {port} did not come up - see {_member_dir(args, port)}/mongod.log")
+
+    from pymongo.errors import OperationFailure
+    first = _direct_client(args.ports[0])
+    try:
+        first.admin.command('replSetGetStatus')
+    except OperationFailure:
+        # Not initiated yet; the first member gets priority to become primary
+        first.admin.command('replSetInitiate', {
+            '_id': args.name,
+            'members': [{'_id': index, 'host': f'127.0.0.1:{port}', 'priority': 2 if index == 0 else 1}
+                        for index, port in enumerate(args.ports)]
+        })
+        print(f"🔗 Initiated replica set {args.name}")
+
+    def healthy():
+        states = [member['state'] for member in first.admin.command('replSetGetStatus')['members']]
+        return states.count(1) == 1 and states.count(2) == len(args.ports) - 1
+    _wait(healthy, 60, 'Replica set did not elect a primary with healthy secondaries')
+
+    print(f"\n✅ Replica set {args.name} is up. Point the app at it with:")
+    print(f"   MONGO_URI={replica_set_uri(args)}")
+
+def stop(args):
+    for port in args.ports:
+        pid = _pid(args, port)
+        if not pid:
+            continue
+        os.kill(pid, signal.SIGTERM)
+        _wait(lambda: _pid(args, port) is None, 30, f"Member on port {port} (pid {pid}) did not stop")
+        print(f"🛑 Stopped member on port {port}")
+    if args.clean:
+        shutil.rmtree(args.dir, ignore_errors=True)
+        print(f"🧹 Removed {args.dir}")
+
+def status(args):
+    from pymongo import MongoClient
+    client = MongoClient(replica_set_uri(args), serverSelectionTimeoutMS=5000)
+    members = client.admin.command('replSetGetStatus')['members']
+    primary_optime = next((member['optimeDate'] for member in members if member['state'] == 1), None)
+    print(f"{'member':<20}{'state':<12}{'lag (s)':>8}")
+    for member in members:
+        lag = (primary_optime - member['optimeDate']).total_seconds() if primary_optime and 'optimeDate' in member else None
+        print(f"{member['name']:<20}{member['stateStr']:<12}{'-' if lag is None else round(lag, 1):>8}")
+
+def build_app(uri, db_name):
+    """Minimal Flask app so mongo_db is initialized exactly like the web app."""
+    from flask import Flask
+    from app.config.mongo_settings import mongo_config
+    from app.utils.mongo_db import mongo_db
+
+    app = Flask(__name__)
+    app.config.from_object(mongo_config[os.environ.get('FLASK_ENV', 'development')])
+    app.config['MONGO_URI'] = uri
+    app.config['MONGO_DBNAME'] = db_name
+    mongo_db.init_app(app)
+    return app
+
+def check(args):
+    """Record which member served each workload's reads (exit 1 on a routing mismatch)."""
+    from pymongo import monitoring
+    from pymongo.write_concern import WriteConcern
+
+    served = []
+
+    class ServerRecorder(monitoring.CommandListener):
+        def started(self, event):
+            served.append((event.command_name, event.connection_id))
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    # Registered before the app creates its client
+    monitoring.register(ServerRecorder())
+    app = build_app(replica_set_uri(args), args.db)
+    from app.utils.mongo_db import mongo_db, READ_WORKLOADS
+    from app.utils.analytics import BusinessAnalytics
+
+    client = mongo_db.client
+    client.admin.command('ping')
+    _wait(lambda: client.primary and len(client.secondaries) == len(args.ports) - 1, 30,
+          'Primary and secondaries not discovered - is the replica set running? (start)')
+    primary = client.primary
+
+    def last_server(command_name):
+        addresses = [address for name, address in served if name == command_name]
+        if not addresses:
+            return '-'
+        return 'primary' if addresses[-1] == primary else 'secondary'
+
+    rows = []
+    order_number = f"RS-CHECK-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+    # Write acknowledged by every member, so secondaries can already see it
+    orders = mongo_db.db.orders.with_options(write_concern=WriteConcern(w=len(args.ports), wtimeout=10000))
+    served.clear()
+    orders.insert_one({'order_number': order_number, 'status': 'pending', 'total_amount': 0.0,
+                       'order_date': datetime.utcnow(), 'items': []})
+    rows.append(('checkout write', 'primary', last_server('insert')))
+
+    try:
+        for workload in READ_WORKLOADS:
+            preference = mongo_db.read_preferences[workload]
+            expected = 'primary' if preference.mode == 0 else 'secondary'  # 0: primary mode
+            served.clear()
+            mongo_db.reader(workload).orders.count_documents({'order_number': order_number})
+            staleness = f'{preference.max_staleness}s' if preference.max_staleness > 0 else 'unbounded'
+            rows.append((f'{workload} reads ({preference.name}, max staleness {staleness})',
+                         expected, last_server('aggregate')))
+
+        with app.app_context():
+            expected = 'primary' if mongo_db.read_preferences['analytics'].mode == 0 else 'secondary'
+            served.clear()
+            BusinessAnalytics.get_filtered_orders(limit=5)
+            rows.append(('BusinessAnalytics.get_filtered_orders', expected, last_server('find')))
+            served.clear()
+            BusinessAnalytics.get_delivery_statistics()
+            rows.append(('BusinessAnalytics.get_delivery_statistics', expected, last_server('find')))
+    finally:
+        mongo_db.db.orders.delete_one({'order_number': order_number})
+
+    print(f"\n{'operation':<60}{'expected':<12}{'served by':<12}")
+    mismatches = 0
+    for label, expected, actual in rows:
+        ok = expected == actual
+        mismatches += not ok
+        print(f"{label:<60}{expected:<12}{actual:<12}{'✅' if ok else '❌'}")
+    if mismatches:
+        print(f"\n❌ {mismatches} operation(s) not routed as configured")
+        return 1
+    print("\n✅ Writes went to the primary and read-only workloads followed their read preference")
+    return 0
+
+def main():
+    args = parse_args()
+    if args.action == 'start':
+        start(args)
+    elif args.action == 'stop':
+        stop(args)
+    elif args.action == 'status':
+        status(args)
+    else:
+        return check(args)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Manage Indexes Script
+Creates the MongoDB indexes declared in app.utils.mongo_db.INDEXES. Run it
+during deployment when the app uses MONGO_INDEX_MODE=migrate (the production
+default), so workers start without building indexes.
+
+    python scripts/manage_indexes.py --dry-run
+    python scripts/manage_indexes.py
+"""
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Add backend directory to Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(script_dir)
+backend_dir = os.path.join(parent_dir, 'backend')
+sys.path.insert(0, backend_dir)
+
+# Change to backend directory and load environment variables
+os.chdir(backend_dir)
+load_dotenv('.env.mongo')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Create the declared MongoDB indexes')
+    parser.add_argument('--collection', action='append',
+                        help='Collection to check (repeatable, default: all declared)')
+    parser.add_argument('--dry-run', action='store_true', help='Only list missing indexes')
+    return parser.parse_args()
+
+def build_app():
+    """Minimal Flask app so mongo_db is initialized exactly like the web app."""
+    from flask import Flask
+    from app.config.mongo_settings import mongo_config
+    from app.utils.mongo_db import mongo_db
+
+    app = Flask(__name__)
+    app.config.from_object(mongo_config[os.environ.get('FLASK_ENV', 'development')])
+    mongo_db.init_app(app)
+    return app
+
+def main():
+    args = parse_args()
+    build_app()
+    from app.utils.mongo_db import mongo_db, INDEXES
+
+    collections = args.collection or list(INDEXES)
+    unknown = [name for name in collections if name not in INDEXES]
+    if unknown:
+        raise SystemExit(f"❌ No indexes declared for: {', '.join(unknown)}")
+
+    missing = {}
+    print(f"{'collection':<18}{'declared':>9}{'missing':>9}  undeclared")
+    for name in collections:
+        existing = set(mongo_db.db[name].index_information())
+        declared = {index.document['name'] for index in INDEXES[name]}
+        missing[name] = sorted(declared - existing)
+        undeclared = sorted(existing - declared - {'_id_'})
+        print(f"{name:<18}{len(declared):>9}{len(missing[name]):>9}  {', '.join(undeclared) or '-'}")
+
+    pending = [name for name in collections if missing[name]]
+    if not pending:
+        print("\n✅ All declared indexes exist")
+        return 0
+    for name in pending:
+        print(f"   {name}: {', '.join(missing[name])}")
+    if args.dry_run:
+        print(f"\n🔍 Dry run - {sum(len(missing[name]) for name in pending)} index(es) not created")
+        return 0
+
+    started = time.perf_counter()
+    mongo_db.ensure_indexes(pending)
+    print(f"\n✅ Created missing indexes on {', '.join(pending)} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
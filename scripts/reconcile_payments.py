@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Reconcile Payments Script
+Re-checks pending Khalti/eSewa orders against the payment gateways and
+updates their payment status. Run once, or on a schedule with --interval.
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+from dotenv import load_dotenv
+
+# Add backend directory to Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(script_dir)
+backend_dir = os.path.join(parent_dir, 'backend')
+sys.path.insert(0, backend_dir)
+
+# Change to backend directory and load environment variables
+os.chdir(backend_dir)
+load_dotenv('.env.mongo')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Reconcile pending online payments')
+    parser.add_argument('--gateway', action='append', choices=['khalti', 'esewa'],
+                        help='Gateway to reconcile (repeatable, default: all)')
+    parser.add_argument('--workers', type=int, help='Concurrent gateway lookups')
+    parser.add_argument('--rate', type=float, help='Max gateway lookups per second (0 = unlimited)')
+    parser.add_argument('--page-size', type=int, help='Orders fetched per page / bulk write')
+    parser.add_argument('--min-age', type=int, help='Only orders older than this many minutes')
+    parser.add_argument('--limit', type=int, help='Stop after this many orders')
+    parser.add_argument('--interval', type=int, default=0,
+                        help='Repeat every N seconds (default: run once)')
+    parser.add_argument('--dry-run', action='store_true', help='Look up payments but do not write')
+    return parser.parse_args()
+
+def build_app():
+    """Minimal Flask app so mongo_db is initialized exactly like the web app."""
+    from flask import Flask
+    from app.config.mongo_settings import mongo_config
+    from app.utils.mongo_db import mongo_db
+
+    app = Flask(__name__)
+    app.config.from_object(mongo_config[os.environ.get('FLASK_ENV', 'development')])
+    mongo_db.init_app(app)
+    return app
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    build_app()
+    from app.services.payment_reconciliation import PaymentReconciler
+
+    reconciler = PaymentReconciler(
+        workers=args.workers,
+        rate_per_second=args.rate,
+        page_size=args.page_size,
+        min_age_minutes=args.min_age,
+        dry_run=args.dry_run
+    )
+
+    print("🍖 Nepal Meat Shop - Payment Reconciliation")
+    print("=" * 40)
+
+    while True:
+        stats = reconciler.run(gateways=args.gateway, limit=args.limit)
+        print(f"✅ Checked {stats['checked']} orders in {stats['elapsed_seconds']}s: "
+              f"{stats['paid']} paid, {stats['failed']} failed, {stats['refunded']} refunded, "
+              f"{stats['unchanged']} unchanged, {stats['skipped']} skipped, {stats['errors']} errors"
+              f"{' (dry run)' if args.dry_run else ''}")
+
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n👋 Reconciliation stopped")
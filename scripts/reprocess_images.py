@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Reprocess Images Script
+Regenerates the thumb/card/detail variants of every uploaded image in the
+uploads folder (products, profiles, qr_codes) in a process pool, and records
+them on the products, users and QR codes that show each image. Run it after
+changing variant sizes or quality settings, or for uploads made before
+variants existed.
+
+    python scripts/reprocess_images.py --dry-run
+    python scripts/reprocess_images.py --missing-only --workers 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+# Add backend directory to Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(script_dir)
+backend_dir = os.path.join(parent_dir, 'backend')
+sys.path.insert(0, backend_dir)
+
+# Change to backend directory and load environment variables
+os.chdir(backend_dir)
+load_dotenv('.env.mongo')
+
+from app.services.image_queue import FOLDER_KINDS
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Regenerate variants of uploaded images')
+    parser.add_argument('--folder', action='append', choices=sorted(FOLDER_KINDS),
+                        help='Upload folder to process (repeatable, default: all)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Image processes')
+    parser.add_argument('--missing-only', action='store_true',
+                        help='Skip images that already have all their variants')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the images to process')
+    return parser.parse_args()
+
+def build_app():
+    """Minimal Flask app so mongo_db and the image queue are set up exactly like the web app."""
+    from flask import Flask
+    from app.config.mongo_settings import mongo_config
+    from app.utils.mongo_db import mongo_db
+    from app.services.image_queue import image_queue
+
+    app = Flask(__name__)
+    app.config.from_object(mongo_config[os.environ.get('FLASK_ENV', 'development')])
+    mongo_db.init_app(app)
+    image_queue.init_app(app)
+    return app
+
+def find_uploads(upload_folder, folders, missing_only, jpeg_quality, webp_quality):
+    """Relative paths of the original uploads (not their variants) in each folder, sharded or not."""
+    from app.utils.image_variants import existing_variants
+
+    for folder in folders:
+        folder_path = os.path.join(upload_folder, folder)
+        for directory, subdirectories, filenames in os.walk(folder_path):
+            subdirectories[:] = sorted(name for name in subdirectories if name != 'variants')
+            for filename in sorted(filenames):
+                if filename.startswith('.'):
+                    continue
+                relative_path = os.path.relpath(os.path.join(directory, filename), upload_folder).replace(os.sep, '/')
+                if missing_only and existing_variants(relative_path, upload_folder, jpeg_quality, webp_quality):
+                    continue
+                yield folder, relative_path
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    build_app()
+    from app.utils.mongo_db import mongo_db
+    from app.utils.image_variants import create_variants
+    from app.services.image_queue import image_queue, DONE, PENDING
+
+    print("🍖 Nepal Meat Shop - Reprocess Images")
+    print("=" * 40)
+
+    folders = args.folder or sorted(FOLDER_KINDS)
+    uploads = list(find_uploads(image_queue.upload_folder, folders, args.missing_only,
+                                image_queue.jpeg_quality, image_queue.webp_quality))
+    print(f"📁 {len(uploads)} image(s) to process in {', '.join(folders)} ({image_queue.upload_folder})")
+    if args.dry_run:
+        for _, relative_path in uploads:
+            print(f"   {relative_path}")
+        print("\n🔍 Dry run - no variants written")
+        return 0
+    if not uploads:
+        print("✅ Nothing to do")
+        return 0
+
+    started = time.perf_counter()
+    processed = unreadable = failed = documents = 0
+    # spawn: the parent already holds a MongoClient, which must not be forked
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(create_variants, relative_path, image_queue.upload_folder,
+                        image_queue.jpeg_quality, image_queue.webp_quality): (folder, relative_path)
+            for folder, relative_path in uploads
+        }
+        for future in as_completed(futures):
+            folder, relative_path = futures[future]
+            try:
+                variants = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {relative_path}: {e}")
+                continue
+
+            processed += 1
+            if not variants:
+                unreadable += 1
+            documents += image_queue.store_variants(FOLDER_KINDS[folder], relative_path, variants)
+            # Jobs still queued for this file have nothing left to do
+            mongo_db.db.image_jobs.update_many(
+                {'path': relative_path, 'status': PENDING},
+                {'$set': {'status': DONE, 'processed_at': datetime.utcnow()}}
+            )
+
+    print(f"✅ Processed {processed} image(s) in {time.perf_counter() - started:.1f}s: "
+          f"{processed - unreadable} with variants, {unreadable} not resizable (served as uploaded), "
+          f"{failed} failed, {documents} document(s) updated")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n👋 Reprocessing stopped")